@@ -0,0 +1,377 @@
+"""
+Columnar Synthesis Engine - draws whole columns at once with NumPy
+Run: pip install numpy faker
+Used by: python data_generator.py --engine numpy
+
+Every builder returns {column: ndarray} in INSERT_COLUMNS order for the rows
+whose IDs fall in (start, stop]. Text that needs Faker (names, addresses,
+sentences...) is sampled from pools built once per seed, so no Faker call
+happens per row. Nullable columns are object arrays holding None.
+"""
+
+from datetime import timedelta
+from functools import lru_cache
+from itertools import permutations
+
+import numpy as np
+from faker import Faker
+
+from data_generator import (
+    APPOINTMENT_TIMES, BED_LAYOUT, BLOOD_GROUPS, CITIES, DEPARTMENTS, DIAGNOSES,
+    INSERT_COLUMNS, INSURANCE_PROVIDERS, LAB_TESTS, MEDICINES, SPECIALIZATIONS,
+    STAFF_ROLES, STAFF_SALARIES, SYMPTOMS, TOTAL_BEDS, WARDS,
+)
+
+POOL_SIZE = 2000
+
+# random.sample(SYMPTOMS, k) for k in 1..3, as joined strings grouped by k
+SYMPTOM_COMBOS = [np.array([', '.join(p) for p in permutations(SYMPTOMS, k)]) for k in (1, 2, 3)]
+
+
+@lru_cache(maxsize=4)
+def faker_pools(seed, size=POOL_SIZE):
+    """Precompute Faker-backed value pools for one seed (cached per process)."""
+    faker = Faker()
+    faker.seed_instance(seed)
+
+    def pool(fn):
+        return np.array([fn() for _ in range(size)], dtype=object)
+
+    return {
+        'first_name': pool(faker.first_name),
+        'first_name_male': pool(faker.first_name_male),
+        'first_name_female': pool(faker.first_name_female),
+        'last_name': pool(faker.last_name),
+        'name': pool(faker.name),
+        'email_user': pool(faker.user_name),
+        'email': pool(faker.email),
+        'phone': pool(lambda: faker.phone_number()[:15]),
+        'street_address': pool(faker.street_address),
+        'postcode': pool(lambda: faker.postcode()[:10]),
+        'sentence': pool(faker.sentence),
+        'company': pool(faker.company),
+        'company_email': pool(faker.company_email),
+    }
+
+
+# ============================================
+# COLUMN HELPERS
+# ============================================
+
+def _pick(rng, pool, n):
+    return pool[rng.integers(0, len(pool), n)]
+
+
+def _weighted(rng, values, weights, n):
+    p = np.asarray(weights, dtype=float)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n, p=p / p.sum())]
+
+
+def _dates(rng, today, first_offset, last_offset, n):
+    """Uniform dates between today + first_offset and today + last_offset days, inclusive."""
+    base = np.datetime64(today, 'D')
+    return base + rng.integers(first_offset, last_offset + 1, n).astype('timedelta64[D]')
+
+
+def _nullable(values, keep):
+    out = np.asarray(values).astype(object)
+    out[~keep] = None
+    return out
+
+
+def _ids(rng, upper, n):
+    return rng.integers(1, upper + 1, n)
+
+
+# ============================================
+# TABLE BUILDERS
+# ============================================
+
+def department_columns(counts, start, stop, rng, pools, now):
+    ids = np.arange(start + 1, stop + 1)
+    return {
+        'department_name': np.array(DEPARTMENTS[start:stop], dtype=object),
+        'floor_number': ids % 4 + 1,
+        'phone_extension': np.array([f"10{i:02d}" for i in ids], dtype=object),
+    }
+
+
+def doctor_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    ids = np.arange(start + 1, stop + 1)
+    dept_ids = np.arange(start, stop) % 12 + 1
+    specializations = np.array([SPECIALIZATIONS[d] for d in DEPARTMENTS], dtype=object)
+    # Suffix the doctor_id to keep emails unique without Faker's unique proxy
+    emails = _pick(rng, pools['email_user'], n) + ids.astype(str).astype(object) + '@example.com'
+    return {
+        'first_name': _pick(rng, pools['first_name'], n),
+        'last_name': _pick(rng, pools['last_name'], n),
+        'email': emails,
+        'phone': _pick(rng, pools['phone'], n),
+        'specialization': specializations[dept_ids - 1],
+        'department_id': dept_ids,
+        'experience_years': rng.integers(2, 26, n),
+        'consultation_fee': rng.choice([500, 700, 1000, 1500, 2000], n),
+        'hire_date': _dates(rng, now.date(), -3652, -365, n),
+        'status': _weighted(rng, ['Active', 'On Leave'], [95, 5], n),
+    }
+
+
+def patient_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    male = rng.random(n) < 0.5
+    first_names = np.where(male, _pick(rng, pools['first_name_male'], n),
+                           _pick(rng, pools['first_name_female'], n))
+    return {
+        'first_name': first_names,
+        'last_name': _pick(rng, pools['last_name'], n),
+        'date_of_birth': _dates(rng, now.date(), -33237, -366, n),
+        'gender': np.where(male, 'Male', 'Female').astype(object),
+        'blood_group': _pick(rng, np.array(BLOOD_GROUPS, dtype=object), n),
+        'phone': _pick(rng, pools['phone'], n),
+        'email': _nullable(_pick(rng, pools['email'], n), rng.random(n) > 0.3),
+        'address': _pick(rng, pools['street_address'], n),
+        'city': _pick(rng, np.array(CITIES, dtype=object), n),
+        'state': np.full(n, 'Maharashtra', dtype=object),
+        'zip_code': _pick(rng, pools['postcode'], n),
+        'emergency_contact_name': _pick(rng, pools['name'], n),
+        'emergency_contact_phone': _pick(rng, pools['phone'], n),
+        'registration_date': _dates(rng, now.date(), -730, 0, n),
+        'status': _weighted(rng, ['Active', 'Inactive'], [95, 5], n),
+    }
+
+
+def appointment_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    today = np.datetime64(now.date(), 'D')
+    # Faker reads the row builder's '+1m' as one minute, so no date lands in the future
+    app_dates = _dates(rng, now.date(), -730, 0, n)
+    past_status = _weighted(rng, ['Completed', 'Cancelled', 'No Show'], [85, 10, 5], n)
+
+    k = rng.integers(0, 3, n)
+    symptoms = np.empty(n, dtype=object)
+    for size, combos in enumerate(SYMPTOM_COMBOS):
+        rows = k == size
+        symptoms[rows] = combos[rng.integers(0, len(combos), rows.sum())]
+
+    return {
+        'patient_id': _ids(rng, counts['patients'], n),
+        'doctor_id': _ids(rng, counts['doctors'], n),
+        'appointment_date': app_dates,
+        'appointment_time': _pick(rng, np.array(APPOINTMENT_TIMES, dtype=object), n),
+        'appointment_type': _weighted(rng, ['Consultation', 'Follow-up', 'Routine Checkup', 'Emergency'],
+                                      [50, 25, 20, 5], n),
+        'status': np.where(app_dates < today, past_status, 'Scheduled').astype(object),
+        'symptoms': symptoms,
+    }
+
+
+def medical_record_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    record_dates = _dates(rng, now.date(), -730, 0, n)
+    follow_up = record_dates + rng.choice([7, 14, 30], n).astype('timedelta64[D]')
+    systolic = rng.integers(100, 141, n).astype(str).astype(object)
+    diastolic = rng.integers(60, 91, n).astype(str).astype(object)
+    return {
+        'patient_id': _ids(rng, counts['patients'], n),
+        'doctor_id': _ids(rng, counts['doctors'], n),
+        'appointment_id': _nullable(_ids(rng, counts['appointments'], n), rng.random(n) > 0.1),
+        'diagnosis': _pick(rng, np.array(DIAGNOSES, dtype=object), n),
+        'treatment': _pick(rng, pools['sentence'], n),
+        'prescription': _pick(rng, pools['sentence'], n),
+        'blood_pressure': systolic + '/' + diastolic,
+        'heart_rate': rng.integers(60, 101, n),
+        'temperature': np.round(rng.uniform(97, 100, n), 1),
+        'weight': np.round(rng.uniform(40, 100, n), 1),
+        'record_date': record_dates,
+        'follow_up_date': _nullable(follow_up, rng.random(n) > 0.3),
+    }
+
+
+def ward_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    ids = np.arange(start + 1, stop + 1)
+    return {
+        'ward_name': np.array([w[0] for w in WARDS[start:stop]], dtype=object),
+        'department_id': rng.integers(1, 13, n),
+        'floor_number': ids % 4 + 1,
+        'total_beds': np.array([w[2] for w in WARDS[start:stop]]),
+    }
+
+
+def bed_columns(counts, start, stop, rng, pools, now):
+    layout = BED_LAYOUT[start:stop]
+    return {
+        'ward_id': np.array([b[0] for b in layout]),
+        'bed_number': np.array([f"{b[1][:2].upper()}{b[4]:03d}" for b in layout], dtype=object),
+        'bed_type': np.array([b[2] for b in layout], dtype=object),
+        'daily_rate': np.array([b[3] for b in layout]),
+        'status': _weighted(rng, ['Available', 'Occupied', 'Maintenance'], [60, 35, 5], len(layout)),
+    }
+
+
+def admission_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    now64 = np.datetime64(now, 'us')
+    span_us = int(timedelta(days=730.48) / timedelta(microseconds=1))
+    adm_dates = now64 - rng.integers(0, span_us + 1, n).astype('timedelta64[us]')
+    discharged = adm_dates < now64 - np.timedelta64(7, 'D')
+    dis_dates = adm_dates + rng.integers(1, 15, n).astype('timedelta64[D]')
+    return {
+        'patient_id': _ids(rng, counts['patients'], n),
+        'doctor_id': _ids(rng, counts['doctors'], n),
+        'bed_id': _ids(rng, TOTAL_BEDS, n),
+        'admission_date': adm_dates,
+        'discharge_date': _nullable(dis_dates, discharged),
+        'admission_type': _weighted(rng, ['Emergency', 'Planned', 'Transfer'], [30, 60, 10], n),
+        'diagnosis': _pick(rng, np.array(DIAGNOSES, dtype=object), n),
+        'status': np.where(discharged, 'Discharged', 'Admitted').astype(object),
+    }
+
+
+def billing_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    bill_dates = _dates(rng, now.date(), -730, 0, n)
+    subtotal = rng.choice([500, 700, 1000, 1500, 2000, 3000, 5000, 8000, 15000, 25000], n).astype(float)
+    discount = subtotal * rng.choice([0, 0, 0.05, 0.10], n)
+    tax = (subtotal - discount) * 0.05
+    total = subtotal - discount + tax
+
+    days_old = (np.datetime64(now.date(), 'D') - bill_dates).astype(int)
+    status = np.select(
+        [days_old > 30, days_old > 7],
+        [_weighted(rng, ['Paid', 'Overdue'], [85, 15], n),
+         _weighted(rng, ['Paid', 'Partial', 'Pending'], [70, 15, 15], n)],
+        _weighted(rng, ['Paid', 'Pending'], [50, 50], n),
+    ).astype(object)
+    paid = status == 'Paid'
+
+    return {
+        'patient_id': _ids(rng, counts['patients'], n),
+        'appointment_id': _nullable(_ids(rng, counts['appointments'], n), rng.random(n) > 0.2),
+        'admission_id': _nullable(_ids(rng, counts['admissions'], n), rng.random(n) > 0.7),
+        'bill_date': bill_dates,
+        'subtotal': subtotal,
+        'tax': np.round(tax, 2),
+        'discount': np.round(discount, 2),
+        'total_amount': np.round(total, 2),
+        'payment_status': status,
+        'payment_method': _nullable(_pick(rng, np.array(['Cash', 'Card', 'Insurance', 'Online'], dtype=object), n), paid),
+        'payment_date': _nullable(bill_dates + rng.integers(0, 16, n).astype('timedelta64[D]'), paid),
+        'due_date': bill_dates + np.timedelta64(30, 'D'),
+    }
+
+
+def lab_test_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    tests = rng.integers(0, len(LAB_TESTS), n)
+    test_dates = _dates(rng, now.date(), -730, 0, n)
+    completed = test_dates < np.datetime64(now.date() - timedelta(days=3), 'D')
+    result_dates = test_dates + rng.integers(1, 4, n).astype('timedelta64[D]')
+    results = np.char.mod('%.1f', rng.uniform(50, 150, n)).astype(object)
+    open_status = _pick(rng, np.array(['Pending', 'In Progress'], dtype=object), n)
+    return {
+        'patient_id': _ids(rng, counts['patients'], n),
+        'doctor_id': _ids(rng, counts['doctors'], n),
+        'test_name': np.array([t[0] for t in LAB_TESTS], dtype=object)[tests],
+        'test_category': np.array([t[1] for t in LAB_TESTS], dtype=object)[tests],
+        'test_date': test_dates,
+        'result_date': _nullable(result_dates, completed),
+        'result_value': _nullable(results, completed),
+        'normal_range': np.full(n, '70-110', dtype=object),
+        'status': np.where(completed, 'Completed', open_status).astype(object),
+        'cost': np.array([t[2] for t in LAB_TESTS])[tests],
+    }
+
+
+def medicine_columns(counts, start, stop, rng, pools, now):
+    meds = MEDICINES[start:stop]
+    n = len(meds)
+    return {
+        'medicine_name': np.array([m[0] for m in meds], dtype=object),
+        'generic_name': np.array([m[1] for m in meds], dtype=object),
+        'category': np.array([m[2] for m in meds], dtype=object),
+        'manufacturer': _pick(rng, pools['company'], n),
+        'unit_price': np.array([m[3] for m in meds]),
+        'quantity_in_stock': rng.integers(100, 1001, n),
+        'reorder_level': np.full(n, 50),
+        'expiry_date': _dates(rng, now.date(), 0, 1096, n),
+    }
+
+
+def staff_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    roles = rng.integers(0, len(STAFF_ROLES), n)
+    low = np.array([STAFF_SALARIES[r][0] for r in STAFF_ROLES])[roles]
+    high = np.array([STAFF_SALARIES[r][1] for r in STAFF_ROLES])[roles]
+    return {
+        'first_name': _pick(rng, pools['first_name'], n),
+        'last_name': _pick(rng, pools['last_name'], n),
+        'role': np.array(STAFF_ROLES, dtype=object)[roles],
+        'department_id': rng.integers(1, 13, n),
+        'phone': _pick(rng, pools['phone'], n),
+        'email': _pick(rng, pools['email'], n),
+        'hire_date': _dates(rng, now.date(), -2922, 0, n),
+        'salary': rng.integers(low, high + 1),
+        'shift': _pick(rng, np.array(['Morning', 'Afternoon', 'Night'], dtype=object), n),
+        'status': _weighted(rng, ['Active', 'Inactive'], [95, 5], n),
+    }
+
+
+def insurance_provider_columns(counts, start, stop, rng, pools, now):
+    providers = INSURANCE_PROVIDERS[start:stop]
+    n = len(providers)
+    return {
+        'provider_name': np.array([p[0] for p in providers], dtype=object),
+        'contact_phone': _pick(rng, pools['phone'], n),
+        'email': _pick(rng, pools['company_email'], n),
+        'coverage_percentage': np.array([p[1] for p in providers]),
+    }
+
+
+def insurance_claim_columns(counts, start, stop, rng, pools, now):
+    n = stop - start
+    claim_amt = rng.integers(5000, 50001, n)
+    status = _weighted(rng, ['Submitted', 'Processing', 'Approved', 'Rejected', 'Paid'],
+                       [10, 15, 25, 10, 40], n)
+    approved = (status == 'Approved') | (status == 'Paid')
+    sub_dates = _dates(rng, now.date(), -365, 0, n)
+    return {
+        'bill_id': _ids(rng, counts['billing'], n),
+        'insurance_id': _ids(rng, len(INSURANCE_PROVIDERS), n),
+        'claim_amount': claim_amt,
+        'approved_amount': _nullable(np.round(claim_amt * rng.uniform(0.6, 1.0, n), 2), approved),
+        'status': status,
+        'submission_date': sub_dates,
+        'approval_date': _nullable(sub_dates + rng.integers(7, 31, n).astype('timedelta64[D]'), approved),
+        'rejection_reason': _nullable(np.full(n, 'Documentation incomplete', dtype=object), status == 'Rejected'),
+    }
+
+
+COLUMN_BUILDERS = {
+    'departments': department_columns,
+    'doctors': doctor_columns,
+    'patients': patient_columns,
+    'appointments': appointment_columns,
+    'medical_records': medical_record_columns,
+    'wards': ward_columns,
+    'beds': bed_columns,
+    'admissions': admission_columns,
+    'billing': billing_columns,
+    'lab_tests': lab_test_columns,
+    'medicines': medicine_columns,
+    'staff': staff_columns,
+    'insurance_providers': insurance_provider_columns,
+    'insurance_claims': insurance_claim_columns,
+}
+
+
+def build_columns(table, counts, start, stop, seed, part_seed, now):
+    columns = COLUMN_BUILDERS[table](counts, start, stop, np.random.default_rng(part_seed),
+                                     faker_pools(seed), now)
+    return {name: columns[name] for name in INSERT_COLUMNS[table]}
+
+
+def columns_to_rows(columns):
+    """Turn a column batch into DB-API parameter tuples of plain Python values."""
+    return list(zip(*(values.tolist() for values in columns.values())))
@@ -2,16 +2,27 @@
 Hospital Data Generator - Generates 50,000+ records
 Run: pip install faker mysql-connector-python
 Then: python data_generator.py
+Bulk load at 10x on 8 cores: python data_generator.py --scale 10 --bulk --workers 8
+Vectorized (needs numpy): python data_generator.py --scale 100 --bulk --engine numpy
+To files instead of MySQL: python data_generator.py --scale 100 --engine numpy --sink parquet --out shards
+Per-table profile: python data_generator.py --bulk --profile profile.json [--profile-memory] [--cprofile patients]
 """
 
+import argparse
+import hashlib
+import multiprocessing
+import os
 import random
+import sys
+import time
+from collections import deque
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+from itertools import chain, islice
 from faker import Faker
 import mysql.connector
 
-fake = Faker()
-Faker.seed(2026)
-random.seed(2026)
+SEED = 2026
 
 # UPDATE THESE
 DB_CONFIG = {
@@ -91,311 +102,575 @@ WARDS = [
 ]
 
 
+# Row counts at scale 1.0; reference tables (departments, wards, beds,
+# medicines, insurance providers) are fixed and never scaled
+COUNTS = {
+    'doctors': 60,
+    'patients': 5000,
+    'appointments': 15000,
+    'medical_records': 12000,
+    'admissions': 2000,
+    'billing': 10000,
+    'lab_tests': 8000,
+    'staff': 100,
+    'insurance_claims': 1500,
+}
+
+PRIMARY_KEYS = {
+    'departments': 'department_id', 'doctors': 'doctor_id', 'patients': 'patient_id',
+    'appointments': 'appointment_id', 'medical_records': 'record_id', 'wards': 'ward_id',
+    'beds': 'bed_id', 'admissions': 'admission_id', 'billing': 'bill_id', 'lab_tests': 'test_id',
+    'medicines': 'medicine_id', 'staff': 'staff_id', 'insurance_providers': 'insurance_id',
+    'insurance_claims': 'claim_id',
+}
+
+TOTAL_BEDS = sum(ward[2] for ward in WARDS)
+# (ward_id, ward_name, bed_type, daily_rate, bed_number) for every bed, in bed_id order
+BED_LAYOUT = [(ward_id, name, bed_type, rate, bed_num)
+              for ward_id, (name, bed_type, total, rate) in enumerate(WARDS, 1)
+              for bed_num in range(1, total + 1)]
+BATCH_SIZE = 2000
+PARTITION_ROWS = 50000
+PROGRESS_EVERY = 10  # batches between progress lines
+
+INSERT_COLUMNS = {
+    'departments': ('department_name', 'floor_number', 'phone_extension'),
+    'doctors': ('first_name', 'last_name', 'email', 'phone', 'specialization',
+                'department_id', 'experience_years', 'consultation_fee', 'hire_date', 'status'),
+    'patients': ('first_name', 'last_name', 'date_of_birth', 'gender', 'blood_group',
+                 'phone', 'email', 'address', 'city', 'state', 'zip_code', 'emergency_contact_name',
+                 'emergency_contact_phone', 'registration_date', 'status'),
+    'appointments': ('patient_id', 'doctor_id', 'appointment_date', 'appointment_time',
+                     'appointment_type', 'status', 'symptoms'),
+    'medical_records': ('patient_id', 'doctor_id', 'appointment_id', 'diagnosis',
+                        'treatment', 'prescription', 'blood_pressure', 'heart_rate', 'temperature',
+                        'weight', 'record_date', 'follow_up_date'),
+    'wards': ('ward_name', 'department_id', 'floor_number', 'total_beds'),
+    'beds': ('ward_id', 'bed_number', 'bed_type', 'daily_rate', 'status'),
+    'admissions': ('patient_id', 'doctor_id', 'bed_id', 'admission_date',
+                   'discharge_date', 'admission_type', 'diagnosis', 'status'),
+    'billing': ('patient_id', 'appointment_id', 'admission_id', 'bill_date',
+                'subtotal', 'tax', 'discount', 'total_amount', 'payment_status', 'payment_method',
+                'payment_date', 'due_date'),
+    'lab_tests': ('patient_id', 'doctor_id', 'test_name', 'test_category',
+                  'test_date', 'result_date', 'result_value', 'normal_range', 'status', 'cost'),
+    'medicines': ('medicine_name', 'generic_name', 'category', 'manufacturer',
+                  'unit_price', 'quantity_in_stock', 'reorder_level', 'expiry_date'),
+    'staff': ('first_name', 'last_name', 'role', 'department_id', 'phone', 'email',
+              'hire_date', 'salary', 'shift', 'status'),
+    'insurance_providers': ('provider_name', 'contact_phone', 'email', 'coverage_percentage'),
+    'insurance_claims': ('bill_id', 'insurance_id', 'claim_amount', 'approved_amount',
+                         'status', 'submission_date', 'approval_date', 'rejection_reason'),
+}
+
+APPOINTMENT_TIMES = ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '12:00',
+                     '14:00', '14:30', '15:00', '15:30', '16:00', '16:30', '17:00']
+SYMPTOMS = ['Fever', 'Headache', 'Cough', 'Body Pain', 'Fatigue', 'Chest Pain',
+            'Dizziness', 'Nausea', 'Back Pain', 'Joint Pain']
+STAFF_ROLES = ['Nurse', 'Technician', 'Receptionist', 'Admin', 'Pharmacist']
+STAFF_SALARIES = {'Nurse': (25000, 50000), 'Technician': (20000, 40000),
+                  'Receptionist': (18000, 30000), 'Admin': (30000, 60000), 'Pharmacist': (28000, 45000)}
+
+
 def get_connection():
     return mysql.connector.connect(**DB_CONFIG)
 
 
-def generate_all_data():
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    print("Generating Hospital Data...")
-    
-    # 1. Departments
-    print("1. Inserting Departments...")
-    for i, dept in enumerate(DEPARTMENTS, 1):
-        cursor.execute(
-            "INSERT INTO departments (department_name, floor_number, phone_extension) VALUES (%s, %s, %s)",
-            (dept, (i % 4) + 1, f"10{i:02d}")
-        )
-    conn.commit()
-    
-    # 2. Doctors (60)
-    print("2. Inserting Doctors...")
-    for i in range(60):
+def scaled_counts(scale=1.0):
+    return {table: max(1, int(round(count * scale))) for table, count in COUNTS.items()}
+
+
+def insert_sql(table, columns=None):
+    columns = columns or INSERT_COLUMNS[table]
+    return (f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})")
+
+
+# ============================================
+# ROW BUILDERS
+# ============================================
+# Each builder yields the rows whose auto-increment IDs fall in
+# (start, stop], drawing only from the rng/faker it is handed. Seeding those
+# per partition (see partition_seed) keeps the output independent of how
+# partitions are spread across workers. Dates are drawn relative to now,
+# never to the wall clock, which each worker would read at a different time.
+
+YEAR_DAYS = 365.24  # Faker's length of '-2y', so anchoring on now keeps the same ranges
+
+
+def _years_from_now(now, years):
+    """now's date moved by years, as faker.date_between reads '-2y' from today."""
+    return now.date() + timedelta(days=years * YEAR_DAYS)
+
+
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - years, day=28)
+
+
+def _date_of_birth(faker, now, minimum_age, maximum_age):
+    """faker.date_of_birth() with ages counted at now."""
+    start = _years_before(now.date(), maximum_age + 1)
+    dob = faker.date_time_ad(start_datetime=start, end_datetime=_years_before(now.date(), minimum_age)).date()
+    return dob if dob != start else dob + timedelta(days=1)
+
+
+def department_rows(counts, start, stop, rng, faker, now):
+    for i in range(start + 1, stop + 1):
+        yield (DEPARTMENTS[i - 1], (i % 4) + 1, f"10{i:02d}")
+
+
+def doctor_rows(counts, start, stop, rng, faker, now):
+    for i in range(start, stop):
         dept_id = (i % 12) + 1
         dept_name = DEPARTMENTS[dept_id - 1]
-        cursor.execute("""
-            INSERT INTO doctors (first_name, last_name, email, phone, specialization, 
-                department_id, experience_years, consultation_fee, hire_date, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            fake.first_name(), fake.last_name(), fake.unique.email(),
-            fake.phone_number()[:15], SPECIALIZATIONS[dept_name], dept_id,
-            random.randint(2, 25), random.choice([500, 700, 1000, 1500, 2000]),
-            fake.date_between(start_date='-10y', end_date='-1y'),
-            random.choices(['Active', 'On Leave'], weights=[95, 5])[0]
-        ))
-    conn.commit()
-    
-    # 3. Patients (5000)
-    print("3. Inserting Patients...")
-    for i in range(5000):
-        gender = random.choice(['Male', 'Female'])
-        cursor.execute("""
-            INSERT INTO patients (first_name, last_name, date_of_birth, gender, blood_group,
-                phone, email, address, city, state, zip_code, emergency_contact_name,
-                emergency_contact_phone, registration_date, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            fake.first_name_male() if gender == 'Male' else fake.first_name_female(),
-            fake.last_name(), fake.date_of_birth(minimum_age=1, maximum_age=90),
-            gender, random.choice(BLOOD_GROUPS), fake.phone_number()[:15],
-            fake.email() if random.random() > 0.3 else None, fake.street_address(),
-            random.choice(CITIES), 'Maharashtra', fake.postcode()[:10],
-            fake.name(), fake.phone_number()[:15],
-            fake.date_between(start_date='-2y', end_date='today'),
-            random.choices(['Active', 'Inactive'], weights=[95, 5])[0]
-        ))
-        if (i + 1) % 1000 == 0:
-            print(f"   {i + 1} patients inserted...")
-            conn.commit()
-    conn.commit()
-    
-    # 4. Appointments (15000)
-    print("4. Inserting Appointments...")
-    times = ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '12:00',
-             '14:00', '14:30', '15:00', '15:30', '16:00', '16:30', '17:00']
-    symptoms = ['Fever', 'Headache', 'Cough', 'Body Pain', 'Fatigue', 'Chest Pain',
-                'Dizziness', 'Nausea', 'Back Pain', 'Joint Pain']
-    
-    for i in range(15000):
-        app_date = fake.date_between(start_date='-2y', end_date='+1m')
-        if app_date < datetime.now().date():
-            status = random.choices(['Completed', 'Cancelled', 'No Show'], weights=[85, 10, 5])[0]
+        yield (
+            faker.first_name(), faker.last_name(), faker.unique.email(),
+            faker.phone_number()[:15], SPECIALIZATIONS[dept_name], dept_id,
+            rng.randint(2, 25), rng.choice([500, 700, 1000, 1500, 2000]),
+            faker.date_between(start_date=_years_from_now(now, -10), end_date=_years_from_now(now, -1)),
+            rng.choices(['Active', 'On Leave'], weights=[95, 5])[0]
+        )
+
+
+def patient_rows(counts, start, stop, rng, faker, now):
+    for _ in range(start, stop):
+        gender = rng.choice(['Male', 'Female'])
+        yield (
+            faker.first_name_male() if gender == 'Male' else faker.first_name_female(),
+            faker.last_name(), _date_of_birth(faker, now, minimum_age=1, maximum_age=90),
+            gender, rng.choice(BLOOD_GROUPS), faker.phone_number()[:15],
+            faker.email() if rng.random() > 0.3 else None, faker.street_address(),
+            rng.choice(CITIES), 'Maharashtra', faker.postcode()[:10],
+            faker.name(), faker.phone_number()[:15],
+            faker.date_between(start_date=_years_from_now(now, -2), end_date=now.date()),
+            rng.choices(['Active', 'Inactive'], weights=[95, 5])[0]
+        )
+
+
+def appointment_rows(counts, start, stop, rng, faker, now):
+    for _ in range(start, stop):
+        # Faker read the old '+1m' as one minute, so appointments never ran past today
+        app_date = faker.date_between(start_date=_years_from_now(now, -2), end_date=now.date())
+        if app_date < now.date():
+            status = rng.choices(['Completed', 'Cancelled', 'No Show'], weights=[85, 10, 5])[0]
         else:
             status = 'Scheduled'
-        
-        cursor.execute("""
-            INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time,
-                appointment_type, status, symptoms)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            random.randint(1, 5000), random.randint(1, 60), app_date,
-            random.choice(times),
-            random.choices(['Consultation', 'Follow-up', 'Routine Checkup', 'Emergency'], 
-                          weights=[50, 25, 20, 5])[0],
-            status, ', '.join(random.sample(symptoms, random.randint(1, 3)))
-        ))
-        if (i + 1) % 3000 == 0:
-            print(f"   {i + 1} appointments inserted...")
-            conn.commit()
-    conn.commit()
-    
-    # 5. Medical Records (12000)
-    print("5. Inserting Medical Records...")
-    for i in range(12000):
-        record_date = fake.date_between(start_date='-2y', end_date='today')
-        cursor.execute("""
-            INSERT INTO medical_records (patient_id, doctor_id, appointment_id, diagnosis,
-                treatment, prescription, blood_pressure, heart_rate, temperature, weight,
-                record_date, follow_up_date)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            random.randint(1, 5000), random.randint(1, 60),
-            random.randint(1, 15000) if random.random() > 0.1 else None,
-            random.choice(DIAGNOSES), fake.sentence(), fake.sentence(),
-            f"{random.randint(100, 140)}/{random.randint(60, 90)}",
-            random.randint(60, 100), round(random.uniform(97, 100), 1),
-            round(random.uniform(40, 100), 1), record_date,
-            record_date + timedelta(days=random.choice([7, 14, 30])) if random.random() > 0.3 else None
-        ))
-        if (i + 1) % 3000 == 0:
-            print(f"   {i + 1} records inserted...")
-            conn.commit()
-    conn.commit()
-    
-    # 6. Wards and Beds
-    print("6. Inserting Wards and Beds...")
-    for i, (name, bed_type, total, rate) in enumerate(WARDS, 1):
-        cursor.execute(
-            "INSERT INTO wards (ward_name, department_id, floor_number, total_beds) VALUES (%s, %s, %s, %s)",
-            (name, random.randint(1, 12), (i % 4) + 1, total)
+        yield (
+            rng.randint(1, counts['patients']), rng.randint(1, counts['doctors']), app_date,
+            rng.choice(APPOINTMENT_TIMES),
+            rng.choices(['Consultation', 'Follow-up', 'Routine Checkup', 'Emergency'],
+                        weights=[50, 25, 20, 5])[0],
+            status, ', '.join(rng.sample(SYMPTOMS, rng.randint(1, 3)))
+        )
+
+
+def medical_record_rows(counts, start, stop, rng, faker, now):
+    for _ in range(start, stop):
+        record_date = faker.date_between(start_date=_years_from_now(now, -2), end_date=now.date())
+        yield (
+            rng.randint(1, counts['patients']), rng.randint(1, counts['doctors']),
+            rng.randint(1, counts['appointments']) if rng.random() > 0.1 else None,
+            rng.choice(DIAGNOSES), faker.sentence(), faker.sentence(),
+            f"{rng.randint(100, 140)}/{rng.randint(60, 90)}",
+            rng.randint(60, 100), round(rng.uniform(97, 100), 1),
+            round(rng.uniform(40, 100), 1), record_date,
+            record_date + timedelta(days=rng.choice([7, 14, 30])) if rng.random() > 0.3 else None
         )
-        for bed_num in range(1, total + 1):
-            cursor.execute("""
-                INSERT INTO beds (ward_id, bed_number, bed_type, daily_rate, status)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                i, f"{name[:2].upper()}{bed_num:03d}", bed_type, rate,
-                random.choices(['Available', 'Occupied', 'Maintenance'], weights=[60, 35, 5])[0]
-            ))
-    conn.commit()
-    
-    # 7. Admissions (2000)
-    print("7. Inserting Admissions...")
-    for i in range(2000):
-        adm_date = fake.date_time_between(start_date='-2y', end_date='now')
-        if adm_date < datetime.now() - timedelta(days=7):
-            dis_date = adm_date + timedelta(days=random.randint(1, 14))
+
+
+def ward_rows(counts, start, stop, rng, faker, now):
+    for i in range(start + 1, stop + 1):
+        name, _, total, _ = WARDS[i - 1]
+        yield (name, rng.randint(1, 12), (i % 4) + 1, total)
+
+
+def bed_rows(counts, start, stop, rng, faker, now):
+    for ward_id, name, bed_type, rate, bed_num in BED_LAYOUT[start:stop]:
+        yield (
+            ward_id, f"{name[:2].upper()}{bed_num:03d}", bed_type, rate,
+            rng.choices(['Available', 'Occupied', 'Maintenance'], weights=[60, 35, 5])[0]
+        )
+
+
+def admission_rows(counts, start, stop, rng, faker, now):
+    for _ in range(start, stop):
+        adm_date = faker.date_time_between(start_date=now - timedelta(days=2 * YEAR_DAYS), end_date=now)
+        if adm_date < now - timedelta(days=7):
+            dis_date = adm_date + timedelta(days=rng.randint(1, 14))
             status = 'Discharged'
         else:
             dis_date = None
             status = 'Admitted'
-        
-        cursor.execute("""
-            INSERT INTO admissions (patient_id, doctor_id, bed_id, admission_date,
-                discharge_date, admission_type, diagnosis, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            random.randint(1, 5000), random.randint(1, 60), random.randint(1, 83),
-            adm_date, dis_date,
-            random.choices(['Emergency', 'Planned', 'Transfer'], weights=[30, 60, 10])[0],
-            random.choice(DIAGNOSES), status
-        ))
-    conn.commit()
-    
-    # 8. Billing (10000)
-    print("8. Inserting Billing...")
-    for i in range(10000):
-        bill_date = fake.date_between(start_date='-2y', end_date='today')
-        subtotal = random.choice([500, 700, 1000, 1500, 2000, 3000, 5000, 8000, 15000, 25000])
-        discount = subtotal * random.choice([0, 0, 0.05, 0.10])
+        yield (
+            rng.randint(1, counts['patients']), rng.randint(1, counts['doctors']),
+            rng.randint(1, TOTAL_BEDS), adm_date, dis_date,
+            rng.choices(['Emergency', 'Planned', 'Transfer'], weights=[30, 60, 10])[0],
+            rng.choice(DIAGNOSES), status
+        )
+
+
+def billing_rows(counts, start, stop, rng, faker, now):
+    for _ in range(start, stop):
+        bill_date = faker.date_between(start_date=_years_from_now(now, -2), end_date=now.date())
+        subtotal = rng.choice([500, 700, 1000, 1500, 2000, 3000, 5000, 8000, 15000, 25000])
+        discount = subtotal * rng.choice([0, 0, 0.05, 0.10])
         tax = (subtotal - discount) * 0.05
         total = subtotal - discount + tax
-        
-        days_old = (datetime.now().date() - bill_date).days
+
+        days_old = (now.date() - bill_date).days
         if days_old > 30:
-            status = random.choices(['Paid', 'Overdue'], weights=[85, 15])[0]
+            status = rng.choices(['Paid', 'Overdue'], weights=[85, 15])[0]
         elif days_old > 7:
-            status = random.choices(['Paid', 'Partial', 'Pending'], weights=[70, 15, 15])[0]
+            status = rng.choices(['Paid', 'Partial', 'Pending'], weights=[70, 15, 15])[0]
         else:
-            status = random.choices(['Paid', 'Pending'], weights=[50, 50])[0]
-        
-        cursor.execute("""
-            INSERT INTO billing (patient_id, appointment_id, admission_id, bill_date,
-                subtotal, tax, discount, total_amount, payment_status, payment_method,
-                payment_date, due_date)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            random.randint(1, 5000),
-            random.randint(1, 15000) if random.random() > 0.2 else None,
-            random.randint(1, 2000) if random.random() > 0.7 else None,
+            status = rng.choices(['Paid', 'Pending'], weights=[50, 50])[0]
+
+        yield (
+            rng.randint(1, counts['patients']),
+            rng.randint(1, counts['appointments']) if rng.random() > 0.2 else None,
+            rng.randint(1, counts['admissions']) if rng.random() > 0.7 else None,
             bill_date, subtotal, round(tax, 2), round(discount, 2), round(total, 2),
             status,
-            random.choice(['Cash', 'Card', 'Insurance', 'Online']) if status == 'Paid' else None,
-            bill_date + timedelta(days=random.randint(0, 15)) if status == 'Paid' else None,
+            rng.choice(['Cash', 'Card', 'Insurance', 'Online']) if status == 'Paid' else None,
+            bill_date + timedelta(days=rng.randint(0, 15)) if status == 'Paid' else None,
             bill_date + timedelta(days=30)
-        ))
-        if (i + 1) % 2000 == 0:
-            print(f"   {i + 1} bills inserted...")
-            conn.commit()
-    conn.commit()
-    
-    # 9. Lab Tests (8000)
-    print("9. Inserting Lab Tests...")
-    for i in range(8000):
-        test = random.choice(LAB_TESTS)
-        test_date = fake.date_between(start_date='-2y', end_date='today')
-        if test_date < datetime.now().date() - timedelta(days=3):
+        )
+
+
+def lab_test_rows(counts, start, stop, rng, faker, now):
+    for _ in range(start, stop):
+        test = rng.choice(LAB_TESTS)
+        test_date = faker.date_between(start_date=_years_from_now(now, -2), end_date=now.date())
+        if test_date < now.date() - timedelta(days=3):
             status = 'Completed'
-            result_date = test_date + timedelta(days=random.randint(1, 3))
+            result_date = test_date + timedelta(days=rng.randint(1, 3))
         else:
-            status = random.choice(['Pending', 'In Progress'])
+            status = rng.choice(['Pending', 'In Progress'])
             result_date = None
-        
-        cursor.execute("""
-            INSERT INTO lab_tests (patient_id, doctor_id, test_name, test_category,
-                test_date, result_date, result_value, normal_range, status, cost)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            random.randint(1, 5000), random.randint(1, 60), test[0], test[1],
-            test_date, result_date,
-            f"{random.uniform(50, 150):.1f}" if status == 'Completed' else None,
+        yield (
+            rng.randint(1, counts['patients']), rng.randint(1, counts['doctors']),
+            test[0], test[1], test_date, result_date,
+            f"{rng.uniform(50, 150):.1f}" if status == 'Completed' else None,
             '70-110', status, test[2]
-        ))
-        if (i + 1) % 2000 == 0:
-            print(f"   {i + 1} tests inserted...")
-            conn.commit()
-    conn.commit()
-    
-    # 10. Medicines
-    print("10. Inserting Medicines...")
-    for med in MEDICINES:
-        cursor.execute("""
-            INSERT INTO medicines (medicine_name, generic_name, category, manufacturer,
-                unit_price, quantity_in_stock, reorder_level, expiry_date)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            med[0], med[1], med[2], fake.company(), med[3],
-            random.randint(100, 1000), 50,
-            fake.date_between(start_date='+6m', end_date='+3y')
-        ))
-    conn.commit()
-    
-    # 11. Staff (100)
-    print("11. Inserting Staff...")
-    roles = ['Nurse', 'Technician', 'Receptionist', 'Admin', 'Pharmacist']
-    salaries = {'Nurse': (25000, 50000), 'Technician': (20000, 40000),
-                'Receptionist': (18000, 30000), 'Admin': (30000, 60000), 'Pharmacist': (28000, 45000)}
-    
-    for _ in range(100):
-        role = random.choice(roles)
-        sal_range = salaries[role]
-        cursor.execute("""
-            INSERT INTO staff (first_name, last_name, role, department_id, phone, email,
-                hire_date, salary, shift, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            fake.first_name(), fake.last_name(), role, random.randint(1, 12),
-            fake.phone_number()[:15], fake.email(),
-            fake.date_between(start_date='-8y', end_date='-1m'),
-            random.randint(*sal_range), random.choice(['Morning', 'Afternoon', 'Night']),
-            random.choices(['Active', 'Inactive'], weights=[95, 5])[0]
-        ))
-    conn.commit()
-    
-    # 12. Insurance
-    print("12. Inserting Insurance Data...")
-    for prov in INSURANCE_PROVIDERS:
-        cursor.execute("""
-            INSERT INTO insurance_providers (provider_name, contact_phone, email, coverage_percentage)
-            VALUES (%s, %s, %s, %s)
-        """, (prov[0], fake.phone_number()[:15], fake.company_email(), prov[1]))
-    conn.commit()
-    
-    # 13. Insurance Claims (1500)
-    print("13. Inserting Insurance Claims...")
-    for _ in range(1500):
-        claim_amt = random.randint(5000, 50000)
-        status = random.choices(['Submitted', 'Processing', 'Approved', 'Rejected', 'Paid'],
-                               weights=[10, 15, 25, 10, 40])[0]
-        sub_date = fake.date_between(start_date='-1y', end_date='today')
-        
-        cursor.execute("""
-            INSERT INTO insurance_claims (bill_id, insurance_id, claim_amount, approved_amount,
-                status, submission_date, approval_date, rejection_reason)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            random.randint(1, 10000), random.randint(1, 6), claim_amt,
-            round(claim_amt * random.uniform(0.6, 1.0), 2) if status in ['Approved', 'Paid'] else None,
+        )
+
+
+def medicine_rows(counts, start, stop, rng, faker, now):
+    for med in MEDICINES[start:stop]:
+        yield (
+            med[0], med[1], med[2], faker.company(), med[3],
+            rng.randint(100, 1000), 50,
+            faker.date_between(start_date=now.date(), end_date=_years_from_now(now, 3))
+        )
+
+
+def staff_rows(counts, start, stop, rng, faker, now):
+    for _ in range(start, stop):
+        role = rng.choice(STAFF_ROLES)
+        sal_range = STAFF_SALARIES[role]
+        yield (
+            faker.first_name(), faker.last_name(), role, rng.randint(1, 12),
+            faker.phone_number()[:15], faker.email(),
+            faker.date_between(start_date=_years_from_now(now, -8), end_date=now.date() - timedelta(days=1)),
+            rng.randint(*sal_range), rng.choice(['Morning', 'Afternoon', 'Night']),
+            rng.choices(['Active', 'Inactive'], weights=[95, 5])[0]
+        )
+
+
+def insurance_provider_rows(counts, start, stop, rng, faker, now):
+    for prov in INSURANCE_PROVIDERS[start:stop]:
+        yield (prov[0], faker.phone_number()[:15], faker.company_email(), prov[1])
+
+
+def insurance_claim_rows(counts, start, stop, rng, faker, now):
+    for _ in range(start, stop):
+        claim_amt = rng.randint(5000, 50000)
+        status = rng.choices(['Submitted', 'Processing', 'Approved', 'Rejected', 'Paid'],
+                             weights=[10, 15, 25, 10, 40])[0]
+        sub_date = faker.date_between(start_date=_years_from_now(now, -1), end_date=now.date())
+        yield (
+            rng.randint(1, counts['billing']), rng.randint(1, len(INSURANCE_PROVIDERS)), claim_amt,
+            round(claim_amt * rng.uniform(0.6, 1.0), 2) if status in ['Approved', 'Paid'] else None,
             status, sub_date,
-            sub_date + timedelta(days=random.randint(7, 30)) if status in ['Approved', 'Paid'] else None,
+            sub_date + timedelta(days=rng.randint(7, 30)) if status in ['Approved', 'Paid'] else None,
             'Documentation incomplete' if status == 'Rejected' else None
-        ))
-    conn.commit()
-    
+        )
+
+
+# Load order respects foreign keys
+TABLES = [
+    ('Departments', 'departments', department_rows),
+    ('Doctors', 'doctors', doctor_rows),
+    ('Patients', 'patients', patient_rows),
+    ('Appointments', 'appointments', appointment_rows),
+    ('Medical Records', 'medical_records', medical_record_rows),
+    ('Wards', 'wards', ward_rows),
+    ('Beds', 'beds', bed_rows),
+    ('Admissions', 'admissions', admission_rows),
+    ('Billing', 'billing', billing_rows),
+    ('Lab Tests', 'lab_tests', lab_test_rows),
+    ('Medicines', 'medicines', medicine_rows),
+    ('Staff', 'staff', staff_rows),
+    ('Insurance Providers', 'insurance_providers', insurance_provider_rows),
+    ('Insurance Claims', 'insurance_claims', insurance_claim_rows),
+]
+BUILDERS = {table: builder for _, table, builder in TABLES}
+
+
+# ============================================
+# PARTITIONING
+# ============================================
+
+def table_sizes(counts):
+    sizes = dict(counts)
+    sizes.update(
+        departments=len(DEPARTMENTS), wards=len(WARDS), beds=TOTAL_BEDS,
+        medicines=len(MEDICINES), insurance_providers=len(INSURANCE_PROVIDERS)
+    )
+    return sizes
+
+
+def partition_seed(seed, table, index):
+    digest = hashlib.blake2b(f"{seed}:{table}:{index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def plan_partitions(counts, partition_rows=PARTITION_ROWS):
+    """Split every table into fixed-size ID ranges, in load order.
+
+    Partition boundaries depend only on the row counts and partition_rows,
+    never on the worker count, so each (table, index) always gets the same
+    seed and the same rows.
+    """
+    sizes = table_sizes(counts)
+    plan = []
+    for _, table, _ in TABLES:
+        parts = [(table, index, start, min(start + partition_rows, sizes[table]))
+                 for index, start in enumerate(range(0, sizes[table], partition_rows))]
+        plan.append((table, parts))
+    return plan
+
+
+_worker_faker = None
+
+
+def build_partition(task):
+    global _worker_faker
+    (table, index, start, stop), counts, seed, now, engine, as_columns = task
+    part_seed = partition_seed(seed, table, index)
+    if engine == 'numpy':
+        from columnar import build_columns, columns_to_rows
+        columns = build_columns(table, counts, start, stop, seed, part_seed, now)
+        return columns if as_columns else columns_to_rows(columns)
+
+    if _worker_faker is None:
+        _worker_faker = Faker()
+    _worker_faker.seed_instance(part_seed)
+    _worker_faker.unique.clear()
+    rng = random.Random(part_seed)
+    rows = list(BUILDERS[table](counts, start, stop, rng, _worker_faker, now))
+    if as_columns:
+        return dict(zip(INSERT_COLUMNS[table], (list(values) for values in zip(*rows))))
+    return rows
+
+
+def partition_tasks(counts, seed, now, engine, as_columns=False):
+    return [(part, counts, seed, now, engine, as_columns)
+            for _, parts in plan_partitions(counts) for part in parts]
+
+
+def iter_partitions(tasks, workers=1):
+    """Yield built partitions in task order, at most 2 * workers in flight."""
+    if workers <= 1:
+        for task in tasks:
+            yield build_partition(task)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(build_partition, (task,)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+# ============================================
+# LOADING
+# ============================================
+
+def iter_table_batches(scale=1.0, seed=SEED, engine='faker', workers=1, as_columns=False):
+    """Stream every table as (table, first_id, batch), one partition at a time, in load order.
+
+    Only the partitions in flight are ever held in memory, however large the
+    scale. With as_columns a batch is a {column: values} dict, otherwise a
+    list of row tuples; first_id is the auto-increment ID of its first row.
+    """
+    tasks = partition_tasks(scaled_counts(scale), seed, datetime.now(), engine, as_columns)
+    for task, batch in zip(tasks, iter_partitions(tasks, workers)):
+        table, _, start, _ = task[0]
+        yield table, start + 1, batch
+
+
+def load_table(conn, cursor, table, rows, bulk=False, batch_size=BATCH_SIZE, columns=None):
+    """Insert rows into table, returning (row_count, total_seconds, insert_seconds).
+
+    The per-row path issues one execute per row and commits every batch_size
+    rows; the bulk path sends each batch through a single executemany call,
+    which mysql-connector rewrites into one multi-row INSERT.
+    """
+    sql = insert_sql(table, columns)
+    count = 0
+    batches = 0
+    insert_seconds = 0.0
+    batch = []
+    started = time.perf_counter()
+
+    def flush():
+        nonlocal count, batches, insert_seconds
+        t0 = time.perf_counter()
+        if bulk:
+            cursor.executemany(sql, batch)
+        else:
+            for row in batch:
+                cursor.execute(sql, row)
+        conn.commit()
+        insert_seconds += time.perf_counter() - t0
+        count += len(batch)
+        batches += 1
+        batch.clear()
+        if batches % PROGRESS_EVERY == 0:
+            print(f"   {count:,} {table} rows inserted...")
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"   {count:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec, {insert_seconds:.2f}s in MySQL)")
+    return count, elapsed, insert_seconds
+
+
+def print_load_report(stats, method):
+    print("\n" + "=" * 66)
+    print(f"LOAD REPORT ({method})")
+    print("=" * 66)
+    print(f"{'Table':<22}{'Rows':>12}{'Seconds':>10}{'Rows/sec':>12}{'MySQL s':>10}")
+    for table, (count, elapsed, insert_seconds) in stats.items():
+        rate = count / elapsed if elapsed > 0 else 0.0
+        print(f"{table:<22}{count:>12,}{elapsed:>10.2f}{rate:>12,.0f}{insert_seconds:>10.2f}")
+    total_rows = sum(s[0] for s in stats.values())
+    total_seconds = sum(s[1] for s in stats.values())
+    total_rate = total_rows / total_seconds if total_seconds > 0 else 0.0
+    print("-" * 66)
+    print(f"{'TOTAL':<22}{total_rows:>12,}{total_seconds:>10.2f}{total_rate:>12,.0f}")
+    print("=" * 66)
+
+
+def generate_all_data(scale=1.0, bulk=False, batch_size=BATCH_SIZE, workers=1, seed=SEED, engine='faker',
+                      profiler=None):
+    counts = scaled_counts(scale)
+    now = datetime.now()
+    plan = plan_partitions(counts)
+    tasks = partition_tasks(counts, seed, now, engine)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    print(f"Generating Hospital Data (scale={scale:g}, seed={seed}, workers={workers}, "
+          f"engine={engine}, {'bulk' if bulk else 'per-row'} inserts)...")
+    stats = {}
+    partitions = iter_partitions(tasks, workers)
+
+    # Partitions arrive in plan order; hand each table exactly its own share
+    for step, ((label, table, _), (_, parts)) in enumerate(zip(TABLES, plan), 1):
+        print(f"{step}. Inserting {label} ({len(parts)} partition{'s' if len(parts) != 1 else ''})...")
+        rows = chain.from_iterable(islice(partitions, len(parts)))
+        # The stage covers building the partitions (pulled lazily by load_table) and inserting them
+        with profiler.stage(table) if profiler else nullcontext() as stage:
+            stats[table] = load_table(conn, cursor, table, rows, bulk=bulk, batch_size=batch_size)
+            if stage:
+                stage.add_rows(stats[table][0])
+    # Shut the worker pool down now, so its processes are reaped before the profile is written
+    partitions.close()
+
     cursor.close()
     conn.close()
-    
+
     print("\n" + "=" * 50)
     print("DATA GENERATION COMPLETE!")
     print("=" * 50)
     print("Records created:")
-    print("- Departments: 12")
-    print("- Doctors: 60")
-    print("- Patients: 5,000")
-    print("- Appointments: 15,000")
-    print("- Medical Records: 12,000")
-    print("- Wards: 6, Beds: 83")
-    print("- Admissions: 2,000")
-    print("- Billing: 10,000")
-    print("- Lab Tests: 8,000")
-    print("- Medicines: 8")
-    print("- Staff: 100")
-    print("- Insurance Claims: 1,500")
-    print("=" * 50)
+    for label, table, _ in TABLES:
+        print(f"- {label}: {stats[table][0]:,}")
+    print_load_report(stats, 'bulk executemany' if bulk else 'per-row execute')
+    if profiler:
+        profiler.write()
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic hospital data into hospital_db")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="multiply the base row counts (e.g. 10 or 100)")
+    parser.add_argument('--bulk', action='store_true',
+                        help="batch rows through executemany instead of one execute per row")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"rows per commit / executemany batch (default {BATCH_SIZE})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes building partitions; output is identical for any value")
+    parser.add_argument('--engine', choices=['faker', 'numpy'], default='faker',
+                        help="faker: per-row random/Faker calls; numpy: vectorized column synthesis")
+    parser.add_argument('--sink', choices=['csv', 'parquet'],
+                        help="write rotating shard files instead of inserting into MySQL")
+    parser.add_argument('--out', default='shards',
+                        help="shard directory for --sink (default ./shards)")
+    parser.add_argument('--shard-rows', type=int, default=None,
+                        help="rows per shard file before rotating (default 1,000,000)")
+    parser.add_argument('--seed', type=int, default=SEED,
+                        help=f"base seed from which every partition seed is derived (default {SEED})")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write per-table wall/CPU time, peak RSS, rows and MySQL bytes received as JSON")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="with --profile, also record tracemalloc peaks (slower)")
+    parser.add_argument('--cprofile', metavar='TABLE',
+                        help="with --profile, dump cProfile stats for one table's stage")
+    args = parser.parse_args(argv)
+    if args.scale <= 0:
+        parser.error("--scale must be positive")
+    if args.batch_size <= 0:
+        parser.error("--batch-size must be positive")
+    if args.workers <= 0:
+        parser.error("--workers must be positive")
+    return args
 
 
 if __name__ == "__main__":
-    generate_all_data()
+    args = parse_args()
+    if args.sink:
+        from file_sink import SHARD_ROWS, write_shards
+        write_shards(args.out, args.sink, scale=args.scale, seed=args.seed, engine=args.engine,
+                     workers=args.workers, shard_rows=args.shard_rows or SHARD_ROWS)
+        raise SystemExit(0)
+    profiler = None
+    if args.profile:
+        # profiler.py is shared with the analysis
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, '2_analysis'))
+        from profiler import Profiler, cursor_bytes_probe
+        probe_conn = get_connection()
+        profiler = Profiler(enabled=True, trace_memory=args.profile_memory, cprofile_stage=args.cprofile,
+                            bytes_probe=cursor_bytes_probe(probe_conn.cursor()), path=args.profile)
+    try:
+        generate_all_data(scale=args.scale, bulk=args.bulk, batch_size=args.batch_size,
+                          workers=args.workers, seed=args.seed, engine=args.engine, profiler=profiler)
+    finally:
+        if profiler:
+            probe_conn.close()
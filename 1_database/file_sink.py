@@ -0,0 +1,244 @@
+"""
+File Sink - streams generated tables into rotating CSV/Parquet shards and loads them back
+Write: python data_generator.py --scale 100 --engine numpy --sink parquet --out shards
+Load:  python file_sink.py shards
+Parquet needs: pip install pyarrow
+
+Layout: <out>/<table>/part-00000.<csv|parquet> plus <out>/manifest.json.
+Every shard carries the table's primary key as its first column, so the
+loader reproduces the generated IDs exactly. CSV shards use \\N for NULL,
+matching LOAD DATA INFILE.
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+
+import mysql.connector
+
+from data_generator import (
+    BATCH_SIZE, DB_CONFIG, INSERT_COLUMNS, PRIMARY_KEYS, SEED, TABLES,
+    iter_table_batches, load_table, print_load_report, scaled_counts,
+)
+
+SHARD_ROWS = 1_000_000
+NULL = '\\N'
+MANIFEST = 'manifest.json'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet shards need pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _tolist(values):
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+
+class ShardWriter:
+    """Append column batches to <out>/<table>/, starting a new file every shard_rows rows."""
+
+    def __init__(self, out_dir, table, fmt, shard_rows=SHARD_ROWS):
+        self.table = table
+        self.fmt = fmt
+        self.shard_rows = shard_rows
+        self.columns = [PRIMARY_KEYS[table], *INSERT_COLUMNS[table]]
+        self.table_dir = os.path.join(out_dir, table)
+        os.makedirs(self.table_dir, exist_ok=True)
+        self.shards = []
+        self._file = None
+        self._writer = None
+        self._rows_in_shard = 0
+
+    def _open(self):
+        path = os.path.join(self.table_dir, f"part-{len(self.shards):05d}.{self.fmt}")
+        self.shards.append({'path': os.path.relpath(path, os.path.dirname(self.table_dir)), 'rows': 0})
+        self._rows_in_shard = 0
+        if self.fmt == 'csv':
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file, lineterminator='\n')
+            self._writer.writerow(self.columns)
+        else:
+            self._file = path
+            self._writer = None  # opened lazily with the first batch's schema
+
+    def _close_shard(self):
+        if self.fmt == 'csv' and self._file is not None:
+            self._file.close()
+        elif self._writer is not None:
+            self._writer.close()
+        self._file = None
+        self._writer = None
+
+    def _write_csv(self, data):
+        rows = zip(*(_tolist(values) for values in data.values()))
+        self._writer.writerows(
+            tuple(NULL if value is None else value for value in row) for row in rows
+        )
+
+    def _write_parquet(self, data):
+        pa = _require_pyarrow()
+        batch = pa.table({name: pa.array(values if hasattr(values, 'dtype') else list(values))
+                          for name, values in data.items()})
+        if self._writer is None:
+            self._writer = pa.parquet.ParquetWriter(self._file, batch.schema)
+        elif batch.schema != self._writer.schema:
+            try:
+                batch = batch.cast(self._writer.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                # e.g. a column that was all NULL so far: start a shard with the new schema
+                self._close_shard()
+                self._open()
+                self._writer = pa.parquet.ParquetWriter(self._file, batch.schema)
+        self._writer.write_table(batch)
+
+    def write(self, first_id, columns):
+        length = len(next(iter(columns.values())))
+        offset = 0
+        while offset < length:
+            if self._file is None or self._rows_in_shard >= self.shard_rows:
+                self._close_shard()
+                self._open()
+            take = min(length - offset, self.shard_rows - self._rows_in_shard)
+            data = {self.columns[0]: list(range(first_id + offset, first_id + offset + take))}
+            data.update((name, columns[name][offset:offset + take]) for name in INSERT_COLUMNS[self.table])
+            if self.fmt == 'csv':
+                self._write_csv(data)
+            else:
+                self._write_parquet(data)
+            self._rows_in_shard += take
+            self.shards[-1]['rows'] += take
+            offset += take
+
+    def close(self):
+        self._close_shard()
+        return self.shards
+
+
+def write_shards(out_dir, fmt='parquet', scale=1.0, seed=SEED, engine='faker', workers=1,
+                 shard_rows=SHARD_ROWS):
+    if fmt == 'parquet':
+        _require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"Writing {fmt} shards to {out_dir} (scale={scale:g}, seed={seed}, engine={engine}, "
+          f"workers={workers})...")
+
+    tables = {}
+    stats = {}
+    writer = None
+    started = None
+
+    def finish():
+        shards = writer.close()
+        tables[writer.table] = {'columns': writer.columns, 'shards': shards}
+        stats[writer.table] = (sum(s['rows'] for s in shards), time.perf_counter() - started, 0.0)
+
+    # Tables arrive one after another, so only one writer is ever open
+    for table, first_id, batch in iter_table_batches(scale, seed, engine, workers, as_columns=True):
+        if writer is None or writer.table != table:
+            if writer is not None:
+                finish()
+            print(f"   {table}...")
+            writer = ShardWriter(out_dir, table, fmt, shard_rows)
+            started = time.perf_counter()
+        writer.write(first_id, batch)
+    if writer is not None:
+        finish()
+
+    manifest = {
+        'format': fmt, 'scale': scale, 'seed': seed, 'engine': engine,
+        'counts': scaled_counts(scale), 'tables': tables,
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print_load_report(stats, f"{fmt} shards")
+    return manifest
+
+
+# ============================================
+# LOADER
+# ============================================
+
+def read_manifest(shard_dir):
+    with open(os.path.join(shard_dir, MANIFEST)) as f:
+        return json.load(f)
+
+
+def _parquet_rows(paths, batch_size):
+    pa = _require_pyarrow()
+    for path in paths:
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+
+def _load_csv(conn, cursor, table, columns, paths):
+    count = 0
+    insert_seconds = 0.0
+    started = time.perf_counter()
+    for path in paths:
+        t0 = time.perf_counter()
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE '{os.path.abspath(path).replace(os.sep, '/')}'
+            INTO TABLE {table}
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '\\n'
+            IGNORE 1 LINES
+            ({', '.join(columns)})
+        """)
+        conn.commit()
+        insert_seconds += time.perf_counter() - t0
+        count += cursor.rowcount
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"   {count:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec, {insert_seconds:.2f}s in MySQL)")
+    return count, elapsed, insert_seconds
+
+
+def load_shards(shard_dir, batch_size=BATCH_SIZE):
+    """Bulk-import a shard directory into hospital_db, table by table in FK order."""
+    manifest = read_manifest(shard_dir)
+    fmt = manifest['format']
+    conn = mysql.connector.connect(**DB_CONFIG, allow_local_infile=True)
+    cursor = conn.cursor()
+    # Rows arrive parent-first with explicit IDs; skip per-row FK lookups while loading
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+
+    print(f"Loading {fmt} shards from {shard_dir}...")
+    stats = {}
+    for step, (label, table, _) in enumerate(TABLES, 1):
+        entry = manifest['tables'].get(table)
+        if entry is None:
+            continue
+        print(f"{step}. Loading {label} ({len(entry['shards'])} shards)...")
+        paths = [os.path.join(shard_dir, shard['path']) for shard in entry['shards']]
+        if fmt == 'csv':
+            stats[table] = _load_csv(conn, cursor, table, entry['columns'], paths)
+        else:
+            stats[table] = load_table(conn, cursor, table, _parquet_rows(paths, batch_size),
+                                      bulk=True, batch_size=batch_size, columns=entry['columns'])
+
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.close()
+    conn.close()
+    print_load_report(stats, 'LOAD DATA LOCAL INFILE' if fmt == 'csv' else 'parquet executemany')
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load generated shards into hospital_db")
+    parser.add_argument('shard_dir', help="directory written by data_generator.py --sink")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"rows per executemany batch for parquet shards (default {BATCH_SIZE})")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    load_shards(args.shard_dir, batch_size=args.batch_size)
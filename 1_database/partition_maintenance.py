@@ -0,0 +1,215 @@
+"""
+Partition maintenance for the partitioned schema (schema_partitioned.sql)
+Run: pip install mysql-connector-python
+Then: python partition_maintenance.py                     # partitions through 3 months ahead
+      python partition_maintenance.py --keep-months 24    # also archive partitions older than 24 months
+      python partition_maintenance.py --archive-before 2023-01-01 --drop --only lab_tests
+      python partition_maintenance.py --keep-months 24 --dry-run
+Schedule it (cron / Task Scheduler) monthly, so p_future never has to
+take new rows.
+
+Each table in PARTITIONING is RANGE COLUMNS partitioned on its date
+column, with a month (or quarter) per partition named after its first
+month (p202401), plus p_history and p_future as catch-alls. Adding
+partitions splits p_future with REORGANIZE PARTITION; the first run on a
+new or freshly loaded table starts from the earliest row in p_future, so
+that split copies the loaded rows once. Later runs split an empty
+p_future and are instant.
+
+Archiving moves a partition's rows out with EXCHANGE PARTITION into a
+plain table named <table>_archive_YYYYMM and then drops the now empty
+partition; --drop discards the partition instead. The rollup tables keep
+the archived months (until a refresh_rollups.py --full rebuild), and the
+analysis snapshot reloads a table in full once rows have gone from it.
+"""
+
+import argparse
+from datetime import date, datetime
+
+import mysql.connector
+
+# UPDATE THESE
+DB_CONFIG = {
+    'host': '127.0.0.1',
+    'user': 'root',
+    'password': 'Duckgoforit@09',
+    'database': 'hospital_db'
+}
+
+# table: (partition column, months per partition)
+PARTITIONING = {
+    'appointments': ('appointment_date', 1),
+    'medical_records': ('record_date', 1),
+    'admissions': ('admission_date', 3),
+    'billing': ('bill_date', 1),
+    'lab_tests': ('test_date', 1),
+}
+
+AHEAD_MONTHS = 3  # empty partitions kept ready beyond the current month
+
+
+def get_connection():
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+# ============================================
+# PERIODS
+# ============================================
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def period_start(day, months):
+    """First day of the month (or quarter, for months=3) containing day."""
+    return date(day.year, (day.month - 1) // months * months + 1, 1)
+
+
+def partition_name(start):
+    return f"p{start:%Y%m}"
+
+
+# ============================================
+# PARTITIONS
+# ============================================
+
+def read_partitions(cursor, table):
+    """[(name, upper bound as a date or None for MAXVALUE, estimated rows)] in range order."""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    partitions = []
+    for name, description, rows in cursor.fetchall():
+        bound = None if description == 'MAXVALUE' else datetime.strptime(description.strip("'")[:10], '%Y-%m-%d').date()
+        partitions.append((name, bound, rows or 0))
+    return partitions
+
+
+def run(cursor, sql, dry_run):
+    if dry_run:
+        print(f"    {sql};")
+    else:
+        cursor.execute(sql)
+
+
+def add_partitions(cursor, table, partitions, ahead=AHEAD_MONTHS, today=None, dry_run=False):
+    """Split p_future into partitions up to the one holding today + ahead months. Returns the names added."""
+    column, months = PARTITIONING[table]
+    today = today or date.today()
+    last_bound = max(bound for _, bound, _ in partitions if bound is not None)
+    if [name for name, _, _ in partitions] == ['p_history', 'p_future']:
+        # First run: start at the earliest row already loaded, or this month on an empty table
+        cursor.execute(f"SELECT MIN({column}) FROM {table} WHERE {column} >= %s", (last_bound,))
+        earliest = cursor.fetchone()[0]
+        start = period_start(earliest or today, months)
+    else:
+        start = last_bound
+    end = period_start(add_months(today, ahead), months)
+
+    added, clauses = [], []
+    while start <= end:
+        following = add_months(start, months)
+        added.append(partition_name(start))
+        clauses.append(f"PARTITION {added[-1]} VALUES LESS THAN ('{following:%Y-%m-%d}')")
+        start = following
+    if added:
+        clauses.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+        run(cursor, f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO ({', '.join(clauses)})", dry_run)
+    return added
+
+
+def archive_table_exists(cursor, name):
+    cursor.execute("SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                   (name,))
+    return cursor.fetchone()[0] > 0
+
+
+def archive_partitions(cursor, table, partitions, before, drop=False, dry_run=False):
+    """Move (or drop) every month partition that ends on or before `before`. Returns [(name, rows, archive table)]."""
+    archived = []
+    for name, bound, rows in partitions:
+        if name in ('p_history', 'p_future') or bound > before:
+            continue
+        if drop:
+            run(cursor, f"ALTER TABLE {table} DROP PARTITION {name}", dry_run)
+            archived.append((name, rows, None))
+            continue
+        archive = f"{table}_archive_{name[1:]}"
+        if archive_table_exists(cursor, archive):
+            # EXCHANGE would swap its rows back into the partition
+            print(f"  [WARN] {table}: {archive} already exists; {name} left in place")
+            continue
+        run(cursor, f"CREATE TABLE {archive} LIKE {table}", dry_run)
+        run(cursor, f"ALTER TABLE {archive} REMOVE PARTITIONING", dry_run)
+        run(cursor, f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive}", dry_run)
+        run(cursor, f"ALTER TABLE {table} DROP PARTITION {name}", dry_run)
+        archived.append((name, rows, archive))
+    return archived
+
+
+# ============================================
+# MAINTENANCE
+# ============================================
+
+def maintain(names=None, ahead=AHEAD_MONTHS, before=None, drop=False, dry_run=False):
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for table in names or PARTITIONING:
+            try:
+                partitions = read_partitions(cursor, table)
+                if not partitions:
+                    print(f"  [WARN] {table} is not partitioned (created from schema.sql?); skipped")
+                    continue
+                added = add_partitions(cursor, table, partitions, ahead, dry_run=dry_run)
+                if added:
+                    print(f"  [OK] {table}: added {len(added)} partition(s), {added[0]}..{added[-1]}")
+                else:
+                    print(f"  [OK] {table}: partitions already reach {ahead} month(s) ahead")
+                if before is None:
+                    continue
+                for name, rows, archive in archive_partitions(cursor, table, partitions, before, drop, dry_run):
+                    target = f"moved to {archive}" if archive else "dropped"
+                    print(f"  [OK] {table}: {name} (~{rows:,} rows) {target}")
+            except mysql.connector.Error as e:
+                print(f"  [WARN] {table}: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Add future partitions and archive old ones in hospital_db")
+    parser.add_argument('--ahead', type=int, default=AHEAD_MONTHS,
+                        help=f"months of empty partitions to keep ready (default {AHEAD_MONTHS})")
+    parser.add_argument('--keep-months', type=int, default=None,
+                        help="archive partitions that end more than this many months ago")
+    parser.add_argument('--archive-before', type=date.fromisoformat, default=None,
+                        help="archive partitions that end on or before this date (YYYY-MM-DD)")
+    parser.add_argument('--drop', action='store_true', help="drop old partitions instead of archiving them")
+    parser.add_argument('--only', default=None, help="comma-separated tables to maintain")
+    parser.add_argument('--dry-run', action='store_true', help="print the ALTER statements without running them")
+    args = parser.parse_args(argv)
+    if args.ahead < 0:
+        parser.error("--ahead must not be negative")
+    if args.keep_months is not None and args.archive_before is not None:
+        parser.error("use --keep-months or --archive-before, not both")
+    if args.drop and args.keep_months is None and args.archive_before is None:
+        parser.error("--drop needs --keep-months or --archive-before")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    names = [n.strip() for n in args.only.split(',')] if args.only else None
+    unknown = [n for n in names or [] if n not in PARTITIONING]
+    if unknown:
+        raise SystemExit(f"Unknown table(s): {', '.join(unknown)}; choose from {', '.join(PARTITIONING)}")
+    before = args.archive_before
+    if args.keep_months is not None:
+        before = add_months(date.today(), -args.keep_months)
+    print("[>] Maintaining partitions..." + (" (dry run)" if args.dry_run else ""))
+    maintain(names, args.ahead, before, args.drop, args.dry_run)
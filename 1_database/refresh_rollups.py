@@ -0,0 +1,221 @@
+"""
+Incremental refresh of the daily rollup tables in hospital_db
+Run: pip install mysql-connector-python
+Then: python refresh_rollups.py                  # fold in new IDs and the changed days
+      python refresh_rollups.py --full           # rebuild every rollup from the fact tables
+      python refresh_rollups.py --only rollup_admissions_daily
+Schedule it (cron / Task Scheduler) as often as reports need current numbers.
+
+Each rollup is one GROUP BY over a fact table, keyed by day (see ROLLUPS and
+the DAILY ROLLUPS section of schema.sql). Two things put a day out of date:
+rows inserted on it, found by ID against the watermark in rollup_state, and
+rows updated or deleted on it (an appointment completed, a bill paid, a
+patient discharged), which the schema's triggers record in rollup_changes.
+A refresh reads MAX(id) of the fact table as the new watermark and then, in
+one transaction:
+  - reads the pending rollup_changes rows and the days of the IDs in
+    (last_id, watermark],
+  - deletes and rebuilds those days from the rows up to the watermark, one
+    date range per run of consecutive days,
+  - deletes the rollup_changes rows it read and records the watermark.
+Changes committed while it runs stay in rollup_changes for the next refresh,
+so a rollup with nothing pending and an up-to-date watermark matches its fact
+table exactly. Only partition archiving (EXCHANGE PARTITION fires no
+triggers) needs a --full rebuild to drop the archived rows.
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+# UPDATE THESE
+DB_CONFIG = {
+    'host': '127.0.0.1',
+    'user': 'root',
+    'password': 'Duckgoforit@09',
+    'database': 'hospital_db'
+}
+
+CHANGE_BATCH = 1_000  # rollup_changes rows deleted per statement
+
+# rollup: (fact table, primary key, date column, [(key column, expression)], [(measure column, aggregate)])
+ROLLUPS = {
+    'rollup_appointments_daily': (
+        'appointments', 'appointment_id', 'appointment_date',
+        [('doctor_id', "doctor_id"),
+         ('status', "COALESCE(status, '')"),
+         ('appointment_type', "COALESCE(appointment_type, '')")],
+        [('appointments', "COUNT(*)")],
+    ),
+    'rollup_revenue_daily': (
+        'billing', 'bill_id', 'bill_date',
+        [('payment_status', "COALESCE(payment_status, '')"),
+         ('payment_method', "COALESCE(payment_method, '')")],
+        [('bills', "COUNT(*)"),
+         ('subtotal', "COALESCE(SUM(subtotal), 0)"),
+         ('tax', "COALESCE(SUM(tax), 0)"),
+         ('discount', "COALESCE(SUM(discount), 0)"),
+         ('total_amount', "SUM(total_amount)")],
+    ),
+    'rollup_admissions_daily': (
+        'admissions', 'admission_id', 'admission_date',
+        [('admission_type', "COALESCE(admission_type, '')"),
+         ('status', "COALESCE(status, '')")],
+        [('admissions', "COUNT(*)"),
+         ('stays', "COUNT(discharge_date)"),
+         ('los_days', "COALESCE(SUM(TIMESTAMPDIFF(DAY, admission_date, discharge_date)), 0)")],
+    ),
+    'rollup_lab_tests_daily': (
+        'lab_tests', 'test_id', 'test_date',
+        [('test_name', "test_name"),
+         ('test_category', "COALESCE(test_category, '')")],
+        [('tests', "COUNT(*)"),
+         ('cost', "COALESCE(SUM(cost), 0)")],
+    ),
+}
+
+
+def get_connection():
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+# ============================================
+# SQL
+# ============================================
+
+def rollup_select(name, where):
+    """The rollup's GROUP BY over its fact table, restricted by a WHERE clause."""
+    source, _, date_column, keys, measures = ROLLUPS[name]
+    columns = [f"DATE({date_column}) AS day"]
+    columns += [f"{expr} AS {column}" for column, expr in keys]
+    columns += [f"{expr} AS {column}" for column, expr in measures]
+    group_by = ', '.join(['day'] + [column for column, _ in keys])
+    return f"SELECT {', '.join(columns)} FROM {source} WHERE {where} GROUP BY {group_by}"
+
+
+def _columns(name):
+    _, _, _, keys, measures = ROLLUPS[name]
+    return ['day'] + [column for column, _ in keys] + [column for column, _ in measures]
+
+
+def insert_sql(name, where):
+    return f"INSERT INTO {name} ({', '.join(_columns(name))}) {rollup_select(name, where)}"
+
+
+def day_ranges(days):
+    """Sorted [start, stop) date ranges covering the days, one per run of consecutive days."""
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    return ranges
+
+
+# ============================================
+# REFRESH
+# ============================================
+
+def read_state(cursor, name):
+    """The rollup's watermark, or None if it has never been built."""
+    cursor.execute("SELECT last_id FROM rollup_state WHERE rollup_name = %s", (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def write_state(cursor, name, last_id, now):
+    cursor.execute(
+        "INSERT INTO rollup_state (rollup_name, last_id, refreshed_at) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE last_id = VALUES(last_id), refreshed_at = VALUES(refreshed_at)",
+        (name, last_id, now))
+
+
+def pending_changes(cursor, name):
+    """{change_id: day} of the updates and deletes the triggers recorded for the rollup."""
+    cursor.execute("SELECT change_id, day FROM rollup_changes WHERE rollup_name = %s", (name,))
+    return dict(cursor.fetchall())
+
+
+def clear_changes(cursor, change_ids):
+    # By ID rather than by range: a change committed after pending_changes() read the table
+    # may still have a lower change_id, and its day has not been rebuilt yet
+    change_ids = sorted(change_ids)
+    for start in range(0, len(change_ids), CHANGE_BATCH):
+        batch = change_ids[start:start + CHANGE_BATCH]
+        cursor.execute(f"DELETE FROM rollup_changes WHERE change_id IN ({', '.join(['%s'] * len(batch))})", batch)
+
+
+def refresh_rollup(conn, name, full=False):
+    """Bring one rollup up to its fact table. Returns (new IDs, days rebuilt, watermark, rebuilt in full)."""
+    source, pk, date_column, _, _ = ROLLUPS[name]
+    cursor = conn.cursor()
+    # Changes first: whatever they record is committed, so the rebuild below reads it
+    changes = pending_changes(cursor, name)
+    cursor.execute(f"SELECT COALESCE(MAX({pk}), 0) FROM {source}")
+    watermark = cursor.fetchone()[0]
+    last_id = None if full else read_state(cursor, name)
+    if last_id is not None and last_id > watermark:
+        # Fact rows were deleted below the watermark (e.g. the table was reloaded)
+        print(f"  [WARN] {name}: {source} MAX({pk}) fell below the watermark; rebuilding in full")
+        last_id = None
+    full = last_id is None
+
+    if full:
+        days = set()
+        cursor.execute(f"DELETE FROM {name}")
+        cursor.execute(insert_sql(name, f"{pk} <= %s"), (watermark,))
+    else:
+        cursor.execute(f"SELECT DISTINCT DATE({date_column}) FROM {source} WHERE {pk} > %s AND {pk} <= %s",
+                       (last_id, watermark))
+        days = {row[0] for row in cursor.fetchall()} | set(changes.values())
+        # Bare date column comparisons, so the date index (and, on a partitioned
+        # fact table, partition pruning) limits the rebuild to those days
+        for start, stop in day_ranges(days):
+            cursor.execute(f"DELETE FROM {name} WHERE day >= %s AND day < %s", (start, stop))
+            cursor.execute(insert_sql(name, f"{date_column} >= %s AND {date_column} < %s AND {pk} <= %s"),
+                           (start, stop, watermark))
+
+    clear_changes(cursor, changes)
+    write_state(cursor, name, watermark, datetime.now())
+    conn.commit()
+    cursor.close()
+    return watermark - (last_id or 0), len(days), watermark, full
+
+
+def refresh_all(names=None, full=False):
+    conn = get_connection()
+    # Read committed: INSERT ... SELECT would otherwise hold shared locks on the fact rows it reads
+    conn.cursor().execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+    try:
+        for name in names or ROLLUPS:
+            started = time.perf_counter()
+            try:
+                new_ids, days, watermark, rebuilt = refresh_rollup(conn, name, full)
+            except mysql.connector.Error as e:
+                conn.rollback()
+                print(f"  [WARN] {name}: {e}")
+                continue
+            mode = 'full rebuild' if rebuilt else f"{new_ids:,} new IDs, {days:,} days rebuilt"
+            print(f"  [OK] {name}: {mode}, up to id {watermark:,} ({time.perf_counter() - started:.2f}s)")
+    finally:
+        conn.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the daily rollup tables in hospital_db")
+    parser.add_argument('--full', action='store_true', help="rebuild every rollup from the fact tables")
+    parser.add_argument('--only', default=None, help="comma-separated rollup tables to refresh")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    names = [n.strip() for n in args.only.split(',')] if args.only else None
+    unknown = [n for n in names or [] if n not in ROLLUPS]
+    if unknown:
+        raise SystemExit(f"Unknown rollup(s): {', '.join(unknown)}; choose from {', '.join(ROLLUPS)}")
+    print("[>] Refreshing rollups...")
+    refresh_all(names, args.full)
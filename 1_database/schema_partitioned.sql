@@ -0,0 +1,394 @@
+-- =============================================
+-- HOSPITAL MANAGEMENT SYSTEM DATABASE
+-- Partitioned variant of schema.sql
+--
+-- appointments, billing, lab_tests and medical_records are RANGE partitioned
+-- by month, and admissions by quarter, on their date column. Queries that
+-- filter on that bare column (col >= :since AND col < :until) only read
+-- the partitions in range. Differences from schema.sql:
+--   - each of those tables has the date in its primary key, as MySQL
+--     requires the partition column in every unique key,
+--   - foreign keys to or from those tables are dropped, because InnoDB
+--     can't partition tables that take part in a foreign key (the
+--     generator and the application keep the references consistent).
+-- The tables start with only p_history and p_future (MAXVALUE). Run
+-- partition_maintenance.py after setup (and regularly, e.g. monthly) to
+-- split p_future into real month/quarter partitions and to archive old
+-- ones:
+--   python setup_schema.py schema_partitioned.sql
+--   python partition_maintenance.py
+-- =============================================
+
+CREATE DATABASE IF NOT EXISTS hospital_db;
+USE hospital_db;
+
+-- Departments
+CREATE TABLE departments (
+    department_id INT PRIMARY KEY AUTO_INCREMENT,
+    department_name VARCHAR(100) NOT NULL,
+    floor_number INT,
+    phone_extension VARCHAR(10)
+);
+
+-- Doctors
+CREATE TABLE doctors (
+    doctor_id INT PRIMARY KEY AUTO_INCREMENT,
+    first_name VARCHAR(50) NOT NULL,
+    last_name VARCHAR(50) NOT NULL,
+    email VARCHAR(100),
+    phone VARCHAR(15),
+    specialization VARCHAR(100),
+    department_id INT,
+    experience_years INT,
+    consultation_fee DECIMAL(10,2),
+    hire_date DATE,
+    status ENUM('Active','Inactive','On Leave') DEFAULT 'Active',
+    FOREIGN KEY (department_id) REFERENCES departments(department_id)
+);
+
+-- Patients
+CREATE TABLE patients (
+    patient_id INT PRIMARY KEY AUTO_INCREMENT,
+    first_name VARCHAR(50) NOT NULL,
+    last_name VARCHAR(50) NOT NULL,
+    date_of_birth DATE NOT NULL,
+    gender ENUM('Male','Female','Other'),
+    blood_group VARCHAR(5),
+    phone VARCHAR(15),
+    email VARCHAR(100),
+    address VARCHAR(255),
+    city VARCHAR(50),
+    state VARCHAR(50),
+    zip_code VARCHAR(10),
+    emergency_contact_name VARCHAR(100),
+    emergency_contact_phone VARCHAR(15),
+    registration_date DATE,
+    status ENUM('Active','Inactive') DEFAULT 'Active'
+);
+
+-- Appointments
+CREATE TABLE appointments (
+    appointment_id INT NOT NULL AUTO_INCREMENT,
+    patient_id INT NOT NULL,
+    doctor_id INT NOT NULL,
+    appointment_date DATE NOT NULL,
+    appointment_time TIME NOT NULL,
+    appointment_type ENUM('Consultation','Follow-up','Emergency','Routine Checkup'),
+    status ENUM('Scheduled','Completed','Cancelled','No Show') DEFAULT 'Scheduled',
+    symptoms TEXT,
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (appointment_id, appointment_date)
+)
+PARTITION BY RANGE COLUMNS(appointment_date) (
+    PARTITION p_history VALUES LESS THAN ('2000-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- Medical Records
+CREATE TABLE medical_records (
+    record_id INT NOT NULL AUTO_INCREMENT,
+    patient_id INT NOT NULL,
+    doctor_id INT NOT NULL,
+    appointment_id INT,
+    diagnosis VARCHAR(255),
+    treatment TEXT,
+    prescription TEXT,
+    blood_pressure VARCHAR(20),
+    heart_rate INT,
+    temperature DECIMAL(4,1),
+    weight DECIMAL(5,2),
+    record_date DATE NOT NULL,
+    follow_up_date DATE,
+    PRIMARY KEY (record_id, record_date)
+)
+PARTITION BY RANGE COLUMNS(record_date) (
+    PARTITION p_history VALUES LESS THAN ('2000-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- Wards
+CREATE TABLE wards (
+    ward_id INT PRIMARY KEY AUTO_INCREMENT,
+    ward_name VARCHAR(50) NOT NULL,
+    department_id INT,
+    floor_number INT,
+    total_beds INT,
+    FOREIGN KEY (department_id) REFERENCES departments(department_id)
+);
+
+-- Beds
+CREATE TABLE beds (
+    bed_id INT PRIMARY KEY AUTO_INCREMENT,
+    ward_id INT NOT NULL,
+    bed_number VARCHAR(10) NOT NULL,
+    bed_type ENUM('General','Semi-Private','Private','ICU','NICU') DEFAULT 'General',
+    daily_rate DECIMAL(10,2),
+    status ENUM('Available','Occupied','Maintenance') DEFAULT 'Available',
+    FOREIGN KEY (ward_id) REFERENCES wards(ward_id)
+);
+
+-- Admissions
+CREATE TABLE admissions (
+    admission_id INT NOT NULL AUTO_INCREMENT,
+    patient_id INT NOT NULL,
+    doctor_id INT NOT NULL,
+    bed_id INT,
+    admission_date DATETIME NOT NULL,
+    discharge_date DATETIME,
+    admission_type ENUM('Emergency','Planned','Transfer'),
+    diagnosis VARCHAR(255),
+    status ENUM('Admitted','Discharged','Transferred') DEFAULT 'Admitted',
+    PRIMARY KEY (admission_id, admission_date)
+)
+PARTITION BY RANGE COLUMNS(admission_date) (
+    PARTITION p_history VALUES LESS THAN ('2000-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- Billing
+CREATE TABLE billing (
+    bill_id INT NOT NULL AUTO_INCREMENT,
+    patient_id INT NOT NULL,
+    appointment_id INT,
+    admission_id INT,
+    bill_date DATE NOT NULL,
+    subtotal DECIMAL(12,2),
+    tax DECIMAL(10,2) DEFAULT 0,
+    discount DECIMAL(10,2) DEFAULT 0,
+    total_amount DECIMAL(12,2) NOT NULL,
+    payment_status ENUM('Pending','Partial','Paid','Overdue') DEFAULT 'Pending',
+    payment_method ENUM('Cash','Card','Insurance','Online'),
+    payment_date DATE,
+    due_date DATE,
+    PRIMARY KEY (bill_id, bill_date)
+)
+PARTITION BY RANGE COLUMNS(bill_date) (
+    PARTITION p_history VALUES LESS THAN ('2000-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- Lab Tests
+CREATE TABLE lab_tests (
+    test_id INT NOT NULL AUTO_INCREMENT,
+    patient_id INT NOT NULL,
+    doctor_id INT NOT NULL,
+    test_name VARCHAR(100) NOT NULL,
+    test_category ENUM('Blood','Urine','Imaging','Cardiac','Other'),
+    test_date DATE NOT NULL,
+    result_date DATE,
+    result_value TEXT,
+    normal_range VARCHAR(100),
+    status ENUM('Pending','In Progress','Completed') DEFAULT 'Pending',
+    cost DECIMAL(10,2),
+    PRIMARY KEY (test_id, test_date)
+)
+PARTITION BY RANGE COLUMNS(test_date) (
+    PARTITION p_history VALUES LESS THAN ('2000-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- Medicines
+CREATE TABLE medicines (
+    medicine_id INT PRIMARY KEY AUTO_INCREMENT,
+    medicine_name VARCHAR(100) NOT NULL,
+    generic_name VARCHAR(100),
+    category VARCHAR(50),
+    manufacturer VARCHAR(100),
+    unit_price DECIMAL(10,2),
+    quantity_in_stock INT DEFAULT 0,
+    reorder_level INT DEFAULT 50,
+    expiry_date DATE
+);
+
+-- Staff
+CREATE TABLE staff (
+    staff_id INT PRIMARY KEY AUTO_INCREMENT,
+    first_name VARCHAR(50) NOT NULL,
+    last_name VARCHAR(50) NOT NULL,
+    role ENUM('Nurse','Technician','Receptionist','Admin','Pharmacist'),
+    department_id INT,
+    phone VARCHAR(15),
+    email VARCHAR(100),
+    hire_date DATE,
+    salary DECIMAL(10,2),
+    shift ENUM('Morning','Afternoon','Night'),
+    status ENUM('Active','Inactive') DEFAULT 'Active',
+    FOREIGN KEY (department_id) REFERENCES departments(department_id)
+);
+
+-- Insurance Providers
+CREATE TABLE insurance_providers (
+    insurance_id INT PRIMARY KEY AUTO_INCREMENT,
+    provider_name VARCHAR(100) NOT NULL,
+    contact_phone VARCHAR(15),
+    email VARCHAR(100),
+    coverage_percentage DECIMAL(5,2)
+);
+
+-- Insurance Claims
+CREATE TABLE insurance_claims (
+    claim_id INT PRIMARY KEY AUTO_INCREMENT,
+    bill_id INT NOT NULL,
+    insurance_id INT NOT NULL,
+    claim_amount DECIMAL(12,2),
+    approved_amount DECIMAL(12,2),
+    status ENUM('Submitted','Processing','Approved','Rejected','Paid') DEFAULT 'Submitted',
+    submission_date DATE,
+    approval_date DATE,
+    rejection_reason TEXT,
+    FOREIGN KEY (insurance_id) REFERENCES insurance_providers(insurance_id)
+);
+
+-- Create Indexes
+-- Designed around the analysis queries (see 2_analysis/index_advisor.py, which
+-- checks a live database against this set). InnoDB appends the primary key to
+-- every secondary index, so the ID watermark filters used by the snapshot and
+-- rollup refresh are covered as well. The composite indexes that lead with a
+-- foreign key column also stand in for the index InnoDB would add for that key.
+
+-- Date-range reads and the daily appointment rollup (index-only)
+CREATE INDEX idx_app_date ON appointments(appointment_date, doctor_id, status, appointment_type);
+-- Status KPIs: completed / no-show / past appointments without touching the rows
+CREATE INDEX idx_app_status ON appointments(status, appointment_date);
+-- Per-doctor totals and completion rates
+CREATE INDEX idx_app_doctor_status ON appointments(doctor_id, status);
+-- Patient history lookups
+CREATE INDEX idx_app_patient_date ON appointments(patient_id, appointment_date);
+-- Snapshot probe: MAX(created_at)
+CREATE INDEX idx_app_created ON appointments(created_at);
+
+CREATE INDEX idx_patient_reg ON patients(registration_date);
+CREATE INDEX idx_patient_status ON patients(status);
+
+-- Monthly revenue by status / method and date-range reads
+CREATE INDEX idx_bill_date ON billing(bill_date, payment_status, payment_method, total_amount);
+-- Collected / outstanding revenue KPIs
+CREATE INDEX idx_bill_status ON billing(payment_status, total_amount);
+CREATE INDEX idx_bill_patient_date ON billing(patient_id, bill_date);
+
+-- Monthly admissions and the daily admission rollup
+CREATE INDEX idx_adm_date ON admissions(admission_date, admission_type, status, discharge_date);
+-- Average length of stay and current admissions KPIs
+CREATE INDEX idx_adm_status ON admissions(status, admission_date, discharge_date);
+
+-- Monthly lab tests and the daily lab test rollup (index-only)
+CREATE INDEX idx_lab_date ON lab_tests(test_date, test_category, test_name, cost);
+
+CREATE INDEX idx_claim_bill ON insurance_claims(bill_id, status);
+
+-- =============================================
+-- DAILY ROLLUPS
+-- Maintained incrementally by refresh_rollups.py: new IDs by the watermark in
+-- rollup_state, updated and deleted rows by the days the triggers below record
+-- in rollup_changes. hospital_analysis.py reads them for KPIs and monthly
+-- reports while every watermark is current and no change is pending.
+-- Nullable ENUM columns of the fact tables are stored as '' so they can be keys.
+-- =============================================
+
+-- Appointments by day / doctor / status / type
+CREATE TABLE rollup_appointments_daily (
+    day DATE NOT NULL,
+    doctor_id INT NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    appointment_type VARCHAR(20) NOT NULL,
+    appointments INT NOT NULL,
+    PRIMARY KEY (day, doctor_id, status, appointment_type)
+);
+
+-- Revenue by day / payment status / payment method
+CREATE TABLE rollup_revenue_daily (
+    day DATE NOT NULL,
+    payment_status VARCHAR(20) NOT NULL,
+    payment_method VARCHAR(20) NOT NULL,
+    bills INT NOT NULL,
+    subtotal DECIMAL(16,2) NOT NULL,
+    tax DECIMAL(14,2) NOT NULL,
+    discount DECIMAL(14,2) NOT NULL,
+    total_amount DECIMAL(16,2) NOT NULL,
+    PRIMARY KEY (day, payment_status, payment_method)
+);
+
+-- Admissions and length of stay by admission day / type / status
+CREATE TABLE rollup_admissions_daily (
+    day DATE NOT NULL,
+    admission_type VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    admissions INT NOT NULL,
+    stays INT NOT NULL,          -- admissions with a discharge_date
+    los_days BIGINT NOT NULL,    -- sum of TIMESTAMPDIFF(DAY, admission_date, discharge_date) over those
+    PRIMARY KEY (day, admission_type, status)
+);
+
+-- Lab tests by test day / name / category
+CREATE TABLE rollup_lab_tests_daily (
+    day DATE NOT NULL,
+    test_name VARCHAR(100) NOT NULL,
+    test_category VARCHAR(20) NOT NULL,
+    tests INT NOT NULL,
+    cost DECIMAL(16,2) NOT NULL,
+    PRIMARY KEY (day, test_name, test_category)
+);
+
+-- Watermark per rollup: fact rows with id <= last_id are folded in
+CREATE TABLE rollup_state (
+    rollup_name VARCHAR(50) PRIMARY KEY,
+    last_id INT NOT NULL,
+    refreshed_at DATETIME NOT NULL
+);
+
+-- Days to rebuild: a rolled-up column of a fact row changed, or the row was deleted.
+-- One row per day touched (the old and the new day when the date moves); the refresh
+-- deletes the rows it has read once those days are rebuilt
+CREATE TABLE rollup_changes (
+    change_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    rollup_name VARCHAR(50) NOT NULL,
+    day DATE NOT NULL,
+    INDEX idx_rollup_changes (rollup_name)
+);
+
+-- Change triggers. Each body is a single statement, so the script still splits on ';'
+-- (setup_schema.py) without DELIMITER. Updates that leave the rolled-up columns alone
+-- (notes, results, payment dates) record nothing. Inserts need no trigger: the
+-- refresh finds them by ID.
+
+-- Appointments: day, doctor, status, type
+CREATE TRIGGER trg_app_rollup_update AFTER UPDATE ON appointments FOR EACH ROW
+    INSERT INTO rollup_changes (rollup_name, day)
+    SELECT 'rollup_appointments_daily', day FROM (
+        SELECT DATE(OLD.appointment_date) AS day UNION SELECT DATE(NEW.appointment_date)) AS days
+    WHERE NOT (OLD.appointment_date <=> NEW.appointment_date AND OLD.doctor_id <=> NEW.doctor_id AND OLD.status <=> NEW.status
+               AND OLD.appointment_type <=> NEW.appointment_type);
+CREATE TRIGGER trg_app_rollup_delete AFTER DELETE ON appointments FOR EACH ROW
+    INSERT INTO rollup_changes (rollup_name, day) VALUES ('rollup_appointments_daily', DATE(OLD.appointment_date));
+
+-- Billing: day, payment status / method, amounts
+CREATE TRIGGER trg_bill_rollup_update AFTER UPDATE ON billing FOR EACH ROW
+    INSERT INTO rollup_changes (rollup_name, day)
+    SELECT 'rollup_revenue_daily', day FROM (
+        SELECT DATE(OLD.bill_date) AS day UNION SELECT DATE(NEW.bill_date)) AS days
+    WHERE NOT (OLD.bill_date <=> NEW.bill_date AND OLD.payment_status <=> NEW.payment_status AND OLD.payment_method <=> NEW.payment_method
+               AND OLD.subtotal <=> NEW.subtotal AND OLD.tax <=> NEW.tax AND OLD.discount <=> NEW.discount
+               AND OLD.total_amount <=> NEW.total_amount);
+CREATE TRIGGER trg_bill_rollup_delete AFTER DELETE ON billing FOR EACH ROW
+    INSERT INTO rollup_changes (rollup_name, day) VALUES ('rollup_revenue_daily', DATE(OLD.bill_date));
+
+-- Admissions: day, type, status, discharge
+CREATE TRIGGER trg_adm_rollup_update AFTER UPDATE ON admissions FOR EACH ROW
+    INSERT INTO rollup_changes (rollup_name, day)
+    SELECT 'rollup_admissions_daily', day FROM (
+        SELECT DATE(OLD.admission_date) AS day UNION SELECT DATE(NEW.admission_date)) AS days
+    WHERE NOT (OLD.admission_date <=> NEW.admission_date AND OLD.admission_type <=> NEW.admission_type AND OLD.status <=> NEW.status
+               AND OLD.discharge_date <=> NEW.discharge_date);
+CREATE TRIGGER trg_adm_rollup_delete AFTER DELETE ON admissions FOR EACH ROW
+    INSERT INTO rollup_changes (rollup_name, day) VALUES ('rollup_admissions_daily', DATE(OLD.admission_date));
+
+-- Lab tests: day, name, category, cost
+CREATE TRIGGER trg_lab_rollup_update AFTER UPDATE ON lab_tests FOR EACH ROW
+    INSERT INTO rollup_changes (rollup_name, day)
+    SELECT 'rollup_lab_tests_daily', day FROM (
+        SELECT DATE(OLD.test_date) AS day UNION SELECT DATE(NEW.test_date)) AS days
+    WHERE NOT (OLD.test_date <=> NEW.test_date AND OLD.test_name <=> NEW.test_name AND OLD.test_category <=> NEW.test_category
+               AND OLD.cost <=> NEW.cost);
+CREATE TRIGGER trg_lab_rollup_delete AFTER DELETE ON lab_tests FOR EACH ROW
+    INSERT INTO rollup_changes (rollup_name, day) VALUES ('rollup_lab_tests_daily', DATE(OLD.test_date));
@@ -1,6 +1,7 @@
 
 import mysql.connector
 import os
+import sys
 
 config = {
     'host': '127.0.0.1',
@@ -24,8 +25,10 @@ try:
     conn = mysql.connector.connect(**config)
     cursor = conn.cursor()
     
-    print("Reading schema.sql...")
-    with open('schema.sql', 'r') as f:
+    # schema.sql by default; pass schema_partitioned.sql for the partitioned variant
+    schema_file = sys.argv[1] if len(sys.argv) > 1 else 'schema.sql'
+    print(f"Reading {schema_file}...")
+    with open(schema_file, 'r') as f:
         sql_script = f.read()
     
     print("Executing schema...")
@@ -0,0 +1,351 @@
+"""
+Mergeable partial aggregates for the appointment and billing sections
+Run: pip install pandas numpy sqlalchemy pymysql
+
+A partial is a dict of counters, sums and moments that can be computed on
+any slice of a table and merged with merge(). The eager path builds one
+partial from the whole frame; the streaming path folds one partial per
+chunk read through a server-side cursor. Both then go through the same
+finalize_*() step, so the charts, Excel sheets and insights come out the
+same whichever path produced them, while streaming memory stays bounded by
+the chunk size. A third path computes the same partials (less the row
+samples) with GROUP BY queries inside MySQL, so no rows leave the database
+(see network.py).
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from extract import ENUMS, apply_types, date_columns, select_sql
+from features import DAY_ORDER, prepare_appointments, prepare_billing
+from window import where, window_params
+
+STREAMED_TABLES = ['appointments', 'billing']
+SAMPLE_ROWS = 1000
+AMOUNT_BINS = 50
+CORR_COLUMNS = ['subtotal', 'tax', 'discount', 'total_amount']
+
+
+# ============================================
+# PARTIALS
+# ============================================
+
+def _decategorize(index):
+    if isinstance(index, pd.CategoricalIndex):
+        return pd.Index(np.asarray(index), name=index.name)
+    return index
+
+
+def _plain(counts):
+    """Drop empty categories and turn categorical keys into plain values so partials merge cleanly."""
+    counts = counts[counts > 0] if counts.dtype.kind in 'iu' else counts
+    if isinstance(counts.index, pd.MultiIndex):
+        counts.index = counts.index.set_levels([_decategorize(level) for level in counts.index.levels])
+    else:
+        counts.index = _decategorize(counts.index)
+    return counts
+
+
+def _counts(values):
+    return _plain(values.value_counts(sort=False))
+
+
+def _moments(values):
+    """(n, mean vector, co-moment matrix) for a 2-D float array."""
+    n = len(values)
+    if n == 0:
+        width = values.shape[1]
+        return 0, np.zeros(width), np.zeros((width, width))
+    mean = values.mean(axis=0)
+    centered = values - mean
+    return n, mean, centered.T @ centered
+
+
+def _merge_moments(a, b):
+    # Chan et al. pairwise update, stable for long streams of large amounts
+    n_a, mean_a, m_a = a
+    n_b, mean_b, m_b = b
+    n = n_a + n_b
+    if n_a == 0 or n_b == 0:
+        return b if n_a == 0 else a
+    delta = mean_b - mean_a
+    return n, mean_a + delta * n_b / n, m_a + m_b + np.outer(delta, delta) * n_a * n_b / n
+
+
+def amount_edges(low, high, bins=AMOUNT_BINS):
+    """The bin edges matplotlib's hist(bins=50) would pick for values spanning [low, high]."""
+    return np.histogram_bin_edges(np.array([low, high], dtype=float), bins=bins)
+
+
+def appointment_partial(df, now):
+    completed = df['status'] == 'Completed'
+    recent = df['appointment_date'] >= now - timedelta(days=30)
+    return {
+        'rows': len(df),
+        'status': _counts(df['status']),
+        'type': _counts(df['appointment_type']),
+        'hour': _counts(df['hour']),
+        'day': _counts(df['day_name']),
+        'doctor_total': _counts(df['doctor_id']),
+        'doctor_completed': _counts(df.loc[completed, 'doctor_id']),
+        'year_month_status': _plain(df.groupby(['year', 'month', 'status'], observed=True).size()),
+        'daily_recent': _counts(df.loc[recent, 'appointment_date']),
+        'sample': df.head(SAMPLE_ROWS),
+    }
+
+
+def billing_partial(df, edges):
+    paid = df['payment_status'] == 'Paid'
+    return {
+        'rows': len(df),
+        'paid_rows': int(paid.sum()),
+        'month_sum': _plain(df.groupby('year_month')['total_amount'].sum()),
+        'month_count': _plain(df.groupby('year_month').size()),
+        'status_sum': _plain(df.groupby('payment_status', observed=True)['total_amount'].sum()),
+        'paid_method_sum': _plain(df[paid].groupby('payment_method', observed=True)['total_amount'].sum()),
+        'paid_method_count': _counts(df.loc[paid, 'payment_method']),
+        'amount_hist': np.histogram(df['total_amount'], bins=edges)[0],
+        'amount_edges': edges,
+        'moments': _moments(df[CORR_COLUMNS].to_numpy(dtype=float)),
+        'sample': df.head(SAMPLE_ROWS),
+    }
+
+
+def _add(a, b):
+    out = a.add(b, fill_value=0)
+    if a.dtype.kind in 'iu' and b.dtype.kind in 'iu':
+        out = out.astype('int64')
+    return out
+
+
+def merge(a, b):
+    """Combine two partials of the same table (a may be None)."""
+    if a is None:
+        return b
+    out = {}
+    for key, value in a.items():
+        other = b[key]
+        if key == 'sample':
+            out[key] = value if len(value) >= SAMPLE_ROWS else pd.concat([value, other]).head(SAMPLE_ROWS)
+        elif key == 'moments':
+            out[key] = _merge_moments(value, other)
+        elif key == 'amount_edges':
+            out[key] = value
+        elif isinstance(value, pd.Series):
+            out[key] = _add(value, other)
+        else:
+            out[key] = value + other
+    return out
+
+
+# ============================================
+# STREAMING
+# ============================================
+
+def stream_partial(engine, table, chunk_rows, now=None, window=None):
+    """Fold a table (the window's rows of it) into one partial, chunk_rows at a time over a server-side cursor."""
+    now = now or datetime.now()
+    params = window_params(window)
+    merged = None
+    with engine.connect().execution_options(stream_results=True) as conn:
+        if table == 'billing':
+            bounds = where("SELECT MIN(total_amount), MAX(total_amount) FROM billing", table, window)
+            low, high = conn.execute(text(bounds), params).one()
+            edges = amount_edges(low or 0, high or 0)
+        chunks = pd.read_sql(text(where(select_sql(table), table, window)), conn, params=params,
+                             chunksize=chunk_rows, parse_dates=date_columns(table))
+        for chunk in chunks:
+            chunk = apply_types(chunk, table)
+            if table == 'appointments':
+                partial = appointment_partial(prepare_appointments(chunk), now)
+            else:
+                partial = billing_partial(prepare_billing(chunk), edges)
+            merged = merge(merged, partial)
+    if merged is None:
+        raise ValueError(f"{table} is empty")
+    return merged
+
+
+def eager_partial(df, table, now=None):
+    now = now or datetime.now()
+    if table == 'appointments':
+        return appointment_partial(prepare_appointments(df), now)
+    edges = amount_edges(df['total_amount'].min(), df['total_amount'].max())
+    return billing_partial(prepare_billing(df), edges)
+
+
+# ============================================
+# PUSHED DOWN
+# ============================================
+# Every counter is one GROUP BY in MySQL; sums of DECIMAL columns come back
+# exact and are converted to float here. The co-moments are rebuilt from
+# the sums and the sums of products.
+
+def grouped(conn, table, keys, measure='COUNT(*)', window=None, condition=None, params=None):
+    """SELECT keys, measure FROM table GROUP BY keys as a Series (MultiIndex for several keys).
+
+    keys: {name: SQL expression}; the window and condition go in the WHERE clause.
+    """
+    select = ', '.join(f"{expr} AS {name}" for name, expr in keys.items())
+    sql = where(f"SELECT {select}, {measure} AS value FROM {table}", table, window)
+    if condition:
+        sql += f" {'AND' if ' WHERE ' in sql else 'WHERE'} {condition}"
+    order = ', '.join(keys)
+    df = pd.read_sql(text(f"{sql} GROUP BY {order} ORDER BY {order}"), conn,
+                     params={**window_params(window), **(params or {})})
+    df = df.dropna(subset=list(keys))
+    return df.set_index(list(keys))['value'].pipe(pd.to_numeric)
+
+
+def appointment_partial_sql(conn, now, window=None):
+    def count(keys, **kwargs):
+        return grouped(conn, 'appointments', keys, window=window, **kwargs)
+
+    completed = "status = 'Completed'"
+    total = where("SELECT COUNT(*) FROM appointments", 'appointments', window)
+    # The bare column against a DATETIME, so 'recent' means the same as in appointment_partial
+    recent = count({'appointment_date': 'appointment_date'}, condition="appointment_date >= :recent",
+                   params={'recent': now - timedelta(days=30)})
+    recent.index = pd.to_datetime(recent.index)
+    return {
+        'rows': int(conn.execute(text(total), window_params(window)).scalar()),
+        'status': count({'status': 'status'}),
+        'type': count({'appointment_type': 'appointment_type'}),
+        'hour': count({'hour': 'HOUR(appointment_time)'}),
+        'day': count({'day_name': 'DAYNAME(appointment_date)'}),
+        'doctor_total': count({'doctor_id': 'doctor_id'}),
+        'doctor_completed': count({'doctor_id': 'doctor_id'}, condition=completed),
+        'year_month_status': count({'year': 'YEAR(appointment_date)', 'month': 'MONTH(appointment_date)',
+                                    'status': 'status'}),
+        'daily_recent': recent,
+    }
+
+
+def billing_bounds(conn, window=None):
+    """(MIN, MAX) of total_amount, for amount_edges() shared by several databases."""
+    sql = where("SELECT MIN(total_amount), MAX(total_amount) FROM billing", 'billing', window)
+    low, high = conn.execute(text(sql), window_params(window)).one()
+    return (None if low is None else float(low)), (None if high is None else float(high))
+
+
+def billing_partial_sql(conn, edges, window=None):
+    def sums(keys, measure='SUM(total_amount)', **kwargs):
+        return grouped(conn, 'billing', keys, measure, window=window, **kwargs).astype(float)
+
+    def count(keys, **kwargs):
+        return grouped(conn, 'billing', keys, window=window, **kwargs)
+
+    paid = "payment_status = 'Paid'"
+    month = {'year_month': "DATE_FORMAT(bill_date, '%Y-%m')"}
+    columns = CORR_COLUMNS
+    products = [f"SUM({a} * {b})" for i, a in enumerate(columns) for b in columns[i:]]
+    totals = where(f"SELECT COUNT(*), COUNT(CASE WHEN {paid} THEN 1 END), "
+                   f"{', '.join(f'SUM({c})' for c in columns)}, {', '.join(products)} FROM billing",
+                   'billing', window)
+    row = [float(v or 0) for v in conn.execute(text(totals), window_params(window)).one()]
+    n, width = int(row[0]), len(columns)
+    sums_x = np.array(row[2:2 + width])
+    cross = np.zeros((width, width))
+    cross[np.triu_indices(width)] = row[2 + width:]
+    cross = cross + np.triu(cross, 1).T
+    mean = sums_x / n if n else np.zeros(width)
+
+    bins = len(edges) - 1
+    bucket = f"LEAST(FLOOR((total_amount - :first) * {bins} / (:last - :first)), {bins - 1})"
+    buckets = count({'bucket': bucket}, params={'first': float(edges[0]), 'last': float(edges[-1])})
+    hist = np.zeros(bins, dtype='int64')
+    hist[buckets.index.astype(int)] = buckets.to_numpy()
+
+    return {
+        'rows': n,
+        'paid_rows': int(row[1]),
+        'month_sum': sums(month),
+        'month_count': count(month),
+        'status_sum': sums({'payment_status': 'payment_status'}),
+        'paid_method_sum': sums({'payment_method': 'payment_method'}, condition=paid),
+        'paid_method_count': count({'payment_method': 'payment_method'}, condition=paid),
+        'amount_hist': hist,
+        'amount_edges': edges,
+        'moments': (n, mean, cross - n * np.outer(mean, mean)),
+    }
+
+
+# ============================================
+# FINALIZE
+# ============================================
+
+def _by_count(counts):
+    """value_counts()-style ordering with ties broken by key, so every path agrees."""
+    return counts.sort_index().sort_values(ascending=False, kind='stable')
+
+
+def _enum_order(series, table, column):
+    return series.reindex([v for v in ENUMS[(table, column)] if v in series.index])
+
+
+def finalize_appointments(p, doctors):
+    doctor_summary = doctors[['doctor_id', 'first_name', 'last_name', 'specialization']].copy()
+    doctor_summary['doctor_name'] = doctor_summary['first_name'] + ' ' + doctor_summary['last_name']
+    doctor_summary['total_appointments'] = doctor_summary['doctor_id'].map(p['doctor_total'])
+    doctor_summary = doctor_summary.dropna(subset=['total_appointments'])
+    doctor_summary['total_appointments'] = doctor_summary['total_appointments'].astype('int64')
+    doctor_summary['completed'] = doctor_summary['doctor_id'].map(p['doctor_completed']).fillna(0).astype('int64')
+    doctor_summary = doctor_summary.sort_values('doctor_id')[
+        ['doctor_id', 'doctor_name', 'specialization', 'total_appointments', 'completed']
+    ].reset_index(drop=True)
+    doctor_summary['completion_rate'] = (doctor_summary['completed'] / doctor_summary['total_appointments'] * 100).round(2)
+
+    app_by_status = p['year_month_status'].reset_index(name='count')
+    app_by_status['status'] = pd.Categorical(app_by_status['status'], categories=ENUMS[('appointments', 'status')])
+    app_by_status = app_by_status.sort_values(['year', 'month', 'status']).reset_index(drop=True)
+
+    daily = p['daily_recent'].sort_index()
+    hours = _by_count(p['hour'])
+    days = _by_count(p['day'])
+
+    return {
+        'rows': p['rows'],
+        'status_counts': _by_count(p['status']),
+        'type_counts': _by_count(p['type']),
+        'hour_counts': p['hour'].sort_index(),
+        'day_counts': p['day'].reindex(DAY_ORDER),
+        'doctor_summary': doctor_summary,
+        'spec_counts': doctor_summary.groupby('specialization', observed=True)['total_appointments'].sum(),
+        'app_by_status': app_by_status,
+        'daily_app': pd.DataFrame({'appointment_date': pd.to_datetime(daily.index), 'count': daily.values}),
+        'peak_hours': hours.head(3).index.tolist(),
+        'busiest_day': days.index[0] if len(days) else 'N/A',
+        'sample': p.get('sample'),
+    }
+
+
+def finalize_billing(p):
+    months = p['month_sum'].index
+    monthly = pd.DataFrame({
+        'Month': months.astype(str),
+        'Bill_Count': p['month_count'].reindex(months).values,
+        'Total_Revenue': p['month_sum'].values,
+    })
+    monthly['Avg_Bill_Value'] = monthly['Total_Revenue'] / monthly['Bill_Count']
+
+    n, _, comoment = p['moments']
+    scale = np.sqrt(np.diag(comoment))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = comoment / np.outer(scale, scale)
+    method_counts = _by_count(p['paid_method_count'])
+
+    return {
+        'rows': p['rows'],
+        'paid_rows': p['paid_rows'],
+        'monthly': monthly,
+        'monthly_revenue': pd.Series(monthly['Total_Revenue'].values, index=monthly['Month']),
+        'payment_status': _enum_order(p['status_sum'], 'billing', 'payment_status'),
+        'method_sums': _enum_order(p['paid_method_sum'], 'billing', 'payment_method'),
+        'top_method': method_counts.index[0] if len(method_counts) else 'N/A',
+        'amount_hist': (p['amount_hist'], p['amount_edges']),
+        'correlation': pd.DataFrame(corr, index=CORR_COLUMNS, columns=CORR_COLUMNS),
+        'sample': p.get('sample'),
+    }
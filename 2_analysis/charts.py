@@ -0,0 +1,336 @@
+"""
+Chart render tasks for hospital_analysis.py
+Run: pip install pandas numpy matplotlib seaborn
+
+Each chart is a function of small, pre-aggregated inputs (value counts,
+monthly series, histogram bins, a 4x4 correlation matrix), never of the
+raw frames. render_charts() runs the tasks on a process pool with the Agg
+backend, so only those inputs are pickled and rendering scales with
+cores. With workers=1 the same functions run in-process, one after
+another.
+
+A render profile sets the resolution and save options: 'print' is the
+300 dpi, tightly cropped output for reports, 'draft' a quick low
+resolution render for CI and previews. Each chart's inputs are hashed
+with the profile, and a chart whose hash matches the one recorded in the
+output directory (CHART_MANIFEST) is not rendered again. Figures are
+built on Agg canvases without pyplot, and each chart's figure and axes
+are kept as a template that later renders in the same process clear and
+redraw instead of creating new ones.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# profile: savefig options
+PROFILES = {
+    'print': {'dpi': 300, 'bbox_inches': 'tight'},
+    'draft': {'dpi': 72, 'bbox_inches': None, 'pil_kwargs': {'compress_level': 1}},
+}
+PROFILE = 'print'
+CHART_MANIFEST = '.chart_hashes.json'  # file name -> hash of the inputs it was rendered from
+
+_TEMPLATES = {}  # chart name -> (figure, axes, initial margins), reused by later renders in this process
+
+
+def setup_style():
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.switch_backend('Agg')
+    plt.style.use('seaborn-v0_8-whitegrid')
+    plt.rcParams['figure.figsize'] = (12, 6)
+    sns.set_palette("husl")
+
+
+def histogram(values, bins):
+    """(counts, edges) matching what hist(values, bins=bins) would draw."""
+    values = np.asarray(values, dtype=float)
+    edges = np.histogram_bin_edges(values, bins=bins)
+    return np.histogram(values, bins=edges)[0], edges
+
+
+def _hist(ax, binned, **kwargs):
+    counts, edges = binned
+    ax.hist(edges[:-1], bins=edges, weights=counts, **kwargs)
+
+
+def _figure(name, nrows=1, ncols=1, figsize=(12, 6), **kwargs):
+    """The chart's (figure, axes), created on first use and cleared for every later render."""
+    if name in _TEMPLATES:
+        fig, axes, margins = _TEMPLATES[name]
+        for ax in fig.axes:
+            ax.clear()
+        # tight_layout starts from the current margins, so start where a new figure would
+        fig.subplots_adjust(**margins)
+        return fig, axes
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(nrows, ncols, **kwargs)
+    margins = {key: getattr(fig.subplotpars, key) for key in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')}
+    _TEMPLATES[name] = (fig, axes, margins)
+    return fig, axes
+
+
+def _save(fig, path, profile):
+    fig.tight_layout()
+    fig.savefig(path, **PROFILES[profile])
+
+
+# ============================================
+# CHARTS
+# ============================================
+
+def patient_demographics(gender_counts, age_counts, blood_counts, city_counts):
+    fig, axes = _figure('patient_demographics', 2, 2, figsize=(14, 10))
+    fig.suptitle('Patient Demographics Analysis', fontsize=16, fontweight='bold')
+
+    axes[0, 0].pie(gender_counts, labels=gender_counts.index, autopct='%1.1f%%', colors=['#3498db', '#e74c3c', '#2ecc71'])
+    axes[0, 0].set_title('Gender Distribution')
+
+    axes[0, 1].bar(age_counts.index, age_counts.values, color='#3498db')
+    axes[0, 1].set_title('Age Group Distribution')
+    axes[0, 1].set_xlabel('Age Group')
+    axes[0, 1].set_ylabel('Count')
+
+    axes[1, 0].bar(blood_counts.index, blood_counts.values, color='#e74c3c')
+    axes[1, 0].set_title('Blood Group Distribution')
+    axes[1, 0].set_xlabel('Blood Group')
+    axes[1, 0].set_ylabel('Count')
+
+    axes[1, 1].barh(city_counts.index, city_counts.values, color='#2ecc71')
+    axes[1, 1].set_title('Patients by City')
+    axes[1, 1].set_xlabel('Count')
+
+    return fig
+
+
+def appointment_analysis(status_counts, type_counts, hour_counts, day_counts):
+    fig, axes = _figure('appointment_analysis', 2, 2, figsize=(14, 10))
+    fig.suptitle('Appointment Analysis', fontsize=16, fontweight='bold')
+
+    colors = {'Completed': '#2ecc71', 'Scheduled': '#3498db', 'Cancelled': '#e74c3c', 'No Show': '#f39c12'}
+    axes[0, 0].pie(status_counts, labels=status_counts.index, autopct='%1.1f%%',
+                   colors=[colors.get(s, '#95a5a6') for s in status_counts.index])
+    axes[0, 0].set_title('Appointment Status Distribution')
+
+    axes[0, 1].bar(type_counts.index, type_counts.values, color='#9b59b6')
+    axes[0, 1].set_title('Appointments by Type')
+    axes[0, 1].tick_params(axis='x', rotation=45)
+
+    axes[1, 0].plot(hour_counts.index, hour_counts.values, marker='o', linewidth=2, color='#3498db')
+    axes[1, 0].fill_between(hour_counts.index, hour_counts.values, alpha=0.3)
+    axes[1, 0].set_title('Appointments by Hour')
+    axes[1, 0].set_xlabel('Hour of Day')
+    axes[1, 0].set_ylabel('Count')
+
+    axes[1, 1].bar(day_counts.index, day_counts.values, color='#1abc9c')
+    axes[1, 1].set_title('Appointments by Day of Week')
+    axes[1, 1].tick_params(axis='x', rotation=45)
+
+    return fig
+
+
+def revenue_analysis(monthly_revenue, payment_status, method_sums, amount_hist):
+    fig, axes = _figure('revenue_analysis', 2, 2, figsize=(14, 10))
+    fig.suptitle('Revenue Analysis', fontsize=16, fontweight='bold')
+
+    axes[0, 0].plot(range(len(monthly_revenue)), monthly_revenue.values, marker='o', linewidth=2, color='#27ae60')
+    axes[0, 0].fill_between(range(len(monthly_revenue)), monthly_revenue.values, alpha=0.3, color='#27ae60')
+    axes[0, 0].set_title('Monthly Revenue Trend')
+    axes[0, 0].set_xlabel('Month')
+    axes[0, 0].set_ylabel('Revenue (INR)')
+    axes[0, 0].tick_params(axis='x', rotation=45)
+    step = max(1, len(monthly_revenue) // 12)
+    axes[0, 0].set_xticks(range(0, len(monthly_revenue), step))
+    axes[0, 0].set_xticklabels(monthly_revenue.index[::step])
+
+    colors_pay = {'Paid': '#27ae60', 'Pending': '#f39c12', 'Partial': '#3498db', 'Overdue': '#e74c3c'}
+    axes[0, 1].pie(payment_status, labels=payment_status.index, autopct='%1.1f%%',
+                   colors=[colors_pay.get(s, '#95a5a6') for s in payment_status.index])
+    axes[0, 1].set_title('Revenue by Payment Status')
+
+    axes[1, 0].bar(method_sums.index, method_sums.values, color='#8e44ad')
+    axes[1, 0].set_title('Revenue by Payment Method')
+    axes[1, 0].set_ylabel('Revenue (INR)')
+
+    _hist(axes[1, 1], amount_hist, color='#16a085', edgecolor='white')
+    axes[1, 1].set_title('Bill Amount Distribution')
+    axes[1, 1].set_xlabel('Bill Amount (INR)')
+    axes[1, 1].set_ylabel('Frequency')
+
+    return fig
+
+
+def doctor_performance(top_doctors, spec_counts):
+    fig, axes = _figure('doctor_performance', 1, 2, figsize=(14, 6))
+    fig.suptitle('Doctor Performance Analysis', fontsize=16, fontweight='bold')
+
+    axes[0].barh(top_doctors['doctor_name'], top_doctors['total_appointments'], color='#3498db')
+    axes[0].set_title('Top 10 Doctors by Appointments')
+    axes[0].set_xlabel('Total Appointments')
+
+    axes[1].barh(spec_counts.index, spec_counts.values, color='#e67e22')
+    axes[1].set_title('Appointments by Specialization')
+    axes[1].set_xlabel('Appointments')
+
+    return fig
+
+
+def bed_admission_analysis(bed_occ, adm_type, monthly_adm, los_hist, avg_los):
+    fig, axes = _figure('bed_admission_analysis', 2, 2, figsize=(14, 10))
+    fig.suptitle('Bed & Admission Analysis', fontsize=16, fontweight='bold')
+
+    axes[0, 0].bar(bed_occ.index, bed_occ.values, color='#e74c3c')
+    axes[0, 0].set_title('Bed Occupancy Rate by Type')
+    axes[0, 0].set_ylabel('Occupancy %')
+    axes[0, 0].axhline(y=80, color='red', linestyle='--', label='Target 80%')
+    axes[0, 0].legend()
+
+    axes[0, 1].pie(adm_type, labels=adm_type.index, autopct='%1.1f%%', colors=['#e74c3c', '#3498db', '#2ecc71'])
+    axes[0, 1].set_title('Admissions by Type')
+
+    axes[1, 0].plot(range(len(monthly_adm)), monthly_adm.values, marker='s', linewidth=2, color='#9b59b6')
+    axes[1, 0].set_title('Monthly Admission Trend')
+    axes[1, 0].set_xlabel('Month')
+    axes[1, 0].set_ylabel('Admissions')
+    step = max(1, len(monthly_adm) // 12)
+    axes[1, 0].set_xticks(range(0, len(monthly_adm), step))
+    axes[1, 0].set_xticklabels(monthly_adm.index[::step], rotation=45)
+
+    _hist(axes[1, 1], los_hist, color='#1abc9c', edgecolor='white')
+    axes[1, 1].set_title('Length of Stay Distribution')
+    axes[1, 1].set_xlabel('Days')
+    axes[1, 1].set_ylabel('Frequency')
+    axes[1, 1].axvline(x=avg_los, color='red', linestyle='--', label=f'Avg: {avg_los:.1f} days')
+    axes[1, 1].legend()
+
+    return fig
+
+
+def lab_analysis(cat_counts, test_counts):
+    fig, axes = _figure('lab_analysis', 1, 2, figsize=(14, 5))
+    fig.suptitle('Laboratory Analysis', fontsize=16, fontweight='bold')
+
+    axes[0].pie(cat_counts, labels=cat_counts.index, autopct='%1.1f%%')
+    axes[0].set_title('Tests by Category')
+
+    axes[1].barh(test_counts.index, test_counts.values, color='#16a085')
+    axes[1].set_title('Top 10 Lab Tests')
+    axes[1].set_xlabel('Count')
+
+    return fig
+
+
+def correlation_analysis(correlation_matrix):
+    import seaborn as sns
+    # The colorbar gets its own template axes, so a reused figure doesn't grow another one
+    fig, (ax, cbar_ax) = _figure('correlation_analysis', 1, 2, figsize=(8, 6), width_ratios=[20, 1])
+    sns.heatmap(correlation_matrix, annot=True, cmap='RdYlGn', center=0, fmt='.2f', ax=ax, cbar_ax=cbar_ax)
+    ax.set_title('Billing Amount Correlations')
+    return fig
+
+
+CHARTS = {
+    'patient_demographics': patient_demographics,
+    'appointment_analysis': appointment_analysis,
+    'revenue_analysis': revenue_analysis,
+    'doctor_performance': doctor_performance,
+    'bed_admission_analysis': bed_admission_analysis,
+    'lab_analysis': lab_analysis,
+    'correlation_analysis': correlation_analysis,
+}
+
+
+# ============================================
+# RENDERING
+# ============================================
+
+def input_hash(name, inputs, profile):
+    """Hash of a chart's inputs, its profile and this module's code: equal hashes render equal files."""
+    import matplotlib
+    digest = hashlib.sha256()
+    with open(__file__, 'rb') as f:
+        digest.update(f.read())
+    digest.update(f"{matplotlib.__version__}|{name}|{profile}".encode())
+    for key in sorted(inputs):
+        digest.update(key.encode())
+        _update(digest, inputs[key])
+    return digest.hexdigest()
+
+
+def _update(digest, value):
+    import pandas as pd
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        labels = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr((type(value).__name__, list(labels), list(value.index))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(str(value.dtype).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _update(digest, item)
+    else:
+        digest.update(repr(value).encode())
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, CHART_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(out_dir, manifest):
+    with open(os.path.join(out_dir, CHART_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def render(name, path, inputs, profile=PROFILE):
+    _save(CHARTS[name](**inputs), path, profile)
+    return path
+
+
+def render_charts(tasks, out_dir, workers=1, mp_context=None, profile=PROFILE, force=False):
+    """tasks: [(label, chart name, file name, inputs)]; prints each label as its file lands, in order.
+
+    A chart whose inputs hash the same as when its file was last rendered is skipped, unless force.
+    """
+    paths = [os.path.join(out_dir, filename) for _, _, filename, _ in tasks]
+    manifest = read_manifest(out_dir)
+    hashes = [input_hash(name, inputs, profile) for _, name, _, inputs in tasks]
+    stale = [force or manifest.get(filename) != key or not os.path.exists(path)
+             for (_, _, filename, _), key, path in zip(tasks, hashes, paths)]
+    pending = stale.count(True)
+
+    pool = None
+    if workers > 1 and pending > 1:
+        pool = ProcessPoolExecutor(max_workers=min(workers, pending), mp_context=mp_context, initializer=setup_style)
+    elif pending:
+        setup_style()
+    try:
+        futures = {i: pool.submit(render, name, paths[i], inputs, profile)
+                   for i, (_, name, _, inputs) in enumerate(tasks) if stale[i]} if pool else {}
+        for i, (label, name, filename, inputs) in enumerate(tasks):
+            if not stale[i]:
+                print(f"  [OK] {label} unchanged, skipped")
+                continue
+            if pool:
+                futures[i].result()
+            else:
+                render(name, paths[i], inputs, profile)
+            manifest[filename] = hashes[i]
+            print(f"  [OK] {label} saved")
+    finally:
+        if pool:
+            pool.shutdown()
+        if pending:
+            write_manifest(out_dir, manifest)
+    return paths
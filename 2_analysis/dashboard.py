@@ -0,0 +1,104 @@
+"""
+Interactive dashboard builder for hospital_analysis.py
+Run: pip install pandas plotly
+
+Each panel is drawn from one small pre-aggregated series ({panel: series},
+index on the x axis or as pie labels), never from the raw frames. The HTML
+loads plotly.js from a shared file next to it (plotly-<version>.min.js,
+written once per output directory) instead of embedding the 3-4 MB bundle
+in every page, so a set of daily or per-department dashboards shares one
+cached copy. Line panels with more than WEBGL_POINTS points switch to
+Scattergl. With fragments=True every panel is also written on its own as
+an HTML fragment (a <div> and its script, without plotly.js), for pages
+that already load the shared bundle.
+"""
+
+import os
+
+WEBGL_POINTS = 1000  # line panels with more points render with WebGL
+PANEL_HEIGHT = 300
+FRAGMENT_HEIGHT = 400
+
+# panel: (title, kind, trace name, colour); kind picks the trace and the subplot type
+PANELS = {
+    'monthly_revenue': ('Monthly Revenue Trend', 'line', 'Revenue', '#27ae60'),
+    'appointment_status': ('Appointment Status', 'pie', 'Status', None),
+    'age_groups': ('Patients by Age Group', 'bar', 'Age Group', '#3498db'),
+    'specializations': ('Top Specializations', 'barh', 'Specialization', '#e67e22'),
+    'payment_status': ('Payment Status', 'pie', 'Payment', None),
+    'daily_appointments': ('Daily Appointments', 'line', 'Daily', '#9b59b6'),
+}
+SUBPLOT_TYPES = {'line': 'xy', 'bar': 'xy', 'barh': 'xy', 'pie': 'domain'}
+
+
+def plotly_js(out_dir):
+    """File name of the shared plotly.js bundle in out_dir, writing it on first use."""
+    import plotly
+    from plotly.offline import get_plotlyjs
+    filename = f"plotly-{plotly.__version__}.min.js"
+    path = os.path.join(out_dir, filename)
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    return filename
+
+
+# ============================================
+# TRACES
+# ============================================
+
+def trace(panel, series, webgl_points=WEBGL_POINTS):
+    import plotly.graph_objects as go
+    _, kind, name, color = PANELS[panel]
+    labels, values = series.index.to_numpy(), series.to_numpy()
+    if kind == 'line':
+        scatter = go.Scattergl if len(series) > webgl_points else go.Scatter
+        return scatter(x=labels, y=values, mode='lines+markers', name=name, line=dict(color=color))
+    if kind == 'pie':
+        return go.Pie(labels=labels, values=values, name=name)
+    if kind == 'barh':
+        return go.Bar(x=values, y=labels, orientation='h', name=name, marker_color=color)
+    return go.Bar(x=labels, y=values, name=name, marker_color=color)
+
+
+def build_figure(panels, title, cols=2, webgl_points=WEBGL_POINTS):
+    """One figure with a subplot per panel, in the order given."""
+    from plotly.subplots import make_subplots
+    names = list(panels)
+    rows = -(-len(names) // cols)
+    specs = [[{'type': SUBPLOT_TYPES[PANELS[name][1]]} if name else None
+              for name in (names[r * cols:(r + 1) * cols] + [None] * cols)[:cols]] for r in range(rows)]
+    fig = make_subplots(rows=rows, cols=cols, specs=specs, subplot_titles=[PANELS[name][0] for name in names])
+    for i, name in enumerate(names):
+        fig.add_trace(trace(name, panels[name], webgl_points), row=i // cols + 1, col=i % cols + 1)
+    fig.update_layout(height=PANEL_HEIGHT * rows, title_text=title, showlegend=False)
+    return fig
+
+
+# ============================================
+# OUTPUT
+# ============================================
+
+def write_fragments(panels, directory, webgl_points=WEBGL_POINTS):
+    """Write each panel as an HTML fragment in directory; returns the paths."""
+    import plotly.graph_objects as go
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, series in panels.items():
+        fig = go.Figure(trace(name, series, webgl_points))
+        fig.update_layout(height=FRAGMENT_HEIGHT, title_text=PANELS[name][0], showlegend=False)
+        path = os.path.join(directory, f"{name}.html")
+        fig.write_html(path, full_html=False, include_plotlyjs=False, div_id=f"panel-{name}")
+        paths.append(path)
+    return paths
+
+
+def write_dashboard(panels, path, title, fragments=False, webgl_points=WEBGL_POINTS):
+    """Write the dashboard page (and, with fragments, one fragment per panel); returns the paths written."""
+    out_dir = os.path.dirname(path) or '.'
+    fig = build_figure(panels, title, webgl_points=webgl_points)
+    fig.write_html(path, include_plotlyjs=plotly_js(out_dir))
+    paths = [path]
+    if fragments:
+        paths += write_fragments(panels, os.path.splitext(path)[0] + '_panels', webgl_points)
+    return paths
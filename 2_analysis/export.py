@@ -0,0 +1,137 @@
+"""
+Sheet export for hospital_analysis.py
+Run: pip install pandas xlsxwriter pyarrow
+
+Writes a set of named sheets ({sheet: frame}) as one .xlsx workbook, or as
+one Parquet or CSV file per sheet in a directory named after the workbook
+(hospital_analysis_data.xlsx -> hospital_analysis_data/KPI_Summary.parquet).
+
+The workbook is written with xlsxwriter in constant_memory mode: each row
+is flushed to disk once written. Rows have to arrive in order, which rules
+out DataFrame.to_excel (it writes column by column). Instead each sheet is
+cut into chunks of CHUNK_ROWS rows, the chunks are converted to
+Excel-ready values on a thread pool, and they are written out in order as
+their conversions finish. At most `workers` chunks are converted ahead of
+the writer. Beyond the frames themselves, the export therefore holds a
+few chunks of boxed cell values, however large the samples get. Parquet
+and CSV files are independent, so they are written on the pool directly.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+EXPORT_FORMATS = {'xlsx': 'Excel', 'parquet': 'Parquet', 'csv': 'CSV'}  # format: label
+DATE_FORMAT = 'yyyy-mm-dd hh:mm:ss'  # what openpyxl wrote before, so the cells look the same
+CHUNK_ROWS = 10_000  # rows converted to cell values at a time
+
+
+def output_name(filename, fmt):
+    """The file (or directory, for parquet/csv) written for a workbook name."""
+    return filename if fmt == 'xlsx' else os.path.splitext(filename)[0] + os.sep
+
+
+# ============================================
+# CELL VALUES
+# ============================================
+
+def excel_column(series):
+    """A column as an object array xlsxwriter can write, with None for missing values."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if isinstance(series.dtype, pd.PeriodDtype):
+        values = series.astype(str).to_numpy(dtype=object)
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.tz_localize(None) if series.dt.tz is not None else series
+        values = values.dt.to_pydatetime()
+    elif pd.api.types.is_timedelta64_dtype(series):
+        # Fraction of a day, as Excel stores times
+        values = (series / pd.Timedelta(days=1)).to_numpy(dtype=object)
+    else:
+        values = series.to_numpy(dtype=object)
+    values = np.array(values, dtype=object)  # a copy: to_numpy() can hand back a read-only view
+    values[pd.isna(series).to_numpy()] = None
+    return values
+
+
+def excel_chunk(df, start, stop):
+    """Rows start:stop of a frame as a list of tuples of cell values."""
+    chunk = df.iloc[start:stop]
+    return list(zip(*(excel_column(chunk[name]) for name in chunk.columns)))
+
+
+# ============================================
+# WRITERS
+# ============================================
+
+def _bounded_map(pool, fn, tasks, in_flight):
+    """fn over tasks on the pool, results in task order, at most in_flight submitted ahead of the consumer."""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, *task))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def write_xlsx(sheets, path, workers, chunk_rows=CHUNK_ROWS):
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'default_date_format': DATE_FORMAT,
+                                          'remove_timezone': True})
+    try:
+        # constant_memory needs rows in order within a sheet, not across sheets
+        worksheets = {}
+        for sheet, df in sheets.items():
+            worksheets[sheet] = workbook.add_worksheet(sheet)
+            worksheets[sheet].write_row(0, 0, [str(name) for name in df.columns])
+        tasks = ((sheet, start) for sheet, df in sheets.items() for start in range(0, len(df), chunk_rows))
+
+        def convert(sheet, start):
+            return sheet, start, excel_chunk(sheets[sheet], start, start + chunk_rows)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for sheet, start, rows in _bounded_map(pool, convert, tasks, workers):
+                worksheet = worksheets[sheet]
+                for row_number, row in enumerate(rows, start + 1):
+                    worksheet.write_row(row_number, 0, row)
+    finally:
+        workbook.close()
+
+
+def _flat(df):
+    # Periods and categoricals as plain text, so downstream readers need no pandas extension types
+    df = df.copy()
+    for name in df.columns:
+        if isinstance(df[name].dtype, (pd.PeriodDtype, pd.CategoricalDtype)):
+            df[name] = df[name].astype(str).where(df[name].notna(), None)
+    return df
+
+
+def write_file(df, path, fmt):
+    if fmt == 'parquet':
+        _flat(df).to_parquet(path, index=False)
+    else:
+        _flat(df).to_csv(path, index=False)
+
+
+def write_sheets(sheets, path, fmt='xlsx', workers=4):
+    """Write {sheet: frame} to path as a workbook, or as one file per sheet. Returns what was written."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {', '.join(EXPORT_FORMATS)}")
+    workers = max(1, min(workers, len(sheets)))
+    target = output_name(path, fmt)
+    if fmt == 'xlsx':
+        write_xlsx(sheets, target, workers)
+        return target
+    os.makedirs(target, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(write_file, df, os.path.join(target, f"{sheet}.{fmt}"), fmt)
+                   for sheet, df in sheets.items()]
+        for future in futures:
+            future.result()
+    return target
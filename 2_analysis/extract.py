@@ -0,0 +1,188 @@
+"""
+Typed, column-pruned extraction for hospital_analysis.py
+Run: pip install pandas sqlalchemy pymysql
+
+COLUMNS declares, per table, only the columns the analysis reads and how
+each one is typed on load:
+  int       - downcast to the smallest integer dtype that fits (nullable ints stay float)
+  float     - DECIMAL columns, kept as float64 so revenue sums don't lose precision
+  date      - DATE / DATETIME, parsed by read_sql itself
+  time      - TIME, as timedelta64
+  enum      - MySQL ENUM, as a pandas category with the schema's value list
+  category  - low-cardinality VARCHAR, as a category of the values present
+
+Tables are independent, so map_tables() fetches them on a thread pool:
+the threads spend their time waiting on MySQL, and each one holds its own
+pooled connection, so extraction takes about as long as the slowest table.
+Transient connection errors are retried with exponential backoff.
+With a reporting window (see window.py) the fact tables are read with a
+date range in the WHERE clause, so only the window's rows are fetched.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from window import where, window_params
+
+ENUMS = {
+    ('patients', 'gender'): ['Male', 'Female', 'Other'],
+    ('patients', 'status'): ['Active', 'Inactive'],
+    ('appointments', 'appointment_type'): ['Consultation', 'Follow-up', 'Emergency', 'Routine Checkup'],
+    ('appointments', 'status'): ['Scheduled', 'Completed', 'Cancelled', 'No Show'],
+    ('billing', 'payment_status'): ['Pending', 'Partial', 'Paid', 'Overdue'],
+    ('billing', 'payment_method'): ['Cash', 'Card', 'Insurance', 'Online'],
+    ('admissions', 'admission_type'): ['Emergency', 'Planned', 'Transfer'],
+    ('admissions', 'status'): ['Admitted', 'Discharged', 'Transferred'],
+    ('beds', 'bed_type'): ['General', 'Semi-Private', 'Private', 'ICU', 'NICU'],
+    ('beds', 'status'): ['Available', 'Occupied', 'Maintenance'],
+    ('lab_tests', 'test_category'): ['Blood', 'Urine', 'Imaging', 'Cardiac', 'Other'],
+}
+
+COLUMNS = {
+    'patients': {
+        'patient_id': 'int',
+        'date_of_birth': 'date',
+        'gender': 'enum',
+        'blood_group': 'category',
+        'city': 'category',
+        'registration_date': 'date',
+        'status': 'enum',
+    },
+    'doctors': {
+        'doctor_id': 'int',
+        'first_name': 'str',
+        'last_name': 'str',
+        'specialization': 'category',
+        'consultation_fee': 'float',
+    },
+    'appointments': {
+        'appointment_id': 'int',
+        'patient_id': 'int',
+        'doctor_id': 'int',
+        'appointment_date': 'date',
+        'appointment_time': 'time',
+        'appointment_type': 'enum',
+        'status': 'enum',
+    },
+    'billing': {
+        'bill_id': 'int',
+        'patient_id': 'int',
+        'bill_date': 'date',
+        'subtotal': 'float',
+        'tax': 'float',
+        'discount': 'float',
+        'total_amount': 'float',
+        'payment_status': 'enum',
+        'payment_method': 'enum',
+    },
+    'admissions': {
+        'admission_id': 'int',
+        'admission_date': 'date',
+        'discharge_date': 'date',
+        'admission_type': 'enum',
+        'status': 'enum',
+    },
+    'beds': {
+        'bed_id': 'int',
+        'bed_type': 'enum',
+        'status': 'enum',
+    },
+    'lab_tests': {
+        'test_id': 'int',
+        'test_name': 'category',
+        'test_category': 'enum',
+        'test_date': 'date',
+    },
+}
+
+# Tables the analysis reads, in extraction order
+ANALYSIS_TABLES = list(COLUMNS)
+
+EXTRACT_WORKERS = 4
+RETRIES = 2
+RETRY_BACKOFF = 0.5  # seconds, doubled per attempt
+
+PRIMARY_KEYS = {
+    'patients': 'patient_id',
+    'doctors': 'doctor_id',
+    'appointments': 'appointment_id',
+    'billing': 'bill_id',
+    'admissions': 'admission_id',
+    'beds': 'bed_id',
+    'lab_tests': 'test_id',
+}
+
+
+def select_sql(table, columns=None):
+    columns = columns or list(COLUMNS[table])
+    return f"SELECT {', '.join(columns)} FROM {table}"
+
+
+def date_columns(table):
+    return [column for column, kind in COLUMNS[table].items() if kind == 'date']
+
+
+def apply_types(df, table):
+    """Convert a freshly read frame to the dtypes declared in COLUMNS, in place."""
+    for column, kind in COLUMNS[table].items():
+        if column not in df:
+            continue
+        if kind == 'int':
+            if not df[column].isna().any():
+                df[column] = pd.to_numeric(df[column], downcast='integer')
+        elif kind == 'float':
+            df[column] = df[column].astype('float64')
+        elif kind == 'date':
+            if not pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = pd.to_datetime(df[column])
+        elif kind == 'time':
+            df[column] = pd.to_timedelta(df[column])
+        elif kind == 'enum':
+            df[column] = pd.Categorical(df[column], categories=ENUMS[(table, column)])
+        elif kind == 'category':
+            df[column] = df[column].astype('category')
+    return df
+
+
+def load_table(engine, table, window=None):
+    df = pd.read_sql(text(where(select_sql(table), table, window)), engine, params=window_params(window),
+                     parse_dates=date_columns(table))
+    return apply_types(df, table)
+
+
+def _with_retry(fn, table, retries, backoff):
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            return fn(table), time.perf_counter() - started
+        except OperationalError as e:
+            if attempt == retries:
+                raise
+            print(f"  [WARN] {table}: {e.__class__.__name__}, retry {attempt + 1}/{retries}")
+            time.sleep(backoff * 2 ** attempt)
+
+
+def map_tables(fn, tables, workers=EXTRACT_WORKERS, retries=RETRIES, backoff=RETRY_BACKOFF):
+    """Run fn(table) for every table on a thread pool: {table: (result, seconds)} in input order."""
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tables)))) as pool:
+        futures = {table: pool.submit(_with_retry, fn, table, retries, backoff) for table in tables}
+        return {table: futures[table].result() for table in tables}
+
+
+def load_tables(engine, tables=None, workers=EXTRACT_WORKERS, retries=RETRIES, window=None):
+    results = map_tables(lambda table: load_table(engine, table, window), tables or ANALYSIS_TABLES,
+                         workers, retries)
+    frames = {}
+    for table, (df, elapsed) in results.items():
+        print(f"  [OK] {table}: {len(df):,} rows in {elapsed:.2f}s")
+        frames[table] = df
+    return frames
+
+
+def present(counts):
+    """Drop the zero rows value_counts() reports for unused categories."""
+    return counts[counts > 0]
@@ -0,0 +1,175 @@
+"""
+Vectorized feature engineering for hospital_analysis.py
+Run: pip install pandas numpy
+
+python features.py --check                 # compare with the row-wise versions on random data
+python features.py --check --rows 2000000
+
+Every derived column is built from whole-column operations: age bands by
+np.searchsorted over the band edges, the appointment hour straight from
+the TIME column's timedelta, day and month names from the date's integer
+fields, and per-group rates as the mean of a boolean mask. The row-wise
+code these replaced is kept in the CHECK section, and --check confirms
+both give the same values (and reports how long each took).
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+AGE_EDGES = [18, 31, 46, 61]  # first age of each band after the first
+AGE_ORDER = ['0-17', '18-30', '31-45', '46-60', '60+']
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+
+# ============================================
+# COLUMNS
+# ============================================
+
+def age_years(date_of_birth, now):
+    return ((now - date_of_birth).dt.days / 365.25).astype(int)
+
+
+def age_band(age):
+    """AGE_ORDER band of each age, as a categorical."""
+    codes = np.searchsorted(AGE_EDGES, np.asarray(age), side='right')
+    return pd.Categorical.from_codes(codes, categories=AGE_ORDER)
+
+
+def hour_of_day(times):
+    """Hour of a TIME column (timedelta64) without formatting it as text first."""
+    if not pd.api.types.is_timedelta64_dtype(times):
+        times = pd.to_timedelta(times)
+    return (times // pd.Timedelta(hours=1)) % 24
+
+
+def day_name(dates):
+    return pd.Categorical.from_codes(dates.dt.dayofweek, categories=DAY_ORDER)
+
+
+def month_name(dates):
+    return pd.Categorical.from_codes(dates.dt.month - 1, categories=MONTH_NAMES)
+
+
+def rate_by(flags, keys):
+    """Percentage of True flags per key: a boolean mean per group instead of an apply."""
+    return flags.groupby(keys, observed=True).mean() * 100
+
+
+# ============================================
+# TABLES
+# ============================================
+
+def prepare_patients(df, now):
+    df['age'] = age_years(df['date_of_birth'], now)
+    df['age_group'] = age_band(df['age'])
+    return df
+
+
+def prepare_admissions(df):
+    df['length_of_stay'] = (df['discharge_date'] - df['admission_date']).dt.days
+    return df
+
+
+def prepare_appointments(df):
+    df['year'] = df['appointment_date'].dt.year
+    df['month'] = df['appointment_date'].dt.month
+    df['month_name'] = month_name(df['appointment_date'])
+    df['day_name'] = day_name(df['appointment_date'])
+    df['hour'] = hour_of_day(df['appointment_time'])
+    return df
+
+
+def prepare_billing(df):
+    df['year_month'] = df['bill_date'].dt.to_period('M')
+    return df
+
+
+def bed_occupancy(beds):
+    return rate_by(beds['status'] == 'Occupied', beds['bed_type'])
+
+
+# ============================================
+# CHECK
+# ============================================
+# The row-wise originals, kept only to check the vectorized versions against
+
+def _age_group_rowwise(age):
+    if age < 18: return '0-17'
+    elif age < 31: return '18-30'
+    elif age < 46: return '31-45'
+    elif age < 61: return '46-60'
+    else: return '60+'
+
+
+def _sample_frames(rows, seed):
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp('2025-06-30')
+    dates = pd.Series(now - pd.to_timedelta(rng.integers(0, 3 * 365, rows), unit='D'))
+    times = pd.Series(pd.to_timedelta(rng.integers(8 * 60, 20 * 60, rows) // 15 * 15 * 60, unit='s'))
+    beds = pd.DataFrame({
+        'bed_type': pd.Categorical(rng.choice(['General', 'Semi-Private', 'Private', 'ICU', 'NICU'], rows)),
+        'status': pd.Categorical(rng.choice(['Available', 'Occupied', 'Maintenance'], rows, p=[0.3, 0.6, 0.1])),
+    })
+    ages = pd.Series(rng.integers(0, 95, rows))
+    return ages, dates, times, beds
+
+
+def _compare(label, reference, vectorized):
+    started = time.perf_counter()
+    expected = reference()
+    reference_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = vectorized()
+    vectorized_seconds = time.perf_counter() - started
+
+    expected = pd.Series(np.asarray(expected, dtype=object), index=getattr(expected, 'index', None))
+    actual = pd.Series(np.asarray(actual, dtype=object), index=getattr(actual, 'index', None))
+    same = expected.index.astype(object).equals(actual.index.astype(object)) and expected.equals(actual)
+    speedup = reference_seconds / vectorized_seconds if vectorized_seconds else float('inf')
+    print(f"  [{'OK' if same else 'FAIL'}] {label:<16} row-wise {reference_seconds:7.3f}s  "
+          f"vectorized {vectorized_seconds:7.3f}s  ({speedup:,.0f}x)")
+    return same
+
+
+def check(rows=200_000, seed=42):
+    """Vectorized features against the row-wise originals; True when every one matches."""
+    ages, dates, times, beds = _sample_frames(rows, seed)
+    print(f"[>] Checking vectorized features on {rows:,} random rows...")
+    results = [
+        _compare('age band', lambda: ages.apply(_age_group_rowwise), lambda: age_band(ages)),
+        _compare('hour of day', lambda: pd.to_timedelta(times.astype(str)).dt.components['hours'],
+                 lambda: hour_of_day(times)),
+        _compare('day name', lambda: dates.dt.day_name(), lambda: day_name(dates)),
+        _compare('month name', lambda: dates.dt.month_name(), lambda: month_name(dates)),
+        _compare('bed occupancy',
+                 lambda: beds.groupby('bed_type', observed=True).apply(
+                     lambda x: (x['status'] == 'Occupied').sum() / len(x) * 100),
+                 lambda: bed_occupancy(beds)),
+    ]
+    return all(results)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check the vectorized features against the row-wise originals")
+    parser.add_argument('--check', action='store_true', help="run the equivalence check")
+    parser.add_argument('--rows', type=int, default=200_000, help="random rows per check (default 200000)")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.check:
+        print("Nothing to do; pass --check")
+        sys.exit(0)
+    if check(args.rows, args.seed):
+        print("[OK] Vectorized features match the row-wise versions")
+        sys.exit(0)
+    print("[WARN] Vectorized features differ from the row-wise versions")
+    sys.exit(1)
@@ -1,18 +1,37 @@
 """
 Hospital Management System - Complete Analysis
-Run: pip install pandas numpy matplotlib seaborn plotly sqlalchemy pymysql openpyxl
+Run: pip install pandas numpy matplotlib seaborn plotly sqlalchemy pymysql xlsxwriter pyarrow
+
+python hospital_analysis.py                            # every section
+python hospital_analysis.py --sections kpi             # KPIs only, aggregated in MySQL
+python hospital_analysis.py --sections kpi,monthly     # from the daily rollups while they are current
+python hospital_analysis.py --sections kpi,revenue,excel --out reports
+python hospital_analysis.py --sections excel,monthly --export-format parquet
+python hospital_analysis.py --render-profile draft        # quick low-resolution charts for CI and previews
+python hospital_analysis.py --incremental              # rebuild only what changed since the last run
+python hospital_analysis.py --window 30d               # the last 30 days (also 12w, 3m, 1y, fy2025, fy2025q1)
+python hospital_analysis.py --since 2026-07-01 --until 2026-09-30 --out reports/q2
+python hospital_analysis.py --profile output/profile.json [--profile-memory] [--cprofile excel]
+
+Each section is a function of an Analysis context, which extracts only the
+tables the selected sections read and builds features and aggregates on
+first use. pandas, matplotlib, seaborn and plotly are imported by the
+sections that need them, so a KPI-only run never loads them. With
+--incremental the sections run as nodes of a dependency graph (GRAPH,
+pipeline.py) and only those whose input columns changed are rebuilt.
+A reporting window (window.py) is pushed into every fact-table query, so
+a 30-day report reads 30 days of rows rather than the whole history.
 """
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
-from sqlalchemy import create_engine
+import argparse
+import os
+import time
+from datetime import datetime
+from functools import cached_property
+from urllib.parse import quote_plus
 import warnings
+from profiler import Profiler, sqlalchemy_bytes_probe
+from registry import Aggregates
 warnings.filterwarnings('ignore')
 
 # ============================================
@@ -23,525 +42,773 @@ DB_USER = 'root'
 DB_PASSWORD = "Duckgoforit@09"  # UPDATE THIS
 DB_HOST = '127.0.0.1'
 DB_NAME = 'hospital_db'
+OUTPUT_DIR = 'output'
+SNAPSHOT_DIR = 'snapshot'  # local Parquet cache refreshed incrementally; None reads MySQL directly
+KPI_SOURCE = 'sql'  # 'sql' aggregates in MySQL, 'pandas' computes from the extracted frames
+KPI_CROSS_CHECK = False  # also compute the pandas KPIs and report any disagreement
+USE_ROLLUPS = True  # read the daily rollup tables (1_database/refresh_rollups.py) while they are current
+EXTRACT_WORKERS = 4  # tables fetched concurrently, one pooled connection each
+CHART_WORKERS = os.cpu_count() or 1  # processes rendering the PNG charts; 1 renders in-process
+RENDER_PROFILE = 'print'  # 'print' (300 dpi, for reports) or 'draft' (fast, for CI and previews)
+DASHBOARD_FRAGMENTS = False  # also write each dashboard panel as an HTML fragment
+STREAM_CHUNK_ROWS = None  # e.g. 200_000 folds appointments and billing chunk by chunk instead of loading them
+EXPORT_FORMAT = 'xlsx'  # 'parquet' or 'csv' writes one file per sheet instead of a workbook
+EXPORT_WORKERS = 4  # threads converting (xlsx) or writing (parquet/csv) sheets concurrently
+WINDOW = None  # e.g. '30d', '3m' or 'fy2025' reports on that period only; None covers the full history
+
+
+def make_engine():
+    from sqlalchemy import create_engine
+    encoded_password = quote_plus(DB_PASSWORD)
+    return create_engine(f'mysql+pymysql://{DB_USER}:{encoded_password}@{DB_HOST}/{DB_NAME}',
+                         pool_size=EXTRACT_WORKERS, max_overflow=2, pool_pre_ping=True, pool_recycle=3600)
 
-from urllib.parse import quote_plus
 
-# Create engine
-encoded_password = quote_plus(DB_PASSWORD)
-engine = create_engine(f'mysql+pymysql://{DB_USER}:{encoded_password}@{DB_HOST}/{DB_NAME}')
+# ============================================
+# ANALYSIS CONTEXT
+# ============================================
 
-# Style settings
-plt.style.use('seaborn-v0_8-whitegrid')
-plt.rcParams['figure.figsize'] = (12, 6)
-sns.set_palette("husl")
+class Analysis:
+    """Frames, features and aggregates shared by the sections, each built on first use."""
+
+    def __init__(self, engine, out_dir=OUTPUT_DIR, snapshot_dir=SNAPSHOT_DIR,
+                 stream_chunk_rows=STREAM_CHUNK_ROWS, chart_workers=CHART_WORKERS, render_profile=RENDER_PROFILE,
+                 force_render=False, dashboard_fragments=DASHBOARD_FRAGMENTS, kpi_source=KPI_SOURCE,
+                 use_rollups=USE_ROLLUPS, export_format=EXPORT_FORMAT, window=None, profiler=None):
+        self.engine = engine
+        self.out_dir = out_dir
+        self.snapshot_dir = snapshot_dir
+        self.stream_chunk_rows = stream_chunk_rows
+        self.chart_workers = chart_workers
+        self.render_profile = render_profile
+        self.force_render = force_render
+        self.dashboard_fragments = dashboard_fragments
+        self.kpi_source = kpi_source
+        self.use_rollups = use_rollups
+        self.export_format = export_format
+        self.window = window  # (since, until) dates, see window.py; None for the full history
+        self.profiler = profiler or Profiler()
+        self.now = datetime.now()
+        self.frames = {}
+        self.aggregates = Aggregates(self, AGGREGATES)
+
+    def path(self, filename):
+        return os.path.join(self.out_dir, filename)
+
+    def streamed(self, table):
+        from aggregates import STREAMED_TABLES
+        return bool(self.stream_chunk_rows) and table in STREAMED_TABLES
+
+    def extract(self, tables):
+        """Load the tables not yet in memory (streamed tables are folded later instead)."""
+        from extract import load_tables
+        from snapshot import SnapshotStore
+        from window import is_windowed
+
+        # Only the columns each analysis uses, typed on load (see extract.COLUMNS)
+        missing = [t for t in tables if t not in self.frames and not self.streamed(t)]
+        if not missing:
+            return self.frames
+        print("\n[>] Extracting data from database...")
+        started = time.perf_counter()
+        with self.profiler.stage('extract') as stage:
+            # A windowed fact table is read from MySQL with the range in its WHERE clause: the
+            # snapshot would verify and read back the whole table to keep a few days of it
+            direct = [t for t in missing if not self.snapshot_dir or is_windowed(t, self.window)]
+            cached = [t for t in missing if t not in direct]
+            frames = {}
+            if cached:
+                try:
+                    frames = SnapshotStore(self.engine, self.snapshot_dir).refresh(cached, workers=EXTRACT_WORKERS)
+                except ImportError as e:
+                    print(f"  [WARN] {e}; reading straight from MySQL")
+                    direct += cached
+            if direct:
+                frames.update(load_tables(self.engine, direct, workers=EXTRACT_WORKERS, window=self.window))
+            stage.add_rows(sum(len(df) for df in frames.values()))
+        self.frames.update(frames)
+        print(f"[OK] Data extraction complete! ({time.perf_counter() - started:.2f}s)")
+        return self.frames
+
+    def frame(self, table):
+        return self.extract([table])[table]
+
+    # ----- Shared aggregates -----
+    # Built once through the registry (see AGGREGATES below) and rebuilt only
+    # when a frame they read is replaced
+
+    def aggregate(self, name):
+        return self.aggregates.get(name)
+
+    @property
+    def patients(self):
+        return self.aggregates.get('patients')
+
+    @property
+    def admissions(self):
+        return self.aggregates.get('admissions')
+
+    @property
+    def appt(self):
+        return self.aggregates.get('appointment_summary')
+
+    @property
+    def bill(self):
+        return self.aggregates.get('billing_summary')
+
+    # Mergeable partials (see aggregates.py), folded chunk by chunk when streaming;
+    # both paths share the finalize step. 'Recent' counts back from the end of the window
+    def _partial(self, table):
+        from aggregates import eager_partial, stream_partial
+        from window import window_end
+        end = window_end(self.window, self.now)
+        if self.streamed(table):
+            return stream_partial(self.engine, table, self.stream_chunk_rows, end, self.window)
+        return eager_partial(self.frame(table), table, end)
+
+    @property
+    def period(self):
+        from window import window_label
+        return window_label(self.window) if self.window else None
+
+    def prepare(self, tables):
+        """Build the features and aggregates these tables feed, so their cost lands in one stage."""
+        with self.profiler.stage('features') as stage:
+            if 'patients' in tables:
+                stage.add_rows(len(self.patients))
+            if 'admissions' in tables:
+                stage.add_rows(len(self.admissions))
+            if 'appointments' in tables:
+                stage.add_rows(self.appt['rows'])
+            if 'billing' in tables:
+                stage.add_rows(self.bill['rows'])
+
+    @cached_property
+    def rollups_fresh(self):
+        from rollups import rollup_status
+        if not self.use_rollups or self.engine is None:
+            return False
+        fresh, reason = rollup_status(self.engine)
+        print(f"  [{'OK' if fresh else '>'}] {reason}{'' if fresh else '; aggregating the fact tables'}")
+        return fresh
+
+    @cached_property
+    def kpis(self):
+        from kpi import KPI_TABLES, compute_kpis
+
+        # Aggregated in MySQL (kpi.AGGREGATES); the pandas path is the fallback and cross-check
+        # (the pandas path needs every table in memory, so it is off while streaming)
+        def frames():
+            if self.stream_chunk_rows:
+                return None
+            return self.extract(KPI_TABLES)
+
+        print("\n[DATA] Calculating Key Performance Indicators...")
+        rollups = self.kpi_source == 'sql' and self.rollups_fresh
+        return compute_kpis(self.engine, frames, source=self.kpi_source, check=KPI_CROSS_CHECK, rollups=rollups,
+                            window=self.window)
 
-print("=" * 60)
-print("HOSPITAL MANAGEMENT SYSTEM - DATA ANALYSIS")
-print("=" * 60)
 
 # ============================================
-# DATA EXTRACTION
+# SHARED AGGREGATES
 # ============================================
+# name -> (tables read, builder); each is computed once per version of its
+# tables and shared by the charts, dashboard, Excel export and insights
 
-print("\n[>] Extracting data from database...")
+def _patient_features(ctx):
+    from features import prepare_patients
+    # Dates arrive parsed from extract.load_tables
+    return prepare_patients(ctx.frame('patients'), ctx.now)
 
-patients = pd.read_sql("SELECT * FROM patients", engine)
-doctors = pd.read_sql("SELECT * FROM doctors", engine)
-departments = pd.read_sql("SELECT * FROM departments", engine)
-appointments = pd.read_sql("SELECT * FROM appointments", engine)
-medical_records = pd.read_sql("SELECT * FROM medical_records", engine)
-billing = pd.read_sql("SELECT * FROM billing", engine)
-admissions = pd.read_sql("SELECT * FROM admissions", engine)
-beds = pd.read_sql("SELECT * FROM beds", engine)
-lab_tests = pd.read_sql("SELECT * FROM lab_tests", engine)
-insurance_claims = pd.read_sql("SELECT * FROM insurance_claims", engine)
 
-print("[OK] Data extraction complete!")
+def _admission_features(ctx):
+    from features import prepare_admissions
+    return prepare_admissions(ctx.frame('admissions'))
 
-# ============================================
-# DATA CLEANING & FEATURE ENGINEERING
-# ============================================
 
-print("\n[>] Cleaning and transforming data...")
+def _appointment_summary(ctx):
+    from aggregates import finalize_appointments
+    return finalize_appointments(ctx._partial('appointments'), ctx.frame('doctors'))
+
+
+def _billing_summary(ctx):
+    from aggregates import finalize_billing
+    return finalize_billing(ctx._partial('billing'))
+
+
+def _gender_counts(ctx):
+    from extract import present
+    return present(ctx.patients['gender'].value_counts())
+
 
-# Patients
-patients['date_of_birth'] = pd.to_datetime(patients['date_of_birth'])
-patients['registration_date'] = pd.to_datetime(patients['registration_date'])
-patients['age'] = ((datetime.now() - patients['date_of_birth']).dt.days / 365.25).astype(int)
+def _demographics(ctx):
+    return ctx.patients.groupby(['gender', 'age_group', 'city'], observed=True).size().reset_index(name='count')
 
-def age_group(age):
-    if age < 18: return '0-17'
-    elif age < 31: return '18-30'
-    elif age < 46: return '31-45'
-    elif age < 61: return '46-60'
-    else: return '60+'
 
-patients['age_group'] = patients['age'].apply(age_group)
+def _admission_type_counts(ctx):
+    from extract import present
+    return present(ctx.admissions['admission_type'].value_counts())
 
-# Appointments
-appointments['appointment_date'] = pd.to_datetime(appointments['appointment_date'])
-appointments['year'] = appointments['appointment_date'].dt.year
-appointments['month'] = appointments['appointment_date'].dt.month
-appointments['month_name'] = appointments['appointment_date'].dt.month_name()
-appointments['day_name'] = appointments['appointment_date'].dt.day_name()
-appointments['hour'] = pd.to_timedelta(appointments['appointment_time'].astype(str)).dt.components['hours']
 
-# Billing
-billing['bill_date'] = pd.to_datetime(billing['bill_date'])
-billing['year_month'] = billing['bill_date'].dt.to_period('M')
+def _monthly_admissions(ctx):
+    admissions = ctx.admissions
+    monthly_adm = admissions.groupby(admissions['admission_date'].dt.to_period('M')).size()
+    monthly_adm.index = monthly_adm.index.astype(str)
+    return monthly_adm
 
-# Admissions
-admissions['admission_date'] = pd.to_datetime(admissions['admission_date'])
-admissions['discharge_date'] = pd.to_datetime(admissions['discharge_date'])
-admissions['length_of_stay'] = (admissions['discharge_date'] - admissions['admission_date']).dt.days
 
-print("[OK] Data transformation complete!")
+def _bed_occupancy(ctx):
+    from features import bed_occupancy
+    return bed_occupancy(ctx.frame('beds'))
+
+
+def _los_hist(ctx):
+    from charts import histogram
+    admissions = ctx.admissions
+    discharged = admissions[admissions['status'] == 'Discharged']
+    return histogram(discharged['length_of_stay'].dropna(), bins=20)
+
+
+def _lab_category_counts(ctx):
+    from extract import present
+    return present(ctx.frame('lab_tests')['test_category'].value_counts())
+
+
+AGGREGATES = {
+    'patients': (['patients'], _patient_features),
+    'admissions': (['admissions'], _admission_features),
+    'appointment_summary': (['appointments', 'doctors'], _appointment_summary),
+    'billing_summary': (['billing'], _billing_summary),
+    'gender_counts': (['patients'], _gender_counts),
+    'age_counts': (['patients'], lambda ctx: ctx.patients['age_group'].value_counts(sort=False)),
+    'blood_counts': (['patients'], lambda ctx: ctx.patients['blood_group'].value_counts()),
+    'city_counts': (['patients'], lambda ctx: ctx.patients['city'].value_counts()),
+    'demographics': (['patients'], _demographics),
+    'admission_type_counts': (['admissions'], _admission_type_counts),
+    'monthly_admissions': (['admissions'], _monthly_admissions),
+    'bed_occupancy': (['beds'], _bed_occupancy),
+    'los_hist': (['admissions'], _los_hist),
+    'lab_category_counts': (['lab_tests'], _lab_category_counts),
+    'lab_test_counts': (['lab_tests'], lambda ctx: ctx.frame('lab_tests')['test_name'].value_counts()),
+}
+
 
 # ============================================
-# KEY METRICS CALCULATION
+# KEY METRICS
 # ============================================
 
-print("\n[DATA] Calculating Key Performance Indicators...")
-
-# Basic Counts
-total_patients = len(patients)
-total_doctors = len(doctors)
-total_appointments = len(appointments)
-total_revenue = billing['total_amount'].sum()
-
-# Appointment Metrics
-completed_appointments = len(appointments[appointments['status'] == 'Completed'])
-no_show_rate = len(appointments[appointments['status'] == 'No Show']) / len(appointments[appointments['appointment_date'] < datetime.now()]) * 100
-
-# Revenue Metrics
-avg_bill_value = billing['total_amount'].mean()
-collected_revenue = billing[billing['payment_status'] == 'Paid']['total_amount'].sum()
-outstanding_revenue = billing[billing['payment_status'].isin(['Pending', 'Partial', 'Overdue'])]['total_amount'].sum()
-collection_rate = (collected_revenue / total_revenue) * 100
-
-# Bed Occupancy
-total_beds = len(beds)
-occupied_beds = len(beds[beds['status'] == 'Occupied'])
-bed_occupancy_rate = (occupied_beds / total_beds) * 100
-
-# Average Length of Stay
-avg_los = admissions[admissions['status'] == 'Discharged']['length_of_stay'].mean()
-
-print("\n" + "=" * 60)
-print("[STATS] KEY PERFORMANCE INDICATORS")
-print("=" * 60)
-print(f"Total Patients:        {total_patients:,}")
-print(f"Total Doctors:         {total_doctors}")
-print(f"Total Appointments:    {total_appointments:,}")
-print(f"Completed Appointments:{completed_appointments:,}")
-print(f"No-Show Rate:          {no_show_rate:.2f}%")
-print(f"Total Revenue:         INR {total_revenue:,.2f}")
-print(f"Collected Revenue:     INR {collected_revenue:,.2f}")
-print(f"Outstanding:           INR {outstanding_revenue:,.2f}")
-print(f"Collection Rate:       {collection_rate:.2f}%")
-print(f"Avg Bill Value:        INR {avg_bill_value:,.2f}")
-print(f"Bed Occupancy Rate:    {bed_occupancy_rate:.2f}%")
-print(f"Avg Length of Stay:    {avg_los:.1f} days")
-print("=" * 60)
+def kpi_section(ctx):
+    kpis = ctx.kpis
+    print("\n" + "=" * 60)
+    print("[STATS] KEY PERFORMANCE INDICATORS")
+    print("=" * 60)
+    print(f"Total Patients:        {kpis['total_patients']:,}")
+    print(f"Total Doctors:         {kpis['total_doctors']}")
+    print(f"Total Appointments:    {kpis['total_appointments']:,}")
+    print(f"Completed Appointments:{kpis['completed_appointments']:,}")
+    print(f"No-Show Rate:          {kpis['no_show_rate']:.2f}%")
+    print(f"Total Revenue:         INR {kpis['total_revenue']:,.2f}")
+    print(f"Collected Revenue:     INR {kpis['collected_revenue']:,.2f}")
+    print(f"Outstanding:           INR {kpis['outstanding_revenue']:,.2f}")
+    print(f"Collection Rate:       {kpis['collection_rate']:.2f}%")
+    print(f"Avg Bill Value:        INR {kpis['avg_bill_value']:,.2f}")
+    print(f"Bed Occupancy Rate:    {kpis['bed_occupancy_rate']:.2f}%")
+    print(f"Avg Length of Stay:    {kpis['avg_los']:.1f} days")
+    print("=" * 60)
+
 
 # ============================================
 # VISUALIZATIONS
 # ============================================
+# Every chart is rendered from small pre-aggregated inputs (see charts.py),
+# so the render tasks can run on a process pool without pickling frames, and
+# a chart whose inputs hash the same as last time is not rendered again
+
+def demographics_chart(ctx):
+    return ('Patient Demographics', 'patient_demographics', '1_patient_demographics.png', {
+        'gender_counts': ctx.aggregate('gender_counts'),
+        'age_counts': ctx.aggregate('age_counts'),
+        'blood_counts': ctx.aggregate('blood_counts'),
+        'city_counts': ctx.aggregate('city_counts').head(8),
+    })
 
-print("\n[PLOT] Creating Visualizations...")
 
-# Create output directory
-import os
-os.makedirs('output', exist_ok=True)
-
-# ----- 1. Patient Demographics -----
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Patient Demographics Analysis', fontsize=16, fontweight='bold')
-
-# Gender Distribution
-gender_counts = patients['gender'].value_counts()
-axes[0, 0].pie(gender_counts, labels=gender_counts.index, autopct='%1.1f%%', colors=['#3498db', '#e74c3c', '#2ecc71'])
-axes[0, 0].set_title('Gender Distribution')
-
-# Age Group Distribution
-age_order = ['0-17', '18-30', '31-45', '46-60', '60+']
-age_counts = patients['age_group'].value_counts().reindex(age_order)
-axes[0, 1].bar(age_counts.index, age_counts.values, color='#3498db')
-axes[0, 1].set_title('Age Group Distribution')
-axes[0, 1].set_xlabel('Age Group')
-axes[0, 1].set_ylabel('Count')
-
-# Blood Group Distribution
-blood_counts = patients['blood_group'].value_counts()
-axes[1, 0].bar(blood_counts.index, blood_counts.values, color='#e74c3c')
-axes[1, 0].set_title('Blood Group Distribution')
-axes[1, 0].set_xlabel('Blood Group')
-axes[1, 0].set_ylabel('Count')
-
-# City Distribution
-city_counts = patients['city'].value_counts().head(8)
-axes[1, 1].barh(city_counts.index, city_counts.values, color='#2ecc71')
-axes[1, 1].set_title('Patients by City')
-axes[1, 1].set_xlabel('Count')
-
-plt.tight_layout()
-plt.savefig('output/1_patient_demographics.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("  [OK] Patient Demographics saved")
-
-# ----- 2. Appointment Analysis -----
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Appointment Analysis', fontsize=16, fontweight='bold')
-
-# Status Distribution
-status_counts = appointments['status'].value_counts()
-colors = {'Completed': '#2ecc71', 'Scheduled': '#3498db', 'Cancelled': '#e74c3c', 'No Show': '#f39c12'}
-axes[0, 0].pie(status_counts, labels=status_counts.index, autopct='%1.1f%%', 
-               colors=[colors.get(s, '#95a5a6') for s in status_counts.index])
-axes[0, 0].set_title('Appointment Status Distribution')
-
-# Appointments by Type
-type_counts = appointments['appointment_type'].value_counts()
-axes[0, 1].bar(type_counts.index, type_counts.values, color='#9b59b6')
-axes[0, 1].set_title('Appointments by Type')
-axes[0, 1].tick_params(axis='x', rotation=45)
-
-# Peak Hours
-hour_counts = appointments['hour'].value_counts().sort_index()
-axes[1, 0].plot(hour_counts.index, hour_counts.values, marker='o', linewidth=2, color='#3498db')
-axes[1, 0].fill_between(hour_counts.index, hour_counts.values, alpha=0.3)
-axes[1, 0].set_title('Appointments by Hour')
-axes[1, 0].set_xlabel('Hour of Day')
-axes[1, 0].set_ylabel('Count')
-
-# Day of Week
-day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-day_counts = appointments['day_name'].value_counts().reindex(day_order)
-axes[1, 1].bar(day_counts.index, day_counts.values, color='#1abc9c')
-axes[1, 1].set_title('Appointments by Day of Week')
-axes[1, 1].tick_params(axis='x', rotation=45)
-
-plt.tight_layout()
-plt.savefig('output/2_appointment_analysis.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("  [OK] Appointment Analysis saved")
-
-# ----- 3. Revenue Analysis -----
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Revenue Analysis', fontsize=16, fontweight='bold')
-
-# Monthly Revenue Trend
-monthly_revenue = billing.groupby(billing['bill_date'].dt.to_period('M'))['total_amount'].sum()
-monthly_revenue.index = monthly_revenue.index.astype(str)
-axes[0, 0].plot(range(len(monthly_revenue)), monthly_revenue.values, marker='o', linewidth=2, color='#27ae60')
-axes[0, 0].fill_between(range(len(monthly_revenue)), monthly_revenue.values, alpha=0.3, color='#27ae60')
-axes[0, 0].set_title('Monthly Revenue Trend')
-axes[0, 0].set_xlabel('Month')
-axes[0, 0].set_ylabel('Revenue (INR)')
-axes[0, 0].tick_params(axis='x', rotation=45)
-step = max(1, len(monthly_revenue) // 12)
-axes[0, 0].set_xticks(range(0, len(monthly_revenue), step))
-axes[0, 0].set_xticklabels(monthly_revenue.index[::step])
-
-# Payment Status
-payment_status = billing.groupby('payment_status')['total_amount'].sum()
-colors_pay = {'Paid': '#27ae60', 'Pending': '#f39c12', 'Partial': '#3498db', 'Overdue': '#e74c3c'}
-axes[0, 1].pie(payment_status, labels=payment_status.index, autopct='%1.1f%%',
-               colors=[colors_pay.get(s, '#95a5a6') for s in payment_status.index])
-axes[0, 1].set_title('Revenue by Payment Status')
-
-# Payment Method
-paid_bills = billing[billing['payment_status'] == 'Paid']
-method_counts = paid_bills.groupby('payment_method')['total_amount'].sum()
-axes[1, 0].bar(method_counts.index, method_counts.values, color='#8e44ad')
-axes[1, 0].set_title('Revenue by Payment Method')
-axes[1, 0].set_ylabel('Revenue (INR)')
-
-# Revenue Distribution
-axes[1, 1].hist(billing['total_amount'], bins=50, color='#16a085', edgecolor='white')
-axes[1, 1].set_title('Bill Amount Distribution')
-axes[1, 1].set_xlabel('Bill Amount (INR)')
-axes[1, 1].set_ylabel('Frequency')
-
-plt.tight_layout()
-plt.savefig('output/3_revenue_analysis.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("  [OK] Revenue Analysis saved")
-
-# ----- 4. Doctor Performance -----
-# Merge doctors with appointments
-doctor_stats = appointments.merge(doctors[['doctor_id', 'first_name', 'last_name', 'specialization', 'consultation_fee']], 
-                                   on='doctor_id')
-doctor_stats['doctor_name'] = doctor_stats['first_name'] + ' ' + doctor_stats['last_name']
-
-doctor_summary = doctor_stats.groupby(['doctor_id', 'doctor_name', 'specialization']).agg({
-    'appointment_id': 'count',
-    'status': lambda x: (x == 'Completed').sum()
-}).reset_index()
-doctor_summary.columns = ['doctor_id', 'doctor_name', 'specialization', 'total_appointments', 'completed']
-doctor_summary['completion_rate'] = (doctor_summary['completed'] / doctor_summary['total_appointments'] * 100).round(2)
-
-fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-fig.suptitle('Doctor Performance Analysis', fontsize=16, fontweight='bold')
-
-# Top 10 Doctors by Appointments
-top_doctors = doctor_summary.nlargest(10, 'total_appointments')
-axes[0].barh(top_doctors['doctor_name'], top_doctors['total_appointments'], color='#3498db')
-axes[0].set_title('Top 10 Doctors by Appointments')
-axes[0].set_xlabel('Total Appointments')
-
-# Appointments by Specialization
-spec_counts = doctor_stats.groupby('specialization')['appointment_id'].count().sort_values(ascending=True)
-axes[1].barh(spec_counts.index, spec_counts.values, color='#e67e22')
-axes[1].set_title('Appointments by Specialization')
-axes[1].set_xlabel('Appointments')
-
-plt.tight_layout()
-plt.savefig('output/4_doctor_performance.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("  [OK] Doctor Performance saved")
-
-# ----- 5. Bed & Admission Analysis -----
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Bed & Admission Analysis', fontsize=16, fontweight='bold')
-
-# Bed Occupancy by Type
-bed_occ = beds.groupby('bed_type').apply(lambda x: (x['status'] == 'Occupied').sum() / len(x) * 100)
-axes[0, 0].bar(bed_occ.index, bed_occ.values, color='#e74c3c')
-axes[0, 0].set_title('Bed Occupancy Rate by Type')
-axes[0, 0].set_ylabel('Occupancy %')
-axes[0, 0].axhline(y=80, color='red', linestyle='--', label='Target 80%')
-axes[0, 0].legend()
-
-# Admission Type
-adm_type = admissions['admission_type'].value_counts()
-axes[0, 1].pie(adm_type, labels=adm_type.index, autopct='%1.1f%%', colors=['#e74c3c', '#3498db', '#2ecc71'])
-axes[0, 1].set_title('Admissions by Type')
-
-# Monthly Admissions
-monthly_adm = admissions.groupby(admissions['admission_date'].dt.to_period('M')).size()
-monthly_adm.index = monthly_adm.index.astype(str)
-axes[1, 0].plot(range(len(monthly_adm)), monthly_adm.values, marker='s', linewidth=2, color='#9b59b6')
-axes[1, 0].set_title('Monthly Admission Trend')
-axes[1, 0].set_xlabel('Month')
-axes[1, 0].set_ylabel('Admissions')
-step = max(1, len(monthly_adm) // 12)
-axes[1, 0].set_xticks(range(0, len(monthly_adm), step))
-axes[1, 0].set_xticklabels(monthly_adm.index[::step], rotation=45)
-
-# Length of Stay Distribution
-discharged = admissions[admissions['status'] == 'Discharged']
-axes[1, 1].hist(discharged['length_of_stay'].dropna(), bins=20, color='#1abc9c', edgecolor='white')
-axes[1, 1].set_title('Length of Stay Distribution')
-axes[1, 1].set_xlabel('Days')
-axes[1, 1].set_ylabel('Frequency')
-axes[1, 1].axvline(x=avg_los, color='red', linestyle='--', label=f'Avg: {avg_los:.1f} days')
-axes[1, 1].legend()
-
-plt.tight_layout()
-plt.savefig('output/5_bed_admission_analysis.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("  [OK] Bed & Admission Analysis saved")
-
-# ----- 6. Lab Test Analysis -----
-fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-fig.suptitle('Laboratory Analysis', fontsize=16, fontweight='bold')
-
-# Tests by Category
-cat_counts = lab_tests['test_category'].value_counts()
-axes[0].pie(cat_counts, labels=cat_counts.index, autopct='%1.1f%%')
-axes[0].set_title('Tests by Category')
-
-# Most Common Tests
-test_counts = lab_tests['test_name'].value_counts().head(10)
-axes[1].barh(test_counts.index, test_counts.values, color='#16a085')
-axes[1].set_title('Top 10 Lab Tests')
-axes[1].set_xlabel('Count')
-
-plt.tight_layout()
-plt.savefig('output/6_lab_analysis.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("  [OK] Lab Analysis saved")
-
-# ----- 7. Interactive Dashboard (Plotly) -----
-print("\n[DATA] Creating Interactive Dashboard...")
-
-# KPI Cards Data
-kpi_data = {
-    'Metric': ['Total Patients', 'Total Revenue', 'Avg Bill Value', 'Bed Occupancy', 'No-Show Rate', 'Avg LOS'],
-    'Value': [f'{total_patients:,}', f'INR {total_revenue/100000:.1f}L', f'INR {avg_bill_value:,.0f}', 
-              f'{bed_occupancy_rate:.1f}%', f'{no_show_rate:.1f}%', f'{avg_los:.1f} days']
-}
+def appointments_chart(ctx):
+    return ('Appointment Analysis', 'appointment_analysis', '2_appointment_analysis.png',
+            {key: ctx.appt[key] for key in ('status_counts', 'type_counts', 'hour_counts', 'day_counts')})
+
+
+def revenue_chart(ctx):
+    return ('Revenue Analysis', 'revenue_analysis', '3_revenue_analysis.png',
+            {key: ctx.bill[key] for key in ('monthly_revenue', 'payment_status', 'method_sums', 'amount_hist')})
+
+
+def doctors_chart(ctx):
+    doctor_summary = ctx.appt['doctor_summary']
+    return ('Doctor Performance', 'doctor_performance', '4_doctor_performance.png', {
+        'top_doctors': doctor_summary.nlargest(10, 'total_appointments')[['doctor_name', 'total_appointments']],
+        'spec_counts': ctx.appt['spec_counts'].sort_values(ascending=True),
+    })
+
+
+def admissions_chart(ctx):
+    return ('Bed & Admission Analysis', 'bed_admission_analysis', '5_bed_admission_analysis.png', {
+        'bed_occ': ctx.aggregate('bed_occupancy'),
+        'adm_type': ctx.aggregate('admission_type_counts'),
+        'monthly_adm': ctx.aggregate('monthly_admissions'),
+        'los_hist': ctx.aggregate('los_hist'),
+        'avg_los': ctx.kpis['avg_los'],
+    })
+
+
+def lab_chart(ctx):
+    return ('Lab Analysis', 'lab_analysis', '6_lab_analysis.png', {
+        'cat_counts': ctx.aggregate('lab_category_counts'),
+        'test_counts': ctx.aggregate('lab_test_counts').head(10),
+    })
+
+
+def correlation_chart(ctx):
+    # From streamed co-moments, see aggregates.finalize_billing
+    return ('Correlation Analysis', 'correlation_analysis', '8_correlation_analysis.png',
+            {'correlation_matrix': ctx.bill['correlation']})
+
+
+def render_chart_sections(ctx, builders):
+    from charts import render_charts
+    print("\n[PLOT] Creating Visualizations...")
+    tasks = [build(ctx) for build in builders]
+    render_charts(tasks, ctx.out_dir, workers=ctx.chart_workers, profile=ctx.render_profile, force=ctx.force_render)
 
-# Create dashboard
-fig = make_subplots(
-    rows=3, cols=2,
-    subplot_titles=('Monthly Revenue Trend', 'Appointment Status', 
-                   'Patients by Age Group', 'Top Specializations',
-                   'Payment Status', 'Daily Appointments'),
-    specs=[[{"type": "scatter"}, {"type": "pie"}],
-           [{"type": "bar"}, {"type": "bar"}],
-           [{"type": "pie"}, {"type": "scatter"}]]
-)
-
-# 1. Monthly Revenue
-monthly_rev = billing.groupby(billing['bill_date'].dt.to_period('M'))['total_amount'].sum().reset_index()
-monthly_rev['bill_date'] = monthly_rev['bill_date'].astype(str)
-fig.add_trace(go.Scatter(x=monthly_rev['bill_date'], y=monthly_rev['total_amount'], 
-                         mode='lines+markers', name='Revenue', line=dict(color='#27ae60')), row=1, col=1)
-
-# 2. Appointment Status Pie
-status_counts = appointments['status'].value_counts()
-fig.add_trace(go.Pie(labels=status_counts.index, values=status_counts.values, name='Status'), row=1, col=2)
-
-# 3. Age Group Bar
-age_counts = patients['age_group'].value_counts().reindex(['0-17', '18-30', '31-45', '46-60', '60+'])
-fig.add_trace(go.Bar(x=age_counts.index, y=age_counts.values, name='Age Group', marker_color='#3498db'), row=2, col=1)
-
-# 4. Specialization Bar
-spec_counts = doctor_stats.groupby('specialization')['appointment_id'].count().nlargest(6)
-fig.add_trace(go.Bar(x=spec_counts.values, y=spec_counts.index, orientation='h', name='Specialization', 
-                     marker_color='#e67e22'), row=2, col=2)
-
-# 5. Payment Status Pie
-pay_status = billing.groupby('payment_status')['total_amount'].sum()
-fig.add_trace(go.Pie(labels=pay_status.index, values=pay_status.values, name='Payment'), row=3, col=1)
-
-# 6. Daily Appointments (Last 30 days)
-last_30 = appointments[appointments['appointment_date'] >= datetime.now() - timedelta(days=30)]
-daily_app = last_30.groupby('appointment_date').size().reset_index(name='count')
-fig.add_trace(go.Scatter(x=daily_app['appointment_date'], y=daily_app['count'], 
-                         mode='lines+markers', name='Daily', line=dict(color='#9b59b6')), row=3, col=2)
-
-fig.update_layout(height=900, title_text="Hospital Management Dashboard", showlegend=False)
-fig.write_html('output/7_interactive_dashboard.html')
-print("  [OK] Interactive Dashboard saved")
 
 # ============================================
-# EXPORT TO EXCEL
+# INTERACTIVE DASHBOARD
 # ============================================
 
-print("\n[FILE] Exporting data to Excel...")
+def dashboard_panels(ctx):
+    """{panel: pre-aggregated series} for dashboard.PANELS, in layout order."""
+    appt, bill = ctx.appt, ctx.bill
+    return {
+        'monthly_revenue': bill['monthly'].set_index('Month')['Total_Revenue'],
+        'appointment_status': appt['status_counts'],
+        'age_groups': ctx.aggregate('age_counts'),
+        'specializations': appt['spec_counts'].nlargest(6),
+        'payment_status': bill['payment_status'],
+        # Last 30 days
+        'daily_appointments': appt['daily_app'].set_index('appointment_date')['count'],
+    }
+
+
+def dashboard_section(ctx):
+    from dashboard import write_dashboard
 
-with pd.ExcelWriter('output/hospital_analysis_data.xlsx', engine='openpyxl') as writer:
-    # Summary Sheet
-    summary_df = pd.DataFrame({
+    print("\n[DATA] Creating Interactive Dashboard...")
+    # plotly.js is loaded from a shared file in the output folder, not embedded (see dashboard.py)
+    title = "Hospital Management Dashboard" + (f" ({ctx.period})" if ctx.period else "")
+    write_dashboard(dashboard_panels(ctx), ctx.path('7_interactive_dashboard.html'), title,
+                    fragments=ctx.dashboard_fragments)
+    print("  [OK] Interactive Dashboard saved")
+
+
+# ============================================
+# EXPORT TO EXCEL
+# ============================================
+
+def kpi_summary_sheet(ctx):
+    import pandas as pd
+    kpis = ctx.kpis
+    return pd.DataFrame({
         'Metric': ['Total Patients', 'Total Doctors', 'Total Appointments', 'Completed Appointments',
                   'No-Show Rate (%)', 'Total Revenue (INR)', 'Collected Revenue (INR)', 'Outstanding (INR)',
                   'Collection Rate (%)', 'Avg Bill Value (INR)', 'Bed Occupancy (%)', 'Avg Length of Stay (days)'],
-        'Value': [total_patients, total_doctors, total_appointments, completed_appointments,
-                 round(no_show_rate, 2), round(total_revenue, 2), round(collected_revenue, 2), 
-                 round(outstanding_revenue, 2), round(collection_rate, 2), round(avg_bill_value, 2),
-                 round(bed_occupancy_rate, 2), round(avg_los, 1)]
+        'Value': [kpis['total_patients'], kpis['total_doctors'], kpis['total_appointments'],
+                 kpis['completed_appointments'], round(kpis['no_show_rate'], 2), round(kpis['total_revenue'], 2),
+                 round(kpis['collected_revenue'], 2), round(kpis['outstanding_revenue'], 2),
+                 round(kpis['collection_rate'], 2), round(kpis['avg_bill_value'], 2),
+                 round(kpis['bed_occupancy_rate'], 2), round(kpis['avg_los'], 1)]
     })
-    summary_df.to_excel(writer, sheet_name='KPI_Summary', index=False)
-    
-    # Monthly Revenue
-    monthly_revenue_df = billing.groupby(billing['bill_date'].dt.to_period('M')).agg({
-        'bill_id': 'count',
-        'total_amount': ['sum', 'mean']
-    }).reset_index()
-    monthly_revenue_df.columns = ['Month', 'Bill_Count', 'Total_Revenue', 'Avg_Bill_Value']
-    monthly_revenue_df['Month'] = monthly_revenue_df['Month'].astype(str)
-    monthly_revenue_df.to_excel(writer, sheet_name='Monthly_Revenue', index=False)
-    
-    # Doctor Performance
-    doctor_summary.to_excel(writer, sheet_name='Doctor_Performance', index=False)
-    
-    # Appointment Analysis
-    app_by_status = appointments.groupby(['year', 'month', 'status']).size().reset_index(name='count')
-    app_by_status.to_excel(writer, sheet_name='Appointment_Status', index=False)
-    
-    # Patient Demographics
-    demo_df = patients.groupby(['gender', 'age_group', 'city']).size().reset_index(name='count')
-    demo_df.to_excel(writer, sheet_name='Patient_Demographics', index=False)
-    
+
+
+# sheet: builder, in workbook order
+EXCEL_SHEETS = {
+    'KPI_Summary': kpi_summary_sheet,
+    'Monthly_Revenue': lambda ctx: ctx.bill['monthly'],
+    'Doctor_Performance': lambda ctx: ctx.appt['doctor_summary'],
+    'Appointment_Status': lambda ctx: ctx.appt['app_by_status'],
+    'Patient_Demographics': lambda ctx: ctx.aggregate('demographics'),
     # Raw Data Samples
-    patients.head(1000).to_excel(writer, sheet_name='Patients_Sample', index=False)
-    appointments.head(1000).to_excel(writer, sheet_name='Appointments_Sample', index=False)
-    billing.head(1000).to_excel(writer, sheet_name='Billing_Sample', index=False)
+    'Patients_Sample': lambda ctx: ctx.patients.head(1000),
+    'Appointments_Sample': lambda ctx: ctx.appt['sample'],
+    'Billing_Sample': lambda ctx: ctx.bill['sample'],
+}
 
-print("  [OK] Excel file saved")
 
-# ============================================
-# STATISTICAL ANALYSIS
-# ============================================
+def excel_section(ctx, sheets=None):
+    from export import EXPORT_FORMATS, write_sheets
 
-print("\n[STATS] Statistical Analysis...")
+    label = EXPORT_FORMATS[ctx.export_format]
+    print(f"\n[FILE] Exporting data to {label}...")
+    if sheets is None:
+        sheets = {name: build(ctx) for name, build in EXCEL_SHEETS.items()}
+    # Streamed row by row (constant memory), sheets converted concurrently; see export.py
+    write_sheets(sheets, ctx.path('hospital_analysis_data.xlsx'), ctx.export_format, EXPORT_WORKERS)
 
-# Correlation Analysis
-numeric_billing = billing[['subtotal', 'tax', 'discount', 'total_amount']].copy()
-correlation_matrix = numeric_billing.corr()
+    print(f"  [OK] {label} {'file' if ctx.export_format == 'xlsx' else 'files'} saved")
 
-plt.figure(figsize=(8, 6))
-sns.heatmap(correlation_matrix, annot=True, cmap='RdYlGn', center=0, fmt='.2f')
-plt.title('Billing Amount Correlations')
-plt.tight_layout()
-plt.savefig('output/8_correlation_analysis.png', dpi=300, bbox_inches='tight')
-plt.close()
-print("  [OK] Correlation Analysis saved")
 
 # ============================================
 # INSIGHTS SUMMARY
 # ============================================
 
-print("\n" + "=" * 60)
-print("[INFO] KEY INSIGHTS & RECOMMENDATIONS")
-print("=" * 60)
+def insights_text(ctx):
+    kpis, appt, bill = ctx.kpis, ctx.appt, ctx.bill
+    age_counts, blood_counts, city_counts = (ctx.aggregate(name) for name in ('age_counts', 'blood_counts', 'city_counts'))
+    no_show_rate = kpis['no_show_rate']
+    collection_rate = kpis['collection_rate']
+    bed_occupancy_rate = kpis['bed_occupancy_rate']
 
-insights = f"""
+    return f"""
 1. PATIENT INSIGHTS:
-   - Total active patients: {len(patients[patients['status'] == 'Active']):,}
-   - Largest age group: {patients['age_group'].value_counts().idxmax()} ({patients['age_group'].value_counts().max():,} patients)
-   - Most common blood group: {patients['blood_group'].value_counts().idxmax()}
-   - Top city: {patients['city'].value_counts().idxmax()} ({patients['city'].value_counts().max():,} patients)
+   - Total active patients: {kpis['active_patients']:,}
+   - Largest age group: {age_counts.idxmax()} ({age_counts.max():,} patients)
+   - Most common blood group: {blood_counts.idxmax()}
+   - Top city: {city_counts.idxmax()} ({city_counts.max():,} patients)
 
 2. APPOINTMENT INSIGHTS:
-   - Completion rate: {(completed_appointments/len(appointments[appointments['appointment_date'] < datetime.now()])*100):.1f}%
+   - Completion rate: {kpis['completion_rate']:.1f}%
    - No-show rate: {no_show_rate:.1f}% (Target: <5%)
-   - Peak hours: {appointments['hour'].value_counts().head(3).index.tolist()}
-   - Busiest day: {appointments['day_name'].value_counts().idxmax()}
+   - Peak hours: {appt['peak_hours']}
+   - Busiest day: {appt['busiest_day']}
 
 3. REVENUE INSIGHTS:
    - Collection rate: {collection_rate:.1f}%
-   - Outstanding amount: INR {outstanding_revenue:,.2f}
-   - Average bill value: INR {avg_bill_value:,.2f}
-   - Top payment method: {paid_bills['payment_method'].value_counts().idxmax() if len(paid_bills) > 0 else 'N/A'}
+   - Outstanding amount: INR {kpis['outstanding_revenue']:,.2f}
+   - Average bill value: INR {kpis['avg_bill_value']:,.2f}
+   - Top payment method: {bill['top_method']}
 
 4. OPERATIONAL INSIGHTS:
    - Bed occupancy: {bed_occupancy_rate:.1f}%
-   - Average length of stay: {avg_los:.1f} days
-   - Current admissions: {len(admissions[admissions['status'] == 'Admitted'])}
+   - Average length of stay: {kpis['avg_los']:.1f} days
+   - Current admissions: {kpis['current_admissions']}
 
 5. RECOMMENDATIONS:
    - {"[!WARN!] High no-show rate! Implement reminder system." if no_show_rate > 5 else "[OK] No-show rate is acceptable."}
    - {"[!WARN!] Collection rate below 80%! Focus on payment follow-ups." if collection_rate < 80 else "[OK] Collection rate is healthy."}
    - {"[!WARN!] High bed occupancy! Consider capacity expansion." if bed_occupancy_rate > 85 else "[OK] Bed capacity is manageable."}
-   - Consider adding more doctors in {doctor_stats.groupby('specialization')['appointment_id'].count().idxmax()} department.
+   - Consider adding more doctors in {appt['spec_counts'].idxmax()} department.
 """
 
-print(insights)
-
-# Save insights to file
-with open('output/insights_report.txt', 'w') as f:
-    f.write("HOSPITAL MANAGEMENT SYSTEM - ANALYSIS REPORT\n")
-    f.write("=" * 60 + "\n")
-    f.write(f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    f.write("=" * 60 + "\n\n")
-    f.write(insights)
-
-print("\n" + "=" * 60)
-print("[OK] ANALYSIS COMPLETE!")
-print("=" * 60)
-print("\nOutput files created in 'output' folder:")
-print("  - 1_patient_demographics.png")
-print("  - 2_appointment_analysis.png")
-print("  - 3_revenue_analysis.png")
-print("  - 4_doctor_performance.png")
-print("  - 5_bed_admission_analysis.png")
-print("  - 6_lab_analysis.png")
-print("  - 7_interactive_dashboard.html")
-print("  - 8_correlation_analysis.png")
-print("  - hospital_analysis_data.xlsx")
-print("  - insights_report.txt")
-print("=" * 60)
+
+def insights_section(ctx):
+    insights = insights_text(ctx)
+
+    print("\n" + "=" * 60)
+    print("[INFO] KEY INSIGHTS & RECOMMENDATIONS")
+    print("=" * 60)
+
+    print(insights)
+
+    # Save insights to file
+    with open(ctx.path('insights_report.txt'), 'w') as f:
+        f.write("HOSPITAL MANAGEMENT SYSTEM - ANALYSIS REPORT\n")
+        f.write("=" * 60 + "\n")
+        f.write(f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        if ctx.period:
+            f.write(f"Period: {ctx.period}\n")
+        f.write("=" * 60 + "\n\n")
+        f.write(insights)
+
+
+# ============================================
+# MONTHLY REPORT
+# ============================================
+
+def monthly_section(ctx):
+    from export import write_sheets
+    from rollups import monthly_report
+
+    print("\n[DATA] Building monthly report...")
+    # Aggregated in MySQL: from the daily rollups when current, else GROUP BY over the fact tables
+    sheets = monthly_report(ctx.engine, ctx.rollups_fresh, ctx.window)
+    write_sheets(sheets, ctx.path('monthly_report.xlsx'), ctx.export_format, EXPORT_WORKERS)
+    print("  [OK] Monthly report saved")
+
+
+# ============================================
+# SECTIONS & CLI
+# ============================================
+
+# name: (function, tables it reads, files it writes); chart sections return a
+# render task and are rendered together, in this order, on the chart pool
+SECTIONS = {
+    'kpi': (kpi_section, [], []),
+    'monthly': (monthly_section, [], ['monthly_report.xlsx']),
+    'demographics': (demographics_chart, ['patients'], ['1_patient_demographics.png']),
+    'appointments': (appointments_chart, ['appointments', 'doctors'], ['2_appointment_analysis.png']),
+    'revenue': (revenue_chart, ['billing'], ['3_revenue_analysis.png']),
+    'doctors': (doctors_chart, ['appointments', 'doctors'], ['4_doctor_performance.png']),
+    'admissions': (admissions_chart, ['admissions', 'beds'], ['5_bed_admission_analysis.png']),
+    'lab': (lab_chart, ['lab_tests'], ['6_lab_analysis.png']),
+    'correlation': (correlation_chart, ['billing'], ['8_correlation_analysis.png']),
+    'dashboard': (dashboard_section, ['patients', 'appointments', 'doctors', 'billing'],
+                  ['7_interactive_dashboard.html']),
+    'excel': (excel_section, ['patients', 'appointments', 'doctors', 'billing'], ['hospital_analysis_data.xlsx']),
+    'insights': (insights_section, ['patients', 'appointments', 'doctors', 'billing'], ['insights_report.txt']),
+}
+CHART_SECTIONS = ['demographics', 'appointments', 'revenue', 'doctors', 'admissions', 'lab', 'correlation']
+
+
+# ============================================
+# DEPENDENCY GRAPH (--incremental)
+# ============================================
+# node: (kind, columns read as 'table.column', upstream nodes, build(ctx, {upstream: value}))
+# 'table.*' stands for every extracted column and 'today' for anything measured
+# against the run date. 'metric' values are kept between runs, 'value' nodes are
+# built in memory when an output needs them, and the 'chart' and 'output' nodes
+# are the sections of the same name. The monthly report is aggregated in MySQL;
+# its columns are the ones it groups, so the frames stand in for its tables.
+
+def _cols(table, *names):
+    return [f"{table}.{name}" for name in names]
+
+
+def _kpi_group(table):
+    def build(ctx, values):
+        from kpi import base_aggregates
+        engine = ctx.engine if ctx.kpi_source == 'sql' else None
+        rollups = engine is not None and ctx.rollups_fresh
+        return base_aggregates(table, engine, ctx.frames.get(table), ctx.now.date(), rollups, ctx.window)
+    return build
+
+
+def _derived_kpis(ctx, values):
+    from kpi import derive
+    base = {}
+    for group in values.values():
+        base.update(group)
+    # Replaces the cached property, so the sections read these instead of aggregating again
+    ctx.kpis = derive(base)
+    return ctx.kpis
+
+
+def _sheet(name):
+    return lambda ctx, values: EXCEL_SHEETS[name](ctx)
+
+
+def _section(name):
+    return lambda ctx, values: SECTIONS[name][0](ctx)
+
+
+def _excel(ctx, values):
+    return excel_section(ctx, {name.split(':', 1)[1]: sheet for name, sheet in values.items()})
+
+
+KPI_GROUPS = {
+    'kpi:patients': ('patients', _cols('patients', 'patient_id', 'status')),
+    'kpi:doctors': ('doctors', _cols('doctors', 'doctor_id')),
+    'kpi:appointments': ('appointments', _cols('appointments', 'appointment_id', 'appointment_date', 'status')
+                         + ['today']),
+    'kpi:billing': ('billing', _cols('billing', 'bill_id', 'total_amount', 'payment_status')),
+    'kpi:beds': ('beds', _cols('beds', 'bed_id', 'status')),
+    'kpi:admissions': ('admissions', _cols('admissions', 'admission_id', 'admission_date', 'discharge_date',
+                                           'status')),
+}
+DOCTOR_SUMMARY = _cols('appointments', 'doctor_id', 'status') + _cols('doctors', 'doctor_id', 'first_name',
+                                                                      'last_name', 'specialization')
+SHEET_INPUTS = {
+    'KPI_Summary': ([], ['kpis']),
+    'Monthly_Revenue': (_cols('billing', 'bill_date', 'total_amount'), []),
+    'Doctor_Performance': (DOCTOR_SUMMARY, []),
+    'Appointment_Status': (_cols('appointments', 'appointment_date', 'status'), []),
+    'Patient_Demographics': (_cols('patients', 'gender', 'date_of_birth', 'city') + ['today'], []),
+    'Patients_Sample': (['patients.*', 'today'], []),
+    'Appointments_Sample': (['appointments.*'], []),
+    'Billing_Sample': (['billing.*'], []),
+}
+SECTION_INPUTS = {
+    'kpi': ('output', [], ['kpis']),
+    'monthly': ('output', _cols('billing', 'bill_date', 'total_amount', 'payment_status')
+                + _cols('appointments', 'appointment_date', 'status')
+                + _cols('admissions', 'admission_date', 'discharge_date', 'admission_type', 'status')
+                + _cols('lab_tests', 'test_date', 'test_category'), []),
+    'demographics': ('chart', _cols('patients', 'gender', 'date_of_birth', 'blood_group', 'city') + ['today'], []),
+    'appointments': ('chart', _cols('appointments', 'status', 'appointment_type', 'appointment_time',
+                                    'appointment_date'), []),
+    'revenue': ('chart', _cols('billing', 'bill_date', 'total_amount', 'payment_status', 'payment_method'), []),
+    'doctors': ('chart', DOCTOR_SUMMARY, []),
+    # avg_los is one of the admission KPIs
+    'admissions': ('chart', _cols('beds', 'bed_type', 'status')
+                   + _cols('admissions', 'admission_type', 'admission_date', 'discharge_date', 'status'),
+                   ['kpi:admissions']),
+    'lab': ('chart', _cols('lab_tests', 'test_category', 'test_name'), []),
+    'correlation': ('chart', _cols('billing', 'subtotal', 'tax', 'discount', 'total_amount'), []),
+    'dashboard': ('output', _cols('billing', 'bill_date', 'total_amount', 'payment_status')
+                  + _cols('appointments', 'status', 'appointment_date') + DOCTOR_SUMMARY
+                  + _cols('patients', 'date_of_birth') + ['today'], []),
+    'excel': ('output', [], [f'sheet:{name}' for name in EXCEL_SHEETS]),
+    'insights': ('output', _cols('patients', 'date_of_birth', 'blood_group', 'city')
+                 + _cols('appointments', 'appointment_time', 'appointment_date') + DOCTOR_SUMMARY
+                 + _cols('billing', 'payment_method', 'payment_status') + ['today'], ['kpis']),
+}
+
+GRAPH = {
+    **{name: ('metric', columns, [], _kpi_group(table)) for name, (table, columns) in KPI_GROUPS.items()},
+    'kpis': ('value', [], list(KPI_GROUPS), _derived_kpis),
+    **{f'sheet:{name}': ('value', columns, upstream, _sheet(name)) for name, (columns, upstream) in SHEET_INPUTS.items()},
+    **{name: (kind, columns, upstream, _excel if name == 'excel' else _section(name))
+       for name, (kind, columns, upstream) in SECTION_INPUTS.items()},
+}
+
+
+def output_files(sections, export_format):
+    files = {name: SECTIONS[name][2] for name in sections}
+    if export_format != 'xlsx':
+        from export import output_name
+        files = {name: [output_name(f, export_format) if f.endswith('.xlsx') else f for f in paths]
+                 for name, paths in files.items()}
+    return files
+
+
+def parse_sections(value):
+    if value in (None, '', 'all'):
+        return list(SECTIONS)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown section(s) {', '.join(unknown)}; choose from {', '.join(SECTIONS)}")
+    return [name for name in SECTIONS if name in names]
+
+
+def run_graph(ctx, sections):
+    from pipeline import run_incremental
+    from charts import render_charts
+
+    if ctx.stream_chunk_rows:
+        raise ValueError("--incremental fingerprints the extracted frames; it can't be combined with streaming")
+    if ctx.kpi_source == 'sql':
+        ctx.rollups_fresh  # checked once, before the nodes run on their threads
+
+    def render(tasks):
+        print("\n[PLOT] Creating Visualizations...")
+        render_charts(tasks, ctx.out_dir, workers=ctx.chart_workers, profile=ctx.render_profile, force=True)
+
+    settings = {'render_profile': ctx.render_profile, 'export_format': ctx.export_format,
+                'kpi_source': ctx.kpi_source, 'dashboard_fragments': ctx.dashboard_fragments,
+                'window': ctx.period}
+    with ctx.profiler.stage('incremental'):
+        run_incremental(ctx, GRAPH, sections, output_files(sections, ctx.export_format), render,
+                        settings, always=['kpis'])
+
+
+def run(sections=None, out_dir=OUTPUT_DIR, engine=None, incremental=False, **options):
+    """Run the selected sections (all by default) and return the Analysis context.
+
+    incremental runs them through GRAPH, rebuilding only what changed since the last run.
+    """
+    if sections is None or isinstance(sections, str):
+        sections = parse_sections(sections)
+    ctx = Analysis(engine or make_engine(), out_dir=out_dir, **options)
+    os.makedirs(out_dir, exist_ok=True)
+
+    print("=" * 60)
+    print("HOSPITAL MANAGEMENT SYSTEM - DATA ANALYSIS")
+    if ctx.period:
+        print(f"Period: {ctx.period}")
+    print("=" * 60)
+
+    if incremental:
+        run_graph(ctx, sections)
+    pending = [] if incremental else sections
+
+    # Extract every table the selected sections read in one concurrent pass
+    tables = list(dict.fromkeys(table for name in pending for table in SECTIONS[name][1]))
+    if tables:
+        ctx.extract(tables)
+        ctx.prepare(tables)
+
+    charts = [SECTIONS[name][0] for name in pending if name in CHART_SECTIONS]
+    for name in pending:
+        if name in CHART_SECTIONS:
+            if charts:
+                with ctx.profiler.stage('charts'):
+                    render_chart_sections(ctx, charts)
+                charts = None
+            continue
+        with ctx.profiler.stage(name):
+            SECTIONS[name][0](ctx)
+
+    print("\n" + "=" * 60)
+    print("[OK] ANALYSIS COMPLETE!")
+    print("=" * 60)
+    outputs = [filename for paths in output_files(sections, ctx.export_format).values() for filename in paths]
+    if outputs:
+        print(f"\nOutput files created in '{out_dir}' folder:")
+        for filename in sorted(outputs):
+            print(f"  - {filename}")
+        print("=" * 60)
+    ctx.profiler.write()
+    return ctx
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hospital Management System - data analysis")
+    parser.add_argument('--sections', default='all',
+                        help=f"comma-separated sections to run (default all): {','.join(SECTIONS)}")
+    parser.add_argument('--out', default=OUTPUT_DIR, help=f"output directory (default {OUTPUT_DIR})")
+    parser.add_argument('--no-snapshot', action='store_true', help="read MySQL directly, bypassing the Parquet cache")
+    parser.add_argument('--no-rollups', action='store_true', help="aggregate the fact tables even when rollups are current")
+    parser.add_argument('--stream-chunk-rows', type=int, default=STREAM_CHUNK_ROWS,
+                        help="fold appointments and billing in chunks of this many rows")
+    parser.add_argument('--chart-workers', type=int, default=CHART_WORKERS,
+                        help=f"processes rendering the charts (default {CHART_WORKERS})")
+    parser.add_argument('--render-profile', choices=['print', 'draft'], default=RENDER_PROFILE,
+                        help=f"chart resolution and save options (default {RENDER_PROFILE})")
+    parser.add_argument('--force-render', action='store_true', help="re-render charts even when their inputs are unchanged")
+    parser.add_argument('--dashboard-fragments', action='store_true',
+                        help="also write each dashboard panel as an HTML fragment")
+    parser.add_argument('--export-format', choices=['xlsx', 'parquet', 'csv'], default=EXPORT_FORMAT,
+                        help=f"workbook, or one file per sheet (default {EXPORT_FORMAT})")
+    parser.add_argument('--since', metavar='YYYY-MM-DD', help="report from this date on (fact tables only)")
+    parser.add_argument('--until', metavar='YYYY-MM-DD', help="report up to and including this date")
+    parser.add_argument('--window', default=WINDOW,
+                        help="rolling window ending at --until or today (30d, 12w, 3m, 1y), or fy2025 / fy2025q1")
+    parser.add_argument('--incremental', action='store_true',
+                        help="rebuild only the outputs whose input columns changed since the last run")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write per-stage wall/CPU time, peak RSS, rows and MySQL bytes as JSON")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="with --profile, also record tracemalloc peaks (slower)")
+    parser.add_argument('--cprofile', metavar='STAGE',
+                        help="with --profile, dump cProfile stats for one stage (e.g. extract, charts, excel)")
+    args = parser.parse_args(argv)
+    try:
+        args.sections = parse_sections(args.sections)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.incremental and args.stream_chunk_rows:
+        parser.error("--incremental needs the tables in memory; drop --stream-chunk-rows")
+    from window import make_window
+    try:
+        args.window = make_window(args.since, args.until, args.window)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    engine = make_engine()
+    profiler = Profiler(enabled=bool(args.profile), trace_memory=args.profile_memory,
+                        cprofile_stage=args.cprofile, path=args.profile,
+                        bytes_probe=sqlalchemy_bytes_probe(engine) if args.profile else None)
+    return run(args.sections, out_dir=args.out, engine=engine, incremental=args.incremental,
+               snapshot_dir=None if args.no_snapshot else SNAPSHOT_DIR,
+               stream_chunk_rows=args.stream_chunk_rows, chart_workers=args.chart_workers,
+               render_profile=args.render_profile, force_render=args.force_render,
+               dashboard_fragments=args.dashboard_fragments,
+               use_rollups=USE_ROLLUPS and not args.no_rollups, export_format=args.export_format,
+               window=args.window, profiler=profiler)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+EXPLAIN-based index advisor for the analysis queries
+Run: pip install sqlalchemy pymysql
+
+python index_advisor.py                  # EXPLAIN every catalogued query, suggest indexes for the flagged ones
+python index_advisor.py --try            # also time each query before/after a temporary copy of its suggestion
+python index_advisor.py --apply          # create the suggestions and any missing baseline index
+
+The catalogue is built from the modules that issue the queries: the KPI
+push-down (kpi.compile_sql), the monthly report's fact-table fallback
+(rollups.monthly_sql), the snapshot probe, and the rollup refresh's day
+rebuild (1_database/refresh_rollups.py), and the fact-table extracts of a
+30-day reporting window (window.py). Full extracts are left out, since
+they read every row whatever the indexes.
+
+For each query it reports the access type, the index MySQL picked, the
+estimated rows, and whether it needs a full table scan, a filesort or a
+temporary table. Every flagged query gets a candidate index derived from
+its own SQL. The candidate's columns come in this order:
+  - the equality columns of its WHERE, then its range columns;
+  - the GROUP BY and ORDER BY columns (aliases resolved to the columns
+    they are computed from);
+  - the remaining selected columns, so the index covers the query.
+The covering tail is dropped past MAX_INDEX_COLUMNS. The primary key is
+left out, since InnoDB appends it to every secondary index.
+A candidate that a longer one already serves is folded into it, so one
+index is suggested for the queries of both. An existing
+index that starts with the WHERE columns in order, continues with the
+grouping columns in any order and holds the rest already serves a
+candidate. The query is then reported as having an index MySQL did not
+pick.
+With --try, each suggestion is created under a temporary name, its
+queries are timed before and after, and the index is dropped again.
+
+INDEXES, the composite indexes of schema.sql, is only the baseline: any
+of them missing from the live database is listed separately.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+# The composite indexes in schema.sql: name -> (table, columns)
+INDEXES = {
+    'idx_app_date': ('appointments', ['appointment_date', 'doctor_id', 'status', 'appointment_type']),
+    'idx_app_status': ('appointments', ['status', 'appointment_date']),
+    'idx_app_doctor_status': ('appointments', ['doctor_id', 'status']),
+    'idx_app_patient_date': ('appointments', ['patient_id', 'appointment_date']),
+    'idx_app_created': ('appointments', ['created_at']),
+    'idx_patient_reg': ('patients', ['registration_date']),
+    'idx_patient_status': ('patients', ['status']),
+    'idx_bill_date': ('billing', ['bill_date', 'payment_status', 'payment_method', 'total_amount']),
+    'idx_bill_status': ('billing', ['payment_status', 'total_amount']),
+    'idx_bill_patient_date': ('billing', ['patient_id', 'bill_date']),
+    'idx_adm_date': ('admissions', ['admission_date', 'admission_type', 'status', 'discharge_date']),
+    'idx_adm_status': ('admissions', ['status', 'admission_date', 'discharge_date']),
+    'idx_lab_date': ('lab_tests', ['test_date', 'test_category', 'test_name', 'cost']),
+    'idx_claim_bill': ('insurance_claims', ['bill_id', 'status']),
+}
+
+# Fact-table KPI SELECT -> the index that makes it an index-only scan
+KPI_INDEXES = {
+    'patients': 'idx_patient_status',
+    'appointments': 'idx_app_status',
+    'billing': 'idx_bill_status',
+    'admissions': 'idx_adm_status',
+}
+
+MONTHLY_INDEXES = {
+    'Revenue': 'idx_bill_date',
+    'Appointments': 'idx_app_date',
+    'Admissions': 'idx_adm_date',
+    'Lab_Tests': 'idx_lab_date',
+}
+
+# Fact-table extract with a --since/--until window -> the date index it range-scans
+WINDOW_INDEXES = {
+    'appointments': 'idx_app_date',
+    'billing': 'idx_bill_date',
+    'admissions': 'idx_adm_date',
+    'lab_tests': 'idx_lab_date',
+}
+
+ROLLUP_INDEXES = {
+    'rollup_appointments_daily': 'idx_app_date',
+    'rollup_revenue_daily': 'idx_bill_date',
+    'rollup_admissions_daily': 'idx_adm_date',
+    'rollup_lab_tests_daily': 'idx_lab_date',
+}
+
+REPEAT = 3
+MAX_INDEX_COLUMNS = 5  # longer candidates keep their seek and grouping columns only
+
+
+# ============================================
+# CATALOGUE
+# ============================================
+
+def catalogue(today=None):
+    """[(label, sql, params, index meant to serve it or None)] for the queries the analysis issues."""
+    from kpi import compile_sql
+    from rollups import MONTHLY, monthly_sql
+
+    today = today or date.today()
+    queries = []
+    for table, sql in compile_sql().items():
+        queries.append((f"kpi:{table}", sql, {'today': today}, KPI_INDEXES.get(table)))
+    for sheet in MONTHLY:
+        queries.append((f"monthly:{sheet}", monthly_sql(sheet, False), {}, MONTHLY_INDEXES[sheet]))
+    queries.append(("snapshot:probe appointments",
+                    "SELECT COUNT(*), COALESCE(MAX(appointment_id), 0), MAX(created_at) FROM appointments",
+                    {}, 'idx_app_created'))
+    try:
+        from extract import select_sql
+        from window import where, window_params
+        window = (today - timedelta(days=29), today)
+        for table, index in WINDOW_INDEXES.items():
+            queries.append((f"window:{table}", where(select_sql(table), table, window), window_params(window), index))
+    except ImportError as e:
+        print(f"  [WARN] window extract queries skipped ({e})")
+
+    try:
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, '1_database'))
+        from refresh_rollups import ROLLUPS, rollup_select
+    except ImportError as e:
+        print(f"  [WARN] rollup refresh queries skipped ({e})")
+        return queries
+    # One changed day, as a refresh rebuilds it
+    params = {'start': today, 'stop': today + timedelta(days=1), 'watermark': 2 ** 31 - 1}
+    for name, (_, pk, date_column, _, _) in ROLLUPS.items():
+        sql = rollup_select(name, f"{date_column} >= :start AND {date_column} < :stop AND {pk} <= :watermark")
+        queries.append((f"refresh:{name}", sql, params, ROLLUP_INDEXES[name]))
+    return queries
+
+
+# ============================================
+# CANDIDATE INDEXES
+# ============================================
+# The catalogued queries are single-table SELECTs built by this repo's own
+# modules, so their clauses can be split without a full SQL parser
+
+CLAUSES = re.compile(r"\b(SELECT|FROM|WHERE|GROUP BY|ORDER BY)\b", re.IGNORECASE)
+ALIAS = re.compile(r"^(.*)\s+AS\s+(\w+)$", re.IGNORECASE | re.DOTALL)
+RANGE = re.compile(r"[<>]|\bBETWEEN\b|\bLIKE\b", re.IGNORECASE)
+IDENTIFIER = re.compile(r"\b[A-Za-z_]\w*\b")
+
+
+def clauses(sql):
+    """{'SELECT': ..., 'FROM': ..., 'WHERE': ..., 'GROUP BY': ..., 'ORDER BY': ...} of a single-table SELECT."""
+    parts = CLAUSES.split(' '.join(sql.split()))
+    return {parts[i].upper(): parts[i + 1].strip() for i in range(1, len(parts) - 1, 2)}
+
+
+def table_of(sql):
+    return clauses(sql)['FROM'].split()[0]
+
+
+def split_list(clause):
+    """Top-level comma-separated items (commas inside parentheses stay)."""
+    items, depth, current = [], 0, ''
+    for ch in clause:
+        depth += (ch == '(') - (ch == ')')
+        if ch == ',' and depth == 0:
+            items.append(current)
+            current = ''
+        else:
+            current += ch
+    return [item.strip() for item in items + [current] if item.strip()]
+
+
+def columns_in(expr, known):
+    """The known columns an expression references, in order (string literals and :params skipped)."""
+    expr = re.sub(r"'[^']*'|:\w+", ' ', expr)
+    return list(dict.fromkeys(word for word in IDENTIFIER.findall(expr) if word in known))
+
+
+def candidate_index(sql, columns, primary=()):
+    """(table, columns, where, grouping) of an index serving a query: its first `where` columns are the
+    WHERE equality and range columns, the next `grouping` the GROUP BY / ORDER BY columns, and the
+    rest the other selected columns, which make it a covering index."""
+    parts = clauses(sql)
+    table = table_of(sql)
+    known = set(columns.get(table, ())) - set(primary)
+    aliases, selected = {}, []
+    for item in split_list(parts.get('SELECT', '')):
+        match = ALIAS.match(item)
+        refs = columns_in(match.group(1) if match else item, known)
+        if match:
+            aliases[match.group(2)] = refs
+        selected += refs
+    equality, ranges = [], []
+    for condition in re.split(r"\bAND\b", parts.get('WHERE', ''), flags=re.IGNORECASE):
+        refs = columns_in(condition, known)
+        if refs:
+            (ranges if RANGE.search(condition) else equality).append(refs[0])
+    grouping = []
+    for clause in ('GROUP BY', 'ORDER BY'):
+        for item in split_list(parts.get(clause, '')):
+            item = re.sub(r"\s+(ASC|DESC)$", '', item, flags=re.IGNORECASE)
+            grouping += aliases.get(item) or columns_in(item, known)
+    filtered = list(dict.fromkeys(equality + ranges))
+    seek = list(dict.fromkeys(filtered + grouping))[:MAX_INDEX_COLUMNS]
+    covering = list(dict.fromkeys(seek + selected))
+    where = min(len(filtered), len(seek))
+    return table, covering if len(covering) <= MAX_INDEX_COLUMNS else seek, where, len(seek) - where
+
+
+def merge_candidates(candidates):
+    """{(table, columns): [queries]} from [(table, columns, where, grouping, query)], each candidate
+    folded into a longer one that already serves it, so one index is suggested for both."""
+    merged = {}
+    for table, columns, where, grouping, query in sorted(candidates, key=lambda c: -len(c[1])):
+        longer = {table: {key: list(key[1]) for key in merged if key[0] == table}}
+        key = covering_index(longer, table, columns, where, grouping) or (table, tuple(columns))
+        merged.setdefault(key, []).append(query)
+    return merged
+
+
+def index_name(table, columns):
+    """The baseline name when INDEXES defines these columns, else one built from them."""
+    for name, (indexed_table, indexed_columns) in INDEXES.items():
+        if (indexed_table, indexed_columns) == (table, columns):
+            return name
+    return f"idx_{table}_{'_'.join(columns)}"[:64]
+
+
+# ============================================
+# EXPLAIN
+# ============================================
+
+def explain(conn, sql, params):
+    """EXPLAIN rows as dicts (traditional format, one row per table access)."""
+    return [dict(row) for row in conn.execute(text(f"EXPLAIN {sql}"), params).mappings().all()]
+
+
+def problems(plan):
+    found = []
+    for row in plan:
+        extra = row.get('Extra') or ''
+        if row.get('type') == 'ALL':
+            found.append(f"full scan of {row.get('table')}")
+        if 'Using filesort' in extra:
+            found.append('filesort')
+        if 'Using temporary' in extra:
+            found.append('temporary table')
+    return found
+
+
+def table_columns(conn):
+    """{table: [columns]} for the current database."""
+    rows = conn.execute(text("""
+        SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """)).fetchall()
+    columns = {}
+    for table, column in rows:
+        columns.setdefault(table, []).append(column)
+    return columns
+
+
+def existing_indexes(conn):
+    """{table: {index name: [columns, in order]}} for the current database."""
+    rows = conn.execute(text("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """)).fetchall()
+    indexes = {}
+    for table, index, column in rows:
+        indexes.setdefault(table, {}).setdefault(index, []).append(column)
+    return indexes
+
+
+def covering_index(indexes, table, columns, where=None, grouping=0):
+    """The name of an existing index serving a candidate, or None: it starts with the first `where`
+    columns in order (all of them by default), then the next `grouping` in any order, and holds the rest."""
+    where = len(columns) if where is None else where
+    seek = where + grouping
+    primary = indexes.get(table, {}).get('PRIMARY', [])
+    for name, existing in indexes.get(table, {}).items():
+        if (existing[:where] == columns[:where] and set(existing[where:seek]) == set(columns[where:seek])
+                and set(columns) <= set(existing) | set(primary)):
+            return name
+    return None
+
+
+def has_index(indexes, name):
+    return covering_index(indexes, *INDEXES[name]) is not None
+
+
+def time_query(conn, sql, params, repeat=REPEAT):
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        seconds.append(time.perf_counter() - started)
+    return statistics.median(seconds)
+
+
+def create_index_sql(table, columns, name, replace=False):
+    if replace:
+        # An older definition holds the name (e.g. the single-column idx_app_date)
+        return f"ALTER TABLE {table} DROP INDEX {name}, ADD INDEX {name} ({', '.join(columns)})"
+    return f"CREATE INDEX {name} ON {table}({', '.join(columns)})"
+
+
+def try_index(conn, table, columns, sql, params, repeat=REPEAT):
+    """(seconds without, seconds with, key MySQL picks) for a temporary index on table(columns)."""
+    temporary = f"advisor_{index_name(table, columns)}"[:64]
+    before = time_query(conn, sql, params, repeat)
+    conn.execute(text(create_index_sql(table, columns, temporary)))
+    try:
+        after = time_query(conn, sql, params, repeat)
+        key = ', '.join(str(row.get('key')) for row in explain(conn, sql, params))
+    finally:
+        conn.execute(text(f"DROP INDEX {temporary} ON {table}"))
+    return before, after, key
+
+
+# ============================================
+# REPORT
+# ============================================
+
+def advise(engine, try_suggestions=False, apply=False, repeat=REPEAT):
+    """Print every catalogued query's plan, the indexes derived from the flagged ones and the
+    missing baseline indexes; returns ({(table, columns): [query labels]}, [missing baseline names])."""
+    queries = catalogue()
+    candidates, unused = [], []
+    with engine.connect() as conn:
+        columns = table_columns(conn)
+        indexes = existing_indexes(conn)
+        print(f"{'query':<36} {'type':<7} {'key':<22} {'rows':>10}  issues")
+        for label, sql, params, _ in queries:
+            try:
+                plan = explain(conn, sql, params)
+            except SQLAlchemyError as e:
+                print(f"{label:<36} [WARN] EXPLAIN failed ({e.__class__.__name__})")
+                continue
+            first = plan[0] if plan else {}
+            issues = problems(plan)
+            print(f"{label:<36} {str(first.get('type')):<7} {str(first.get('key')):<22} "
+                  f"{first.get('rows') or 0:>10,}  {', '.join(issues) or '-'}")
+            if not issues:
+                continue
+            primary = indexes.get(table_of(sql), {}).get('PRIMARY', [])
+            table, candidate, where, grouping = candidate_index(sql, columns, primary)
+            existing = covering_index(indexes, table, candidate, where, grouping)
+            if not candidate:
+                unused.append(f"{label}: nothing to index (no filter, grouping or column list)")
+            elif existing:
+                unused.append(f"{label}: {existing} already serves ({', '.join(candidate)}) but MySQL did not pick it")
+            else:
+                candidates.append((table, candidate, where, grouping, (label, sql, params)))
+
+        suggestions = merge_candidates(candidates)
+        if suggestions:
+            print(f"\n[>] {len(suggestions)} index(es) derived from the flagged plans:")
+        else:
+            print("\n[OK] No flagged query would gain from a new index")
+        for (table, candidate), served in suggestions.items():
+            print(f"  {create_index_sql(table, list(candidate), index_name(table, list(candidate)))};"
+                  f"  -- {', '.join(label for label, _, _ in served)}")
+            if not try_suggestions:
+                continue
+            for label, sql, params in served:
+                before, after, key = try_index(conn, table, list(candidate), sql, params, repeat)
+                change = before / after if after else float('inf')
+                print(f"     {label:<34} {before:8.3f}s -> {after:8.3f}s ({change:.1f}x, key: {key})")
+        for note in unused:
+            print(f"  [WARN] {note}")
+
+        missing = [name for name in INDEXES if not has_index(indexes, name)]
+        if missing:
+            print(f"\n[>] Missing {len(missing)} baseline index(es) from schema.sql:")
+        else:
+            print("\n[OK] Every baseline index in INDEXES is present")
+        replace = {name: name in indexes.get(INDEXES[name][0], {}) for name in missing}
+        for name in missing:
+            print(f"  {create_index_sql(*INDEXES[name], name, replace=replace[name])};")
+
+        if apply:
+            for table, candidate in suggestions:
+                name = index_name(table, list(candidate))
+                if name in missing:
+                    continue  # created below with the baseline definition
+                conn.execute(text(create_index_sql(table, list(candidate), name)))
+                print(f"  [OK] created {name}")
+            for name in missing:
+                conn.execute(text(create_index_sql(*INDEXES[name], name, replace=replace[name])))
+                print(f"  [OK] {'rebuilt' if replace[name] else 'created'} {name}")
+    return suggestions, missing
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN the analysis queries and suggest indexes for them")
+    parser.add_argument('--try', dest='try_suggestions', action='store_true',
+                        help="time each flagged query before and after a temporary copy of its suggested index")
+    parser.add_argument('--apply', action='store_true',
+                        help="create the suggested indexes and any missing baseline index")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help=f"timed runs per query, median kept (default {REPEAT})")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    from hospital_analysis import make_engine
+    args = parse_args()
+    advise(make_engine(), args.try_suggestions, args.apply, args.repeat)
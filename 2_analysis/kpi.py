@@ -0,0 +1,275 @@
+"""
+KPI engine - compiles the headline metrics into aggregate SQL
+Run: pip install pandas sqlalchemy pymysql
+
+Each base aggregate is declared once with its SQL expression and the
+pandas expression it must agree with. compile_sql() groups them into one
+SELECT per table, so MySQL returns a single row of scalars per table
+instead of the rows themselves. Ratios are derived from those scalars.
+MySQL has no COUNT(*) FILTER (WHERE ...), so filtered counts are written
+as SUM(<condition>), which counts the rows where the condition is true.
+pandas is only needed by the frame path, so a SQL-only run never imports it.
+
+When the daily rollup tables are current (see rollups.py), the appointment,
+billing and admission aggregates read them instead, through ROLLUP_SQL, so
+the fact tables are not scanned at all. Current includes every status
+change, which the refresh folds in by day. With a reporting window (see
+window.py) every fact-table or rollup SELECT gets a bare-column date range
+in its WHERE clause, so it reads just the window through the date indexes.
+"""
+
+import math
+from datetime import datetime, time
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from window import where, window_params
+
+# name: (table, kind, SQL aggregate, pandas equivalent over (frame, today))
+AGGREGATES = {
+    'total_patients': ('patients', 'count', "COUNT(*)",
+                       lambda df, today: len(df)),
+    'active_patients': ('patients', 'count', "SUM(status = 'Active')",
+                        lambda df, today: (df['status'] == 'Active').sum()),
+    'total_doctors': ('doctors', 'count', "COUNT(*)",
+                      lambda df, today: len(df)),
+    'total_appointments': ('appointments', 'count', "COUNT(*)",
+                           lambda df, today: len(df)),
+    'completed_appointments': ('appointments', 'count', "SUM(status = 'Completed')",
+                               lambda df, today: (df['status'] == 'Completed').sum()),
+    'no_show_appointments': ('appointments', 'count', "SUM(status = 'No Show')",
+                             lambda df, today: (df['status'] == 'No Show').sum()),
+    # appointment_date < datetime.now() in the frame is every date up to and including today
+    'past_appointments': ('appointments', 'count', "SUM(appointment_date <= :today)",
+                          lambda df, today: (df['appointment_date'] <= datetime.combine(today, time())).sum()),
+    'total_revenue': ('billing', 'amount', "SUM(total_amount)",
+                      lambda df, today: df['total_amount'].sum()),
+    'avg_bill_value': ('billing', 'amount', "AVG(total_amount)",
+                       lambda df, today: df['total_amount'].mean()),
+    'collected_revenue': ('billing', 'amount',
+                          "SUM(CASE WHEN payment_status = 'Paid' THEN total_amount ELSE 0 END)",
+                          lambda df, today: df.loc[df['payment_status'] == 'Paid', 'total_amount'].sum()),
+    'outstanding_revenue': ('billing', 'amount',
+                            "SUM(CASE WHEN payment_status IN ('Pending', 'Partial', 'Overdue') "
+                            "THEN total_amount ELSE 0 END)",
+                            lambda df, today: df.loc[df['payment_status'].isin(['Pending', 'Partial', 'Overdue']),
+                                                     'total_amount'].sum()),
+    'total_beds': ('beds', 'count', "COUNT(*)",
+                   lambda df, today: len(df)),
+    'occupied_beds': ('beds', 'count', "SUM(status = 'Occupied')",
+                      lambda df, today: (df['status'] == 'Occupied').sum()),
+    # TIMESTAMPDIFF(DAY, ...) counts whole days like Timedelta.days; DATEDIFF would drop the time part
+    'avg_los': ('admissions', 'amount',
+                "AVG(CASE WHEN status = 'Discharged' THEN TIMESTAMPDIFF(DAY, admission_date, discharge_date) END)",
+                lambda df, today: (df.loc[df['status'] == 'Discharged', 'discharge_date']
+                                   - df.loc[df['status'] == 'Discharged', 'admission_date']).dt.days.mean()),
+    'current_admissions': ('admissions', 'count', "SUM(status = 'Admitted')",
+                           lambda df, today: (df['status'] == 'Admitted').sum()),
+}
+
+# name: (rollup table, SQL aggregate over it) for the aggregates the daily rollups can answer
+ROLLUP_SQL = {
+    'total_appointments': ('rollup_appointments_daily', "SUM(appointments)"),
+    'completed_appointments': ('rollup_appointments_daily',
+                               "SUM(CASE WHEN status = 'Completed' THEN appointments ELSE 0 END)"),
+    'no_show_appointments': ('rollup_appointments_daily',
+                             "SUM(CASE WHEN status = 'No Show' THEN appointments ELSE 0 END)"),
+    'past_appointments': ('rollup_appointments_daily', "SUM(CASE WHEN day <= :today THEN appointments ELSE 0 END)"),
+    'total_revenue': ('rollup_revenue_daily', "SUM(total_amount)"),
+    'avg_bill_value': ('rollup_revenue_daily', "SUM(total_amount) / SUM(bills)"),
+    'collected_revenue': ('rollup_revenue_daily',
+                          "SUM(CASE WHEN payment_status = 'Paid' THEN total_amount ELSE 0 END)"),
+    'outstanding_revenue': ('rollup_revenue_daily',
+                            "SUM(CASE WHEN payment_status IN ('Pending', 'Partial', 'Overdue') "
+                            "THEN total_amount ELSE 0 END)"),
+    'avg_los': ('rollup_admissions_daily',
+                "SUM(CASE WHEN status = 'Discharged' THEN los_days END) "
+                "/ SUM(CASE WHEN status = 'Discharged' THEN stays END)"),
+    'current_admissions': ('rollup_admissions_daily', "SUM(CASE WHEN status = 'Admitted' THEN admissions ELSE 0 END)"),
+}
+
+# Means don't combine across databases, so a mergeable partial carries their parts:
+# name: (SQL sum, SQL count of the same non-NULL values)
+_LOS = "CASE WHEN status = 'Discharged' THEN TIMESTAMPDIFF(DAY, admission_date, discharge_date) END"
+MEAN_PARTS = {
+    'avg_bill_value': ("SUM(total_amount)", "COUNT(total_amount)"),
+    'avg_los': (f"SUM({_LOS})", f"COUNT({_LOS})"),
+}
+
+# Tables the pandas path reads
+KPI_TABLES = list(dict.fromkeys(table for table, *_ in AGGREGATES.values()))
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator * 100 if denominator else float('nan')
+
+
+DERIVED = {
+    'no_show_rate': lambda k: _ratio(k['no_show_appointments'], k['past_appointments']),
+    'completion_rate': lambda k: _ratio(k['completed_appointments'], k['past_appointments']),
+    'collection_rate': lambda k: _ratio(k['collected_revenue'], k['total_revenue']),
+    'bed_occupancy_rate': lambda k: _ratio(k['occupied_beds'], k['total_beds']),
+}
+
+
+def _coerce(name, value):
+    kind = AGGREGATES[name][1]
+    if value is None:
+        return 0 if kind == 'count' else float('nan')
+    return int(value) if kind == 'count' else float(value)
+
+
+def compile_sql(names=None, rollups=False, window=None):
+    """One aggregate SELECT per table (or rollup table): {table: sql}; run with window_params(window)."""
+    by_table = {}
+    for name in names or AGGREGATES:
+        table, _, expr, _ = AGGREGATES[name]
+        if rollups and name in ROLLUP_SQL:
+            table, expr = ROLLUP_SQL[name]
+        by_table.setdefault(table, []).append(f"{expr} AS {name}")
+    return {table: where(f"SELECT {', '.join(exprs)} FROM {table}", table, window)
+            for table, exprs in by_table.items()}
+
+
+def derive(base):
+    kpis = dict(base)
+    for name, fn in DERIVED.items():
+        kpis[name] = fn(kpis)
+    return kpis
+
+
+def _sql_base(engine, names, today, rollups, window):
+    base = {}
+    params = {'today': today, **window_params(window)}
+    with engine.connect() as conn:
+        for table, sql in compile_sql(names, rollups=rollups, window=window).items():
+            row = conn.execute(text(sql), params).mappings().one()
+            base.update((name, _coerce(name, value)) for name, value in row.items())
+    return base
+
+
+def kpis_from_sql(engine, today=None, rollups=False, window=None):
+    return derive(_sql_base(engine, None, today or datetime.now().date(), rollups, window))
+
+
+def kpis_from_frames(frames, today=None):
+    today = today or datetime.now().date()
+    base = {name: _coerce(name, fn(frames[table], today))
+            for name, (table, _, _, fn) in AGGREGATES.items()}
+    return derive(base)
+
+
+def base_aggregates(table, engine=None, frame=None, today=None, rollups=False, window=None):
+    """The base aggregates of one table, before derive(): from MySQL when an engine is given, else the frame.
+
+    Lets a caller recompute the KPIs of the tables that changed and reuse the rest (see pipeline.py).
+    """
+    today = today or datetime.now().date()
+    names = [name for name, spec in AGGREGATES.items() if spec[0] == table]
+    if engine is not None:
+        try:
+            return _sql_base(engine, names, today, rollups, window)
+        except SQLAlchemyError as e:
+            if frame is None:
+                raise
+            print(f"  [WARN] KPI push-down for {table} failed ({e.__class__.__name__}); computing in pandas")
+    return {name: _coerce(name, AGGREGATES[name][3](frame, today)) for name in names}
+
+
+def _missing(value):
+    return isinstance(value, float) and math.isnan(value)
+
+
+# ============================================
+# MERGEABLE PARTIALS
+# ============================================
+# One database's base aggregates as sums and counts, so several databases
+# (see network.py) add up to the same KPIs one database holding every row would give
+
+def partial_sql(window=None):
+    """compile_sql() over the fact tables with every mean split into name__sum and name__count."""
+    by_table = {}
+    for name, (table, _, expr, _) in AGGREGATES.items():
+        if name in MEAN_PARTS:
+            total, count = MEAN_PARTS[name]
+            exprs = [f"{total} AS {name}__sum", f"{count} AS {name}__count"]
+        else:
+            exprs = [f"{expr} AS {name}"]
+        by_table.setdefault(table, []).extend(exprs)
+    return {table: where(f"SELECT {', '.join(exprs)} FROM {table}", table, window)
+            for table, exprs in by_table.items()}
+
+
+def kpi_partial(conn, today=None, window=None):
+    """{column: value} for partial_sql(); counts as int, sums as float."""
+    params = {'today': today or datetime.now().date(), **window_params(window)}
+    partial = {}
+    for sql in partial_sql(window).values():
+        for column, value in conn.execute(text(sql), params).mappings().one().items():
+            name, _, part = column.partition('__')
+            if part:
+                partial[column] = int(value or 0) if part == 'count' else float(value or 0)
+            else:
+                # An empty table adds nothing to a sum, rather than the NaN a lone KPI would show
+                partial[column] = _coerce(name, 0 if value is None else value)
+    return partial
+
+
+def kpis_from_partials(partials):
+    """KPIs from any number of kpi_partial() results: every part added up, then the means and ratios."""
+    total = {}
+    for partial in partials:
+        for column, value in partial.items():
+            total[column] = total.get(column, 0) + value
+    base = {}
+    for name in AGGREGATES:
+        if name in MEAN_PARTS:
+            count = total[f"{name}__count"]
+            base[name] = total[f"{name}__sum"] / count if count else float('nan')
+        else:
+            base[name] = total[name]
+    return derive(base)
+
+
+def cross_check(left, right, rtol=1e-6):
+    """Names whose values disagree between two KPI dicts."""
+    mismatches = []
+    for name in left:
+        a, b = left[name], right.get(name)
+        if _missing(a) and _missing(b):
+            continue
+        if b is None or abs(a - b) > rtol * max(abs(a), abs(b), 1):
+            mismatches.append((name, a, b))
+    return mismatches
+
+
+def compute_kpis(engine, frames=None, source='sql', check=False, rollups=False, window=None):
+    """KPIs from MySQL aggregates, falling back to (and optionally checked against) the frames.
+
+    frames may be a zero-argument callable, so the tables are only extracted when needed.
+    rollups reads the daily rollup tables where ROLLUP_SQL covers an aggregate.
+    window limits the fact tables to a date range; the frames must have been extracted with it.
+    """
+    kpis = None
+    if source == 'sql':
+        try:
+            kpis = kpis_from_sql(engine, rollups=rollups, window=window)
+        except SQLAlchemyError as e:
+            print(f"  [WARN] KPI push-down failed ({e.__class__.__name__}); computing in pandas")
+    if kpis is not None and not check:
+        return kpis
+
+    frames = frames() if callable(frames) else frames
+    if kpis is None:
+        if frames is None:
+            raise ValueError("pandas KPI fallback needs the extracted frames")
+        return kpis_from_frames(frames)
+
+    if frames is not None:
+        mismatches = cross_check(kpis, kpis_from_frames(frames))
+        for name, sql_value, pandas_value in mismatches:
+            print(f"  [WARN] KPI {name}: SQL={sql_value} pandas={pandas_value}")
+        if not mismatches:
+            print("  [OK] SQL KPIs match the pandas path")
+    return kpis
@@ -0,0 +1,212 @@
+"""
+Incremental runner for hospital_analysis.py (--incremental)
+Run: pip install pandas
+
+The KPIs, sheets and sections are declared as the nodes of a graph (see
+GRAPH in hospital_analysis.py), each with the table columns it reads and
+the nodes it is built from. Each run fingerprints those columns in the
+extracted frames and gives every node a key: a hash of its column
+fingerprints, the keys of its upstream nodes, the output settings and the
+analysis code. An output whose key matches the last run, and whose files
+are still there, is left alone; the rest are rebuilt together with the
+values they need. KPI groups are stored with their keys, so only the
+tables that changed are aggregated again. Keys and stored values live in
+.pipeline_state.json in the output folder.
+
+Independent nodes run side by side: values level by level on a thread
+pool, then every stale output at once, the charts as one batch on the
+chart pool. A night that only adds billing rows rebuilds the billing KPIs
+and what reads billing (revenue and correlation charts, the workbook, the
+dashboard, the insights and the monthly report); the patient, appointment,
+doctor, admission and lab charts are kept.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+STATE_FILE = '.pipeline_state.json'
+WORKERS = 4  # threads running independent nodes
+VALUE_KINDS = ('metric', 'value')  # 'metric' values are stored between runs
+
+
+def code_version(directory=os.path.dirname(os.path.abspath(__file__))):
+    """Hash of the analysis modules, so a code change rebuilds everything."""
+    digest = hashlib.sha1()
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.py'):
+            with open(os.path.join(directory, filename), 'rb') as f:
+                digest.update(filename.encode() + f.read())
+    return digest.hexdigest()
+
+
+def column_fingerprint(series):
+    digest = hashlib.sha1(str(series.dtype).encode())
+    digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """Runs the stale outputs of graph ({node: (kind, columns, upstream, build)}) for an Analysis context."""
+
+    def __init__(self, ctx, graph, files, settings=None, always=(), workers=WORKERS):
+        self.ctx = ctx
+        self.graph = graph
+        self.files = files  # output node -> paths it writes
+        self.settings = dict(settings or {}, code=code_version())
+        self.always = list(always)  # values computed whenever anything runs
+        self.workers = workers
+        self.path = ctx.path(STATE_FILE)
+        self.state = self.read_state()
+        self.fingerprints = {}
+        self.keys = {}
+        self.values = {}
+
+    def read_state(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'keys': {}, 'metrics': {}}
+
+    def write_state(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+
+    # ----- Graph -----
+
+    def closure(self, names):
+        """The nodes, with everything upstream of them, in dependency order."""
+        order = []
+
+        def visit(name):
+            if name not in order:
+                for upstream in self.graph[name][2]:
+                    visit(upstream)
+                order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def tables(self, names):
+        """Tables whose columns these nodes (and their upstream nodes) read."""
+        return list(dict.fromkeys(column.split('.')[0] for name in self.closure(names)
+                                  for column in self.graph[name][1] if '.' in column))
+
+    def levels(self, names):
+        """names grouped so every node comes after all of its upstream nodes."""
+        depth = {}
+        for name in self.closure(names):
+            depth[name] = 1 + max((depth[u] for u in self.graph[name][2]), default=-1)
+        grouped = {}
+        for name in names:
+            grouped.setdefault(depth[name], []).append(name)
+        return [grouped[d] for d in sorted(grouped)]
+
+    # ----- Keys -----
+
+    def fingerprint(self, column):
+        if column not in self.fingerprints:
+            if column == 'today':
+                value = self.ctx.now.date().isoformat()
+            else:
+                table, name = column.split('.')
+                df = self.ctx.frames[table]
+                value = '|'.join(column_fingerprint(df[c]) for c in (df.columns if name == '*' else [name]))
+            self.fingerprints[column] = value
+        return self.fingerprints[column]
+
+    def key(self, name):
+        if name not in self.keys:
+            kind, columns, upstream, _ = self.graph[name]
+            parts = [name, kind, json.dumps(self.settings, sort_keys=True)]
+            parts += [f"{column}={self.fingerprint(column)}" for column in sorted(columns)]
+            parts += [f"{u}={self.key(u)}" for u in sorted(upstream)]
+            self.keys[name] = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+        return self.keys[name]
+
+    def plan(self, targets):
+        """(outputs to rebuild, outputs unchanged since the last run)."""
+        stale, fresh = [], []
+        for name in targets:
+            missing = any(not os.path.exists(self.ctx.path(f)) for f in self.files.get(name, []))
+            if not self.files.get(name) or missing or self.state['keys'].get(name) != self.key(name):
+                stale.append(name)
+            else:
+                fresh.append(name)
+        return stale, fresh
+
+    # ----- Run -----
+
+    def _stored(self, name):
+        if self.graph[name][0] == 'metric' and self.state['keys'].get(name) == self.key(name):
+            return self.state['metrics'].get(name)
+        return None
+
+    def _build(self, name):
+        _, _, upstream, build = self.graph[name]
+        return build(self.ctx, {u: self.values[u] for u in upstream})
+
+    def _compute_values(self, names, pool):
+        needed, reused = [], []
+        for name in self.closure(names):
+            if self.graph[name][0] not in VALUE_KINDS:
+                continue
+            stored = self._stored(name)
+            if stored is not None:
+                self.values[name] = stored
+                reused.append(name)
+            else:
+                needed.append(name)
+        for level in self.levels(needed):
+            futures = {name: pool.submit(self._build, name) for name in level}
+            for name, future in futures.items():
+                self.values[name] = future.result()
+                if self.graph[name][0] == 'metric':
+                    self.state['keys'][name] = self.key(name)
+                    self.state['metrics'][name] = self.values[name]
+        return needed, reused
+
+    def run(self, targets, render):
+        """Rebuild the stale targets; render(tasks) draws the chart nodes. Returns (rebuilt, unchanged)."""
+        stale, fresh = self.plan(targets)
+        if not stale:
+            return stale, fresh
+        upstream = [u for name in stale for u in self.graph[name][2]]
+        charts = [name for name in stale if self.graph[name][0] == 'chart']
+        # Keys are recorded as nodes finish, so a failure only rebuilds what did not
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                computed, reused = self._compute_values(self.always + upstream, pool)
+                print(f"  [OK] {len(computed)} values computed, {len(reused)} reused"
+                      + (f" ({', '.join(reused)})" if reused else ""))
+                futures = {name: pool.submit(self._build, name) for name in stale if name not in charts}
+                if charts:
+                    render([self._build(name) for name in charts])
+                    self.state['keys'].update((name, self.key(name)) for name in charts)
+                for name, future in futures.items():
+                    future.result()
+                    self.state['keys'][name] = self.key(name)
+        finally:
+            self.write_state()
+        return stale, fresh
+
+
+def run_incremental(ctx, graph, targets, files, render, settings=None, always=(), workers=WORKERS):
+    """Extract what the targets read, then run the stale ones; prints what was rebuilt and what was kept."""
+    pipeline = Pipeline(ctx, graph, files, settings, always, workers)
+    tables = pipeline.tables(targets + list(always))
+    if tables:
+        ctx.extract(tables)
+        ctx.prepare(tables)
+    print("\n[>] Checking what changed since the last run...")
+    started = time.perf_counter()
+    stale, fresh = pipeline.run(targets, render)
+    print(f"\n[OK] Incremental run ({time.perf_counter() - started:.2f}s): "
+          f"rebuilt {', '.join(stale) or 'nothing'}; unchanged {', '.join(fresh) or 'nothing'}")
+    return stale, fresh
@@ -0,0 +1,225 @@
+"""
+Per-stage timing and memory instrumentation
+Used by hospital_analysis.py (--profile) and data_generator.py (--profile)
+
+    profiler = Profiler(enabled=True, bytes_probe=sqlalchemy_bytes_probe(engine))
+    with profiler.stage('extract') as stage:
+        frames = load_tables(engine)
+        stage.add_rows(sum(len(df) for df in frames.values()))
+    profiler.write('profile.json')
+
+Each stage records wall and CPU seconds, the process's peak RSS when it
+ended, the CPU seconds of child processes that exited during the stage and
+the largest peak RSS among all children so far, the tracemalloc peak inside the stage (with trace_memory, which
+slows Python allocation noticeably), rows processed and the bytes MySQL
+sent or received during the stage. Byte counts come from the server's
+GLOBAL STATUS counters, so other clients running at the same time inflate
+them. One stage can also be run under cProfile and dumped for pstats or
+snakeviz.
+
+cpu_seconds and peak_rss_bytes cover the profiled process only. Worker
+processes are counted in the children_* figures once they have exited
+and been waited for. A pool that lives inside one stage (the chart pool)
+is charged to that stage. A pool shared by several stages (the
+generator's partition workers) shows up in the run's 'children' totals
+written with the report. When disabled, stage() hands back one shared no-op object, so
+the instrumented code pays a method call per stage and nothing else.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_rows(self, n):
+        pass
+
+
+NULL_STAGE = _NullStage()
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None where it can't be read."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def child_usage():
+    """(CPU seconds, peak RSS bytes) of the child processes that have exited and been waited for, or (None, None)."""
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    peak = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return usage.ru_utime + usage.ru_stime, peak
+
+
+def sqlalchemy_bytes_probe(engine, variable='Bytes_sent'):
+    """Bytes the MySQL server has sent to clients (the analysis fetching rows)."""
+    from sqlalchemy import text
+
+    def probe():
+        with engine.connect() as conn:
+            row = conn.execute(text(f"SHOW GLOBAL STATUS LIKE '{variable}'")).fetchone()
+        return int(row[1])
+    return probe
+
+
+def cursor_bytes_probe(cursor, variable='Bytes_received'):
+    """Bytes the MySQL server has received from clients (the generator inserting rows)."""
+    def probe():
+        cursor.execute(f"SHOW GLOBAL STATUS LIKE '{variable}'")
+        return int(cursor.fetchone()[1])
+    return probe
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.rows = None
+        self.child_peak = 0
+
+    def add_rows(self, n):
+        self.rows = (self.rows or 0) + int(n)
+
+    def __enter__(self):
+        profiler = self.profiler
+        stack = profiler._stack()
+        self.path = '/'.join([*(stage.name for stage in stack), self.name])
+        stack.append(self)
+        self.bytes_before = profiler._probe_bytes()
+        if profiler.trace_memory:
+            tracemalloc.reset_peak()
+        self.cprofile = None
+        if profiler.cprofile_stage in (self.name, self.path):
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.children_cpu = child_usage()[0]
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        children_cpu, children_peak = child_usage()
+        profiler = self.profiler
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(profiler.cprofile_path(self.path))
+        record = {
+            'stage': self.path,
+            'wall_seconds': round(wall, 6),
+            'cpu_seconds': round(cpu, 6),
+            'peak_rss_bytes': peak_rss(),
+            'rows': self.rows,
+        }
+        if children_cpu is not None:
+            record['children_cpu_seconds'] = round(children_cpu - self.children_cpu, 6)
+            record['children_peak_rss_bytes'] = children_peak
+        stack = profiler._stack()
+        stack.pop()
+        if profiler.trace_memory:
+            # A nested stage resets the peak, so carry its peak up to the enclosing stage
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            record['tracemalloc_peak_bytes'] = peak
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        bytes_after = profiler._probe_bytes()
+        if self.bytes_before is not None and bytes_after is not None:
+            record['db_bytes'] = bytes_after - self.bytes_before
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        with profiler._lock:
+            profiler.stages.append(record)
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=False, trace_memory=False, cprofile_stage=None, bytes_probe=None,
+                 path='profile.json'):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.cprofile_stage = cprofile_stage if enabled else None
+        self.bytes_probe = bytes_probe if enabled else None
+        self.path = path
+        self.stages = []
+        self.started = datetime.now()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name):
+        if not self.enabled:
+            return NULL_STAGE
+        return _Stage(self, name)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _probe_bytes(self):
+        if self.bytes_probe is None:
+            return None
+        try:
+            return self.bytes_probe()
+        except Exception as e:  # e.g. not MySQL, or no privilege for GLOBAL STATUS
+            print(f"  [WARN] byte counter unavailable ({e.__class__.__name__}); profiling without it")
+            self.bytes_probe = None
+            return None
+
+    def cprofile_path(self, stage):
+        base = os.path.splitext(self.path)[0]
+        return f"{base}.{stage.replace('/', '.')}.prof"
+
+    def report(self):
+        children_cpu, children_peak = child_usage()
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'argv': sys.argv,
+            'pid': os.getpid(),
+            'trace_memory': self.trace_memory,
+            'scope': "cpu_seconds and peak_rss_bytes: this process only; children_*: worker processes "
+                     "that exited during the stage (pools spanning stages are in 'children')",
+            'children': {'cpu_seconds': None if children_cpu is None else round(children_cpu, 6),
+                         'peak_rss_bytes': children_peak},
+            'stages': list(self.stages),
+        }
+
+    def write(self, path=None):
+        if not self.enabled:
+            return None
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"[OK] Profile written to {path}")
+        return path
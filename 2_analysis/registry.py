@@ -0,0 +1,66 @@
+"""
+Shared aggregate cache for hospital_analysis.py
+
+The charts, the dashboard, the Excel export and the insights report read
+many of the same counts and summaries. Each one is declared once, as
+name -> (tables it reads, builder), and Aggregates.get() builds it on
+first use and returns the cached value after that. Every cached value
+remembers which frame objects it was built from (by weak reference, with
+their lengths), so replacing a table in ctx.frames rebuilds everything
+that depends on it the next time it is asked for. Edits made in place to
+a frame's values can't be seen this way; call invalidate(table) after
+them. get() holds a lock while it builds, so concurrent sections (see
+pipeline.py) share one build instead of racing to make their own.
+"""
+
+import threading
+import weakref
+
+
+def _fingerprint(frames, tables):
+    out = []
+    for table in tables:
+        df = frames.get(table)
+        out.append(None if df is None else (weakref.ref(df), len(df)))
+    return tuple(out)
+
+
+def _current(fingerprint, frames, tables):
+    for entry, table in zip(fingerprint, tables):
+        df = frames.get(table)
+        if entry is None or df is None:
+            if entry is not None or df is not None:
+                return False
+        elif entry[0]() is not df or entry[1] != len(df):
+            return False
+    return True
+
+
+class Aggregates:
+    def __init__(self, ctx, definitions):
+        self.ctx = ctx
+        self.definitions = definitions
+        self.values = {}
+        self.builds = {}  # name -> times built, to spot anything computed more than once
+        self.lock = threading.RLock()  # re-entrant: builders read other aggregates
+
+    def get(self, name):
+        tables, build = self.definitions[name]
+        with self.lock:
+            cached = self.values.get(name)
+            if cached is not None and _current(cached[0], self.ctx.frames, tables):
+                return cached[1]
+            value = build(self.ctx)
+            # Fingerprint after building: the builder may have extracted the tables it reads
+            self.values[name] = (_fingerprint(self.ctx.frames, tables), value)
+            self.builds[name] = self.builds.get(name, 0) + 1
+            return value
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def invalidate(self, table=None):
+        """Drop cached values that read this table (every value when table is None)."""
+        for name in list(self.values):
+            if table is None or table in self.definitions[name][0]:
+                del self.values[name]
@@ -0,0 +1,110 @@
+"""
+Read side of the daily rollup tables (see 1_database/refresh_rollups.py)
+Run: pip install pandas sqlalchemy pymysql
+
+The rollups are used only while they are fresh: every rollup's watermark
+in rollup_state has reached its fact table's current MAX(id), no update or
+delete is waiting in rollup_changes (the schema's triggers record the day
+of every status change, such as a bill paid or a patient discharged), and
+it was refreshed within max_age. A fresh rollup matches its fact table
+exactly, statuses included. The check is one primary-key lookup per fact
+table plus one over rollup_changes. When the rollups are missing or stale,
+the same monthly report is aggregated from the fact tables instead, still
+inside MySQL. A reporting window (see window.py) is a range on the
+rollups' day column, or on the fact table's date column, ahead of the
+GROUP BY.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from window import where, window_params
+
+ROLLUP_MAX_AGE = timedelta(hours=1)
+
+# rollup table: (fact table, primary key), as in refresh_rollups.ROLLUPS
+ROLLUP_SOURCES = {
+    'rollup_appointments_daily': ('appointments', 'appointment_id'),
+    'rollup_revenue_daily': ('billing', 'bill_id'),
+    'rollup_admissions_daily': ('admissions', 'admission_id'),
+    'rollup_lab_tests_daily': ('lab_tests', 'test_id'),
+}
+
+# sheet: (rollup table, fact table, fact date column, key columns,
+#         [(measure, aggregate over the rollup, aggregate over the fact table)])
+MONTHLY = {
+    'Revenue': ('rollup_revenue_daily', 'billing', 'bill_date', ['payment_status'], [
+        ('bills', "SUM(bills)", "COUNT(*)"),
+        ('total_amount', "SUM(total_amount)", "SUM(total_amount)"),
+    ]),
+    'Appointments': ('rollup_appointments_daily', 'appointments', 'appointment_date', ['status'], [
+        ('appointments', "SUM(appointments)", "COUNT(*)"),
+    ]),
+    'Admissions': ('rollup_admissions_daily', 'admissions', 'admission_date', ['admission_type'], [
+        ('admissions', "SUM(admissions)", "COUNT(*)"),
+        ('avg_los', "SUM(CASE WHEN status = 'Discharged' THEN los_days END) "
+                    "/ SUM(CASE WHEN status = 'Discharged' THEN stays END)",
+         "AVG(CASE WHEN status = 'Discharged' THEN TIMESTAMPDIFF(DAY, admission_date, discharge_date) END)"),
+    ]),
+    'Lab_Tests': ('rollup_lab_tests_daily', 'lab_tests', 'test_date', ['test_category'], [
+        ('tests', "SUM(tests)", "COUNT(*)"),
+        ('cost', "SUM(cost)", "SUM(cost)"),
+    ]),
+}
+
+
+def rollup_status(engine, max_age=ROLLUP_MAX_AGE, now=None):
+    """(fresh, reason): whether every rollup is current enough to stand in for its fact table."""
+    now = now or datetime.now()
+    try:
+        with engine.connect() as conn:
+            state = {name: (last_id, refreshed_at) for name, last_id, refreshed_at in conn.execute(
+                text("SELECT rollup_name, last_id, refreshed_at FROM rollup_state")).fetchall()}
+            pending = dict(conn.execute(
+                text("SELECT rollup_name, COUNT(*) FROM rollup_changes GROUP BY rollup_name")).fetchall())
+            for name, (table, pk) in ROLLUP_SOURCES.items():
+                if name not in state:
+                    return False, f"{name} has never been refreshed"
+                last_id, refreshed_at = state[name]
+                if isinstance(refreshed_at, str):
+                    refreshed_at = datetime.fromisoformat(refreshed_at)
+                if now - refreshed_at > max_age:
+                    return False, f"{name} last refreshed {refreshed_at:%Y-%m-%d %H:%M}"
+                max_pk = conn.execute(text(f"SELECT COALESCE(MAX({pk}), 0) FROM {table}")).scalar()
+                if max_pk > last_id:
+                    return False, f"{name} is {max_pk - last_id:,} {table} rows behind"
+                if pending.get(name):
+                    return False, f"{name} has {table} changes not folded in yet"
+    except SQLAlchemyError as e:
+        return False, f"rollups unavailable ({e.__class__.__name__})"
+    return True, "rollups are current"
+
+
+def monthly_sql(sheet, use_rollups, window=None):
+    rollup, fact, date_column, keys, measures = MONTHLY[sheet]
+    if use_rollups:
+        source, month = rollup, "DATE_FORMAT(day, '%Y-%m')"
+        columns = keys + [f"{rollup_expr} AS {name}" for name, rollup_expr, _ in measures]
+    else:
+        source, month = fact, f"DATE_FORMAT({date_column}, '%Y-%m')"
+        columns = [f"COALESCE({key}, '') AS {key}" for key in keys]
+        columns += [f"{fact_expr} AS {name}" for name, _, fact_expr in measures]
+    group_by = ', '.join(['month'] + keys)
+    select = where(f"SELECT {month} AS month, {', '.join(columns)} FROM {source}", source, window)
+    return f"{select} GROUP BY {group_by} ORDER BY {group_by}"
+
+
+def monthly_report(engine, use_rollups, window=None):
+    """{sheet: frame} of month-by-key counts and sums, from the rollups or the fact tables."""
+    import pandas as pd
+    frames = {}
+    with engine.connect() as conn:
+        for sheet in MONTHLY:
+            df = pd.read_sql(text(monthly_sql(sheet, use_rollups, window)), conn, params=window_params(window))
+            # DECIMAL sums arrive as Decimal objects
+            for name, *_ in MONTHLY[sheet][4]:
+                df[name] = pd.to_numeric(df[name])
+            frames[sheet] = df
+    return frames
@@ -0,0 +1,265 @@
+"""
+Local analytics service: the KPIs and reports over HTTP/JSON, kept in memory
+Run: pip install pandas sqlalchemy pymysql pyarrow
+
+python service.py                               # MySQL, through the Parquet snapshot
+python service.py --offline                     # the Parquet snapshot alone, no MySQL
+python service.py --port 8050 --ttl 600 --check-interval 5
+
+GET  /kpis                  every KPI
+GET  /kpis/<name>           one KPI, e.g. /kpis/bed_occupancy_rate
+GET  /monthly-revenue       bills, revenue and average bill per month
+GET  /doctors               appointments and completion rate per doctor
+GET  /insights              the insights report text
+GET  /status                cache age, table versions, builds and hits
+POST /refresh               rebuild on the next request
+
+One Analysis context (frames, features, the aggregate registry and the
+KPIs) is built on the first request and answers every request after that
+from memory; each endpoint's JSON is serialised once per build. The cache
+is rebuilt when it is older than --ttl, or when a change check finds that
+a table the service reads has moved: at most every --check-interval
+seconds a request probes COUNT(*), MAX(pk) (and MAX(created_at)) per
+table, or the snapshot's meta.json with --offline. New or deleted rows
+show up within the check interval; updates to existing rows within the
+TTL. Rebuilds go through the snapshot, so only new rows are fetched.
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+import hospital_analysis as ha
+from kpi import KPI_TABLES
+from snapshot import SnapshotStore, probe
+
+HOST = '127.0.0.1'  # local only
+PORT = 8050
+TTL = 300  # seconds before the cache is rebuilt regardless
+CHECK_INTERVAL = 10  # seconds between change checks against the source tables
+
+# Frames the endpoints read; the KPIs are aggregated in MySQL, so their tables are
+# only probed for changes (and loaded offline, where the KPIs come from the frames)
+FRAME_TABLES = ha.SECTIONS['insights'][1]
+SERVICE_TABLES = list(dict.fromkeys(FRAME_TABLES + KPI_TABLES))
+
+
+def _plain(value):
+    """JSON-ready copy: numpy scalars as Python numbers, NaN as null, dates as ISO strings."""
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if value is pd.NaT or value is None:
+        return None
+    return value
+
+
+def _records(df):
+    return _plain(df.to_dict('records'))
+
+
+# ============================================
+# ENDPOINTS
+# ============================================
+# path: payload of the Analysis context
+
+ENDPOINTS = {
+    '/kpis': lambda ctx: _plain(ctx.kpis),
+    '/monthly-revenue': lambda ctx: _records(ctx.bill['monthly']),
+    '/doctors': lambda ctx: _records(ctx.appt['doctor_summary']),
+    '/insights': lambda ctx: {'text': ha.insights_text(ctx)},
+}
+
+
+# ============================================
+# CACHE
+# ============================================
+
+class AnalyticsCache:
+    def __init__(self, engine=None, snapshot_dir=ha.SNAPSHOT_DIR, offline=False,
+                 ttl=TTL, check_interval=CHECK_INTERVAL):
+        self.engine = engine
+        self.snapshot_dir = snapshot_dir
+        self.offline = offline
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.ctx = None
+        self.versions = None
+        self.built_at = self.checked_at = 0.0
+        self.responses = {}  # path -> JSON bytes for the current build
+        self.builds = self.hits = 0
+        self.reason = None
+        self.refresh_requested = False
+
+    def table_versions(self):
+        """{table: what changes when rows are added or deleted}, without reading any rows."""
+        if self.offline:
+            store = SnapshotStore(None, self.snapshot_dir)
+            return {table: [(meta or {}).get(key) for key in ('row_count', 'max_pk', 'max_created_at')]
+                    for table, meta in ((t, store.read_meta(t)) for t in SERVICE_TABLES)}
+        with self.engine.connect() as conn:
+            return {table: list(probe(conn, table).values()) for table in SERVICE_TABLES}
+
+    def _build(self, versions):
+        if self.offline:
+            missing = [table for table in SERVICE_TABLES if versions[table][1] is None]
+            if missing:
+                raise FileNotFoundError(f"no snapshot of {', '.join(missing)} in {self.snapshot_dir}; "
+                                        f"run hospital_analysis.py against MySQL once to create it")
+            ctx = ha.Analysis(None, snapshot_dir=None, chart_workers=1, kpi_source='pandas', use_rollups=False)
+            store = SnapshotStore(None, self.snapshot_dir)
+            ctx.frames.update({table: store.load_table(table) for table in SERVICE_TABLES})
+        else:
+            ctx = ha.Analysis(self.engine, snapshot_dir=self.snapshot_dir, chart_workers=1)
+            ctx.extract(FRAME_TABLES)
+        ctx.prepare(FRAME_TABLES)
+        ctx.kpis  # computed now, not on the first /kpis request
+        self.ctx, self.versions, self.responses = ctx, versions, {}
+        self.refresh_requested = False
+        self.built_at = self.checked_at = time.monotonic()
+        self.builds += 1
+
+    def _stale(self, now):
+        """Why the cache must be rebuilt, or None; probes the tables at most every check_interval."""
+        if self.ctx is None:
+            return 'first request'
+        if self.refresh_requested:
+            return 'refresh requested'
+        if now - self.built_at > self.ttl:
+            return f'older than {self.ttl}s'
+        if now - self.checked_at < self.check_interval:
+            return None
+        self.checked_at = now
+        versions = self.table_versions()
+        changed = [table for table in SERVICE_TABLES if versions[table] != self.versions[table]]
+        return f"{', '.join(changed)} changed" if changed else None
+
+    def invalidate(self):
+        with self.lock:
+            self.refresh_requested = True
+
+    def response(self, path):
+        """JSON bytes for an endpoint path, built from the cached context."""
+        with self.lock:
+            now = time.monotonic()
+            reason = self._stale(now)
+            if reason:
+                print(f"[>] Rebuilding analytics cache ({reason})...")
+                started = time.perf_counter()
+                self._build(self.table_versions())
+                self.reason = reason
+                print(f"[OK] Cache ready ({time.perf_counter() - started:.2f}s)")
+            elif path in self.responses:
+                self.hits += 1
+                return self.responses[path]
+            body = json.dumps(self.payload(path)).encode()
+            if path != '/status':
+                self.responses[path] = body
+            return body
+
+    def payload(self, path):
+        if path == '/status':
+            return _plain({
+                'source': 'snapshot' if self.offline else 'mysql',
+                'age_seconds': round(time.monotonic() - self.built_at, 3),
+                'last_rebuild': self.reason,
+                'ttl': self.ttl,
+                'check_interval': self.check_interval,
+                'builds': self.builds,
+                'hits': self.hits,
+                'versions': self.versions,
+            })
+        if path.startswith('/kpis/'):
+            name = path[len('/kpis/'):]
+            if name not in self.ctx.kpis:
+                raise KeyError(f"unknown KPI {name!r}")
+            return {name: _plain(self.ctx.kpis[name])}
+        return ENDPOINTS[path](self.ctx)
+
+
+# ============================================
+# HTTP
+# ============================================
+
+class Handler(BaseHTTPRequestHandler):
+    cache = None  # set by serve()
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({'error': message}).encode())
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip('/') or '/'
+        if path not in ENDPOINTS and path != '/status' and not path.startswith('/kpis/'):
+            self._error(404, f"unknown endpoint {path}; try {', '.join(list(ENDPOINTS) + ['/status'])}")
+            return
+        try:
+            self._send(200, self.cache.response(path))
+        except KeyError as e:
+            self._error(404, e.args[0])
+        except Exception as e:
+            print(f"  [WARN] {path}: {e.__class__.__name__}: {e}")
+            self._error(500, f"{e.__class__.__name__}: {e}")
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/refresh':
+            self._error(404, "only POST /refresh")
+            return
+        self.cache.invalidate()
+        self._send(200, b'{"refresh": "scheduled"}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(cache, host=HOST, port=PORT):
+    Handler.cache = cache
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"[OK] Serving on http://{host}:{port} (GET {', '.join(ENDPOINTS)}, /kpis/<name>, /status)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the hospital KPIs and reports over HTTP/JSON")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--ttl', type=float, default=TTL, help=f"seconds before a forced rebuild (default {TTL})")
+    parser.add_argument('--check-interval', type=float, default=CHECK_INTERVAL,
+                        help=f"seconds between change checks (default {CHECK_INTERVAL})")
+    parser.add_argument('--offline', action='store_true',
+                        help="serve from the Parquet snapshot alone, without MySQL")
+    parser.add_argument('--snapshot-dir', default=ha.SNAPSHOT_DIR)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    engine = None if args.offline else ha.make_engine()
+    serve(AnalyticsCache(engine, args.snapshot_dir, args.offline, args.ttl, args.check_interval), args.host, args.port)
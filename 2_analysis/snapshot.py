@@ -0,0 +1,248 @@
+"""
+Local Parquet snapshot of the analysis tables, refreshed incrementally
+Run: pip install pandas sqlalchemy pymysql pyarrow
+
+Layout: <root>/<table>/part-00000.parquet ... plus <root>/<table>/meta.json.
+Rows are grouped by primary key into blocks of BLOCK_IDS IDs, and each part
+file holds a fixed range of PART_BLOCKS blocks, so the number of parts is
+bounded by the table's ID range rather than by the number of refreshes.
+
+Every refresh asks MySQL for a row count and checksum per block (a
+BIT_XOR of CRC32 over the cached columns, GROUP BY block). Only that
+summary comes back, one row per block, and it is compared with the one in
+meta.json. Blocks that gained, lost or changed rows are fetched again and
+their rows replaced in the part files that hold them; everything else is
+left alone. One bill changing status re-fetches one block, not the table.
+The table is reloaded in full only when there is no snapshot yet or the
+schema signature changed.
+
+With verify=False there is no checksum scan: only rows with pk > the
+cached MAX(pk) are appended, and deletions or a created_at that moved
+without new IDs reload the table. The snapshot always holds the full
+history, so a run with a reporting window (see window.py) reads its fact
+tables from MySQL with the range in the query instead of through here.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+from sqlalchemy import text
+
+from extract import COLUMNS, EXTRACT_WORKERS, PRIMARY_KEYS, apply_types, date_columns, map_tables, select_sql
+
+SNAPSHOT_DIR = 'snapshot'
+BLOCK_IDS = 10_000  # primary-key values per checksummed block
+PART_BLOCKS = 20  # blocks per part file
+
+# Tables with an insert timestamp to cross-check the ID watermark against
+CREATED_AT = {'appointments': 'created_at'}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The snapshot cache needs pyarrow: pip install pyarrow") from e
+
+
+def schema_signature(conn, table):
+    """Hash of the live column types plus the columns the analysis caches."""
+    rows = conn.execute(text("""
+        SELECT COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table
+        ORDER BY ORDINAL_POSITION
+    """), {'table': table}).fetchall()
+    payload = json.dumps([[list(r) for r in rows], COLUMNS[table]], default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def block_checksums(conn, table):
+    """{block: [rows, checksum]} for every non-empty block of BLOCK_IDS primary keys, computed by MySQL."""
+    pk = PRIMARY_KEYS[table]
+    fields = ', '.join(f"IFNULL({column}, '~')" for column in COLUMNS[table])
+    rows = conn.execute(text(f"""
+        SELECT FLOOR(({pk} - 1) / :block) AS block, COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', {fields})))
+        FROM {table} GROUP BY block
+    """), {'block': BLOCK_IDS}).fetchall()
+    return {str(int(block)): [int(count), int(checksum)] for block, count, checksum in rows}
+
+
+def block_ranges(blocks):
+    """Contiguous runs of block numbers as (low, high] primary-key ranges."""
+    ranges = []
+    for block in sorted(blocks):
+        low, high = block * BLOCK_IDS, (block + 1) * BLOCK_IDS
+        if ranges and ranges[-1][1] == low:
+            ranges[-1][1] = high
+        else:
+            ranges.append([low, high])
+    return ranges
+
+
+def _blocks(pks):
+    return (pks.astype('int64') - 1) // BLOCK_IDS  # the keys may be downcast to int8
+
+
+def probe(conn, table):
+    pk = PRIMARY_KEYS[table]
+    select = f"COUNT(*), COALESCE(MAX({pk}), 0)"
+    if table in CREATED_AT:
+        select += f", MAX({CREATED_AT[table]})"
+    row = conn.execute(text(f"SELECT {select} FROM {table}")).fetchone()
+    created = str(row[2]) if table in CREATED_AT and row[2] is not None else None
+    return {'row_count': int(row[0]), 'max_pk': int(row[1]), 'max_created_at': created}
+
+
+class SnapshotStore:
+    def __init__(self, engine, root=SNAPSHOT_DIR, verify=True):
+        _require_pyarrow()
+        self.engine = engine
+        self.root = root
+        self.verify = verify
+
+    def _dir(self, table):
+        return os.path.join(self.root, table)
+
+    def _meta_path(self, table):
+        return os.path.join(self._dir(table), 'meta.json')
+
+    def read_meta(self, table):
+        try:
+            with open(self._meta_path(table)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, table, meta):
+        tmp = self._meta_path(table) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, self._meta_path(table))
+
+    def _fetch(self, conn, table, low=0, high=None):
+        pk = PRIMARY_KEYS[table]
+        condition = f"{pk} > :low" + (f" AND {pk} <= :high" if high is not None else "")
+        sql = text(f"{select_sql(table)} WHERE {condition} ORDER BY {pk}")
+        df = pd.read_sql(sql, conn, params={'low': low, 'high': high}, parse_dates=date_columns(table))
+        return apply_types(df, table)
+
+    def _write_rows(self, table, fetched, replaced, parts):
+        """Write fetched rows into the part files covering them, dropping the rows of the replaced blocks.
+
+        Returns the part names; each part is rewritten whole, through a temporary file.
+        """
+        pk = PRIMARY_KEYS[table]
+        fetched_parts = _blocks(fetched[pk]) // PART_BLOCKS
+        parts = set(parts)
+        for index in sorted(set(fetched_parts) | {block // PART_BLOCKS for block in replaced}):
+            name = f"part-{index:05d}.parquet"
+            path = os.path.join(self._dir(table), name)
+            pieces = [fetched[fetched_parts == index]]
+            if name in parts:
+                kept = pd.read_parquet(path)
+                pieces.insert(0, kept[~_blocks(kept[pk]).isin(replaced)])
+            pieces = [piece for piece in pieces if len(piece)]
+            if pieces:
+                df = apply_types(pd.concat(pieces, ignore_index=True), table).sort_values(pk, ignore_index=True)
+                df.to_parquet(path + '.tmp', index=False)
+                os.replace(path + '.tmp', path)
+                parts.add(name)
+            elif name in parts:
+                os.remove(path)
+                parts.discard(name)
+        return sorted(parts)
+
+    def reload_reason(self, meta, live, signature):
+        """Why the table must be reloaded in full, or None when it can be refreshed in place."""
+        if meta is None:
+            return 'no snapshot'
+        if meta['signature'] != signature:
+            return 'schema changed'
+        if meta.get('block_ids') != BLOCK_IDS or meta.get('part_blocks') != PART_BLOCKS:
+            return 'snapshot layout changed'
+        if self.verify:
+            return None if meta.get('blocks') is not None else 'no block checksums'
+        if live['max_pk'] < meta['max_pk'] or live['row_count'] < meta['row_count']:
+            return 'rows deleted'
+        if live['max_created_at'] != meta.get('max_created_at') and live['max_pk'] == meta['max_pk']:
+            return 'created_at moved without new IDs'
+        return None
+
+    def refresh_table(self, table):
+        """Bring one table's snapshot up to date; returns (action, rows_fetched)."""
+        pk = PRIMARY_KEYS[table]
+        with self.engine.connect() as conn:
+            signature = schema_signature(conn, table)
+            live = probe(conn, table)
+            meta = self.read_meta(table)
+            reason = self.reload_reason(meta, live, signature)
+
+            if reason is not None:
+                shutil.rmtree(self._dir(table), ignore_errors=True)
+                os.makedirs(self._dir(table))
+                blocks = block_checksums(conn, table) if self.verify else None
+                df = self._fetch(conn, table)
+                meta = {
+                    'signature': signature,
+                    'block_ids': BLOCK_IDS,
+                    'part_blocks': PART_BLOCKS,
+                    'parts': self._write_rows(table, df, set(), []),
+                    'row_count': len(df),
+                    'max_pk': int(df[pk].max()) if len(df) else 0,
+                    'max_created_at': live['max_created_at'],
+                    'blocks': blocks,
+                }
+                self._write_meta(table, meta)
+                return f"full reload ({reason})", len(df)
+
+            if self.verify:
+                # Checksums are taken before the rows are fetched: a row written in between
+                # leaves its block mismatched, so the next refresh fetches it again
+                blocks = block_checksums(conn, table)
+                changed = {int(b) for b in set(blocks) | set(meta['blocks']) if blocks.get(b) != meta['blocks'].get(b)}
+                if not changed:
+                    return 'up to date', 0
+                frames = [self._fetch(conn, table, low, high) for low, high in block_ranges(changed)]
+                df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+                meta['parts'] = self._write_rows(table, df, changed, meta['parts'])
+                meta['blocks'] = blocks
+                meta['row_count'] = sum(count for count, _ in blocks.values())
+                meta['max_pk'] = max(live['max_pk'], int(df[pk].max()) if len(df) else 0)
+                action = f"{len(changed)} of {len(blocks)} blocks re-fetched"
+            else:
+                if live['max_pk'] == meta['max_pk']:
+                    return 'up to date', 0
+                df = self._fetch(conn, table, meta['max_pk'])
+                if len(df):
+                    meta['parts'] = self._write_rows(table, df, set(), meta['parts'])
+                    meta['row_count'] += len(df)
+                    meta['max_pk'] = int(df[pk].max())
+                action = 'incremental'
+            meta['max_created_at'] = live['max_created_at']
+            self._write_meta(table, meta)
+            return action, len(df)
+
+    def load_table(self, table):
+        meta = self.read_meta(table)
+        parts = [pd.read_parquet(os.path.join(self._dir(table), part)) for part in meta['parts']]
+        if not parts:
+            return apply_types(pd.DataFrame(columns=list(COLUMNS[table])), table)
+        df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        # Parts may carry different category sets / int widths; normalise them
+        return apply_types(df, table)
+
+    def _refresh_and_load(self, table):
+        action, fetched = self.refresh_table(table)
+        return action, fetched, self.load_table(table)
+
+    def refresh(self, tables, workers=EXTRACT_WORKERS):
+        # Each table lives in its own directory, so tables refresh independently
+        frames = {}
+        results = map_tables(self._refresh_and_load, tables, workers)
+        for table, ((action, fetched, df), elapsed) in results.items():
+            print(f"  [OK] {table}: {action}, {fetched:,} rows fetched in {elapsed:.2f}s")
+            frames[table] = df
+        return frames
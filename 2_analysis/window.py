@@ -0,0 +1,141 @@
+"""
+Reporting windows for hospital_analysis.py (--since / --until / --window)
+
+A window is a (since, until) pair of dates, both inclusive, either end
+open (None). It is pushed into every query that reads a fact table as a
+range on the table's date column, compared bare (no DATE() or
+DATE_FORMAT() around it), so MySQL range-scans the date indexes in
+schema.sql and prunes the RANGE partitions of schema_partitioned.sql:
+
+    bill_date >= :window_since AND bill_date < :window_until
+
+:window_until is the day after until, so DATETIME values from the last
+day are kept. The daily rollups are windowed on their day column the same
+way. patients, doctors and beds describe the current state and are read
+whole.
+
+--window takes a rolling length ending at --until (today by default):
+30d, 12w, 3m or 1y, or a fiscal year or quarter: fy2025 is April 2025 to
+March 2026 (FISCAL_YEAR_START), fy2025q1 its first three months.
+"""
+
+import calendar
+import re
+from datetime import date, datetime, time, timedelta
+
+FISCAL_YEAR_START = 4  # April
+
+# table: the date column a window filters on (fact tables and their daily rollups)
+WINDOW_COLUMNS = {
+    'appointments': 'appointment_date',
+    'billing': 'bill_date',
+    'admissions': 'admission_date',
+    'lab_tests': 'test_date',
+    'rollup_appointments_daily': 'day',
+    'rollup_revenue_daily': 'day',
+    'rollup_admissions_daily': 'day',
+    'rollup_lab_tests_daily': 'day',
+}
+
+ROLLING = re.compile(r'^(\d+)([dwmy])$')
+FISCAL = re.compile(r'^fy(\d{4})(?:q([1-4]))?$')
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def parse_window(spec, until=None):
+    """(since, until) for a --window value: a rolling length ending at until, or a fiscal period."""
+    spec = spec.strip().lower()
+    fiscal = FISCAL.match(spec)
+    if fiscal:
+        start = date(int(fiscal.group(1)), FISCAL_YEAR_START, 1)
+        months = 12
+        if fiscal.group(2):
+            start, months = add_months(start, 3 * (int(fiscal.group(2)) - 1)), 3
+        return start, add_months(start, months) - timedelta(days=1)
+    rolling = ROLLING.match(spec)
+    if not rolling:
+        raise ValueError(f"Unknown window {spec!r}; use e.g. 30d, 12w, 3m, 1y, fy2025 or fy2025q1")
+    count, unit = int(rolling.group(1)), rolling.group(2)
+    if count < 1:
+        raise ValueError("A rolling window needs a length of at least 1")
+    until = until or date.today()
+    if unit in 'dw':
+        since = until - timedelta(days=count * (7 if unit == 'w' else 1) - 1)
+    else:
+        since = add_months(until, -count * (12 if unit == 'y' else 1)) + timedelta(days=1)
+    return since, until
+
+
+def make_window(since=None, until=None, spec=None):
+    """The window for the CLI options (dates as ISO strings), or None for the full history."""
+    since = date.fromisoformat(since) if since else None
+    until = date.fromisoformat(until) if until else None
+    if spec:
+        if since:
+            raise ValueError("--window already sets the start; drop --since")
+        since, until = parse_window(spec, until)
+    if since is None and until is None:
+        return None
+    if since and until and since > until:
+        raise ValueError(f"The window starts ({since}) after it ends ({until})")
+    return since, until
+
+
+def window_label(window):
+    since, until = window
+    if since and until:
+        return f"{since:%Y-%m-%d} to {until:%Y-%m-%d}"
+    return f"since {since:%Y-%m-%d}" if since else f"up to {until:%Y-%m-%d}"
+
+
+def window_end(window, now):
+    """What 'recent' is measured back from: the end of the window, or now."""
+    if window is None or window[1] is None:
+        return now
+    return datetime.combine(window[1] + timedelta(days=1), time())
+
+
+# ============================================
+# PUSH-DOWN
+# ============================================
+
+def is_windowed(table, window):
+    """Whether the window restricts table (only fact tables and their rollups have a date column for it)."""
+    return window is not None and table in WINDOW_COLUMNS
+
+
+def window_filter(table, window):
+    """SQL condition restricting table to the window ('' when it doesn't apply); see window_params."""
+    if not is_windowed(table, window):
+        return ''
+    column = WINDOW_COLUMNS[table]
+    since, until = window
+    conditions = []
+    if since:
+        conditions.append(f"{column} >= :window_since")
+    if until:
+        conditions.append(f"{column} < :window_until")
+    return ' AND '.join(conditions)
+
+
+def window_params(window):
+    if window is None:
+        return {}
+    since, until = window
+    params = {}
+    if since:
+        params['window_since'] = since
+    if until:
+        params['window_until'] = until + timedelta(days=1)
+    return params
+
+
+def where(sql, table, window):
+    """sql (a single-table SELECT without WHERE) with the window's condition for table appended."""
+    condition = window_filter(table, window)
+    return f"{sql} WHERE {condition}" if condition else sql
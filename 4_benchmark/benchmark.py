@@ -0,0 +1,286 @@
+"""
+Scale-factor benchmark for the generate -> extract -> analyze -> export pipeline
+Run: pip install pandas numpy matplotlib seaborn plotly sqlalchemy pymysql openpyxl pyarrow faker
+
+python benchmark.py run --scales 1,10,100 --out results.json              # parquet shards, no MySQL needed
+python benchmark.py run --scales 1,10 --source mysql --out results.json   # reload hospital_db per scale
+python benchmark.py compare baseline.json results.json --threshold 0.10
+
+For each scale factor (a multiple of data_generator.COUNTS) the dataset is
+generated with the numpy engine, either into Parquet shards under --workdir
+(reused while the manifest matches) or into hospital_db after resetting the
+schema. The analysis then runs phase by phase on a fresh Analysis context:
+extraction, feature engineering, KPIs, each chart, the dashboard, the Excel
+export and the insights report, each timed on its own. Charts render
+in-process here so every chart gets its own timing.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = os.path.join(ROOT, '1_database')
+ANALYSIS_DIR = os.path.join(ROOT, '2_analysis')
+sys.path[:0] = [DATABASE_DIR, ANALYSIS_DIR]
+
+SCALES = [1, 10, 100]
+WORKDIR = 'bench_data'
+THRESHOLD = 0.10  # relative slowdown flagged as a regression
+MIN_DELTA = 0.05  # seconds; ignore noise on very short phases
+
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timed(phases, name, fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    phases[name] = time.perf_counter() - started
+    return result
+
+
+# ============================================
+# DATASETS
+# ============================================
+
+def shard_dir(workdir, scale, seed):
+    return os.path.join(workdir, f"scale_{scale:g}_seed_{seed}")
+
+
+def generate_shards(workdir, scale, seed, workers, verbose=False):
+    """Write Parquet shards for one scale, reusing them if the manifest matches. Returns seconds spent."""
+    from file_sink import MANIFEST, read_manifest, write_shards
+    path = shard_dir(workdir, scale, seed)
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        manifest = read_manifest(path)
+        if manifest['scale'] == scale and manifest['seed'] == seed and manifest['format'] == 'parquet':
+            return 0.0
+    started = time.perf_counter()
+    with quiet(not verbose):
+        write_shards(path, fmt='parquet', scale=scale, seed=seed, engine='numpy', workers=workers)
+    return time.perf_counter() - started
+
+
+def generate_mysql(scale, seed, workers, verbose=False):
+    """Reset hospital_db from schema.sql and bulk-load one scale. Returns seconds spent."""
+    from data_generator import generate_all_data
+    started = time.perf_counter()
+    with quiet(not verbose):
+        # setup_schema.py runs at import time and resolves schema.sql relative to its directory
+        subprocess.run([sys.executable, 'setup_schema.py'], cwd=DATABASE_DIR, check=True,
+                       stdout=None if verbose else subprocess.DEVNULL)
+        generate_all_data(scale=scale, bulk=True, workers=workers, seed=seed, engine='numpy')
+    return time.perf_counter() - started
+
+
+def load_shard_frames(path, tables):
+    """Analysis frames read straight from Parquet shards: the same pruned columns and dtypes as extract."""
+    import pandas as pd
+    from extract import COLUMNS, apply_types
+    from file_sink import read_manifest
+    manifest = read_manifest(path)
+    frames = {}
+    for table in tables:
+        columns = list(COLUMNS[table])
+        parts = [pd.read_parquet(os.path.join(path, shard['path']), columns=columns)
+                 for shard in manifest['tables'][table]['shards']]
+        df = pd.concat(parts, ignore_index=True)
+        for column, kind in COLUMNS[table].items():
+            if kind == 'time':
+                # Shards keep the generator's 'HH:MM'; MySQL's TIME column would add the seconds
+                values = df[column].astype(str)
+                df[column] = values.where(values.str.count(':') == 2, values + ':00')
+        frames[table] = apply_types(df, table)
+    return frames
+
+
+# ============================================
+# PHASES
+# ============================================
+
+def run_phases(source, path, out_dir, verbose=False):
+    """One pass over the analysis with every phase timed: {phase: seconds}."""
+    import hospital_analysis as ha
+    from charts import render_charts
+    from extract import ANALYSIS_TABLES
+
+    phases = {}
+    os.makedirs(out_dir, exist_ok=True)
+    with quiet(not verbose):
+        if source == 'files':
+            ctx = ha.Analysis(None, out_dir=out_dir, snapshot_dir=None, chart_workers=1, kpi_source='pandas')
+            ctx.frames.update(timed(phases, 'extract', load_shard_frames, path, ANALYSIS_TABLES))
+        else:
+            ctx = ha.Analysis(ha.make_engine(), out_dir=out_dir, snapshot_dir=None, chart_workers=1)
+            timed(phases, 'extract', ctx.extract, ANALYSIS_TABLES)
+
+        timed(phases, 'features', lambda: (ctx.patients, ctx.admissions, ctx.appt, ctx.bill))
+        timed(phases, 'kpi', lambda: ctx.kpis)
+        for name in ha.CHART_SECTIONS:
+            build = ha.SECTIONS[name][0]
+            timed(phases, f'chart:{name}', lambda: render_charts([build(ctx)], out_dir, workers=1, force=True))
+        timed(phases, 'dashboard', ha.dashboard_section, ctx)
+        timed(phases, 'excel', ha.excel_section, ctx)
+        timed(phases, 'insights', ha.insights_section, ctx)
+    phases['total'] = sum(phases.values())
+    rows = {table: len(df) for table, df in ctx.frames.items()}
+    return phases, rows
+
+
+def benchmark(scales, source='files', workdir=WORKDIR, seed=None, repeat=1, workers=1, verbose=False):
+    from data_generator import SEED
+    seed = SEED if seed is None else seed
+    runs = []
+    for scale in scales:
+        print(f"[>] scale {scale:g}x: generating ({source})...")
+        if source == 'files':
+            path = shard_dir(workdir, scale, seed)
+            generate_seconds = generate_shards(workdir, scale, seed, workers, verbose)
+        else:
+            path = None
+            generate_seconds = generate_mysql(scale, seed, workers, verbose)
+        print(f"  [OK] generate: {generate_seconds:.2f}s" + (" (reused shards)" if generate_seconds == 0 else ""))
+
+        samples = []
+        for attempt in range(repeat):
+            out_dir = os.path.join(workdir, f"output_scale_{scale:g}")
+            phases, rows = run_phases(source, path, out_dir, verbose)
+            samples.append(phases)
+            print(f"  [OK] analysis pass {attempt + 1}/{repeat}: {phases['total']:.2f}s")
+
+        median = {phase: statistics.median(s[phase] for s in samples) for phase in samples[0]}
+        for phase, seconds in median.items():
+            print(f"     {phase:<22} {seconds:8.3f}s")
+        runs.append({
+            'scale': scale,
+            'rows': rows,
+            'generate_seconds': generate_seconds,
+            'phases': median,
+            'samples': samples,
+        })
+    return runs
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'git': _git_revision(),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================
+# COMPARE
+# ============================================
+
+def compare(baseline, current, threshold=THRESHOLD, min_delta=MIN_DELTA):
+    """Rows of (scale, phase, old, new, ratio, regressed) for phases present in both results."""
+    old_runs = {run['scale']: run for run in baseline['runs']}
+    rows = []
+    for run in current['runs']:
+        old = old_runs.get(run['scale'])
+        if old is None:
+            continue
+        for phase, new_seconds in run['phases'].items():
+            old_seconds = old['phases'].get(phase)
+            if old_seconds is None:
+                continue
+            ratio = new_seconds / old_seconds if old_seconds else float('inf')
+            regressed = new_seconds > old_seconds * (1 + threshold) and new_seconds - old_seconds > min_delta
+            rows.append((run['scale'], phase, old_seconds, new_seconds, ratio, regressed))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"{'scale':>6}  {'phase':<22} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for scale, phase, old, new, ratio, regressed in rows:
+        flag = '  [REGRESSION]' if regressed else ''
+        print(f"{scale:>5g}x  {phase:<22} {old:>9.3f}s {new:>9.3f}s {ratio:>6.2f}x{flag}")
+    regressions = sum(1 for row in rows if row[-1])
+    if regressions:
+        print(f"\n[WARN] {regressions} phase(s) slower than baseline by more than {threshold:.0%}")
+    else:
+        print(f"\n[OK] No phase slower than baseline by more than {threshold:.0%}")
+    return regressions
+
+
+# ============================================
+# CLI
+# ============================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hospital pipeline across scale factors")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="generate datasets and time every analysis phase")
+    run.add_argument('--scales', default=','.join(str(s) for s in SCALES),
+                     help=f"comma-separated scale factors (default {','.join(str(s) for s in SCALES)})")
+    run.add_argument('--source', choices=['files', 'mysql'], default='files',
+                     help="Parquet shards under --workdir, or hospital_db reloaded per scale (default files)")
+    run.add_argument('--workdir', default=WORKDIR, help=f"shards and chart output (default {WORKDIR})")
+    run.add_argument('--seed', type=int, default=None, help="generator seed (default data_generator.SEED)")
+    run.add_argument('--repeat', type=int, default=1, help="analysis passes per scale; the median is kept")
+    run.add_argument('--workers', type=int, default=1, help="generator processes")
+    run.add_argument('--out', default=None, help="write results JSON here")
+    run.add_argument('--verbose', action='store_true', help="show the pipeline's own output")
+
+    cmp = commands.add_parser('compare', help="flag phases that got slower between two result files")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=THRESHOLD,
+                     help=f"relative slowdown to flag (default {THRESHOLD})")
+    cmp.add_argument('--min-delta', type=float, default=MIN_DELTA,
+                     help=f"ignore slowdowns smaller than this many seconds (default {MIN_DELTA})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.threshold, args.min_delta)
+        return 1 if print_comparison(rows, args.threshold) else 0
+
+    scales = [float(s) if '.' in s else int(s) for s in args.scales.split(',') if s.strip()]
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'source': args.source,
+        'environment': environment(),
+        'runs': benchmark(scales, args.source, args.workdir, args.seed, args.repeat, args.workers, args.verbose),
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"[OK] Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())